@@ -0,0 +1,90 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+import rl_scape
+from rl_scape.resources import JVM_PROFILES
+
+
+def run_profile(args, profile):
+    env = rl_scape.RLScapeEnv(
+        name=args.name,
+        port=args.port,
+        jvm_profile=profile,
+        pin_cpus=args.pin_cpus,
+        instance=args.instance,
+        metrics=True,
+    )
+    rng = np.random.default_rng(args.seed)
+    try:
+        env.reset()
+        for _ in range(args.warmup):
+            env.step({"type": 0, "x": 0, "y": 0})
+        start = time.perf_counter()
+        for _ in range(args.steps):
+            action_type = int(rng.integers(0, 4)) if args.random_actions else 0
+            env.step({"type": action_type, "x": int(rng.integers(0, env.width)), "y": int(rng.integers(0, env.height))})
+        elapsed = time.perf_counter() - start
+        step_hist = env.get_metrics()["phases"].get("step", {})
+        rss = env.launcher.rss_kb() if env.launcher is not None else {}
+        return {
+            "profile": profile,
+            "steps": args.steps,
+            "steps_per_s": args.steps / max(1e-9, elapsed),
+            "step_p50_ms": step_hist.get("p50", 0.0) * 1000,
+            "step_p99_ms": step_hist.get("p99", 0.0) * 1000,
+            "server_rss_mb": (rss.get("server") or 0) / 1024,
+            "client_rss_mb": (rss.get("client") or 0) / 1024,
+            "server_cpus": env.launcher.server_cpus if env.launcher is not None else None,
+            "client_cpus": env.launcher.client_cpus if env.launcher is not None else None,
+        }
+    finally:
+        env.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare steps/sec and memory across JVM resource profiles.")
+    parser.add_argument("--name", default="agent")
+    parser.add_argument("--port", type=int, default=5656)
+    parser.add_argument("--profiles", default=",".join(JVM_PROFILES), help="Comma separated profile names")
+    parser.add_argument("--steps", type=int, default=500)
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--random-actions", action="store_true")
+    parser.add_argument("--pin-cpus", action="store_true")
+    parser.add_argument("--instance", type=int, default=0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=None, help="Write the results as JSON")
+    args = parser.parse_args()
+
+    results = []
+    for profile in [p.strip() for p in args.profiles.split(",") if p.strip()]:
+        print(f"[bench] profile={profile}", flush=True)
+        result = run_profile(args, profile)
+        results.append(result)
+        print(
+            f"[bench] {profile}: {result['steps_per_s']:.1f} steps/s, p50 {result['step_p50_ms']:.1f} ms, "
+            f"p99 {result['step_p99_ms']:.1f} ms, rss server {result['server_rss_mb']:.0f} MB "
+            f"client {result['client_rss_mb']:.0f} MB",
+            flush=True,
+        )
+
+    print(f"{'profile':<12}{'steps/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'server MB':>12}{'client MB':>12}")
+    for r in results:
+        print(
+            f"{r['profile']:<12}{r['steps_per_s']:>10.1f}{r['step_p50_ms']:>10.1f}{r['step_p99_ms']:>10.1f}"
+            f"{r['server_rss_mb']:>12.0f}{r['client_rss_mb']:>12.0f}"
+        )
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Saved results to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,20 @@
 import argparse
+import json
 import os
+import socket
 import sys
+import threading
+import time
 
+import numpy as np
 from stable_baselines3 import PPO
-from stable_baselines3.common.vec_env import DummyVecEnv, VecTransposeImage
+from stable_baselines3.common.vec_env import DummyVecEnv, SubprocVecEnv
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
 
 import rl_scape
+from rl_scape.metrics import SKILL_NAMES, mean_ci95
+from rl_scape.pool import InstancePool
 
 
 def make_env(name, render_scale=1, render_fps=30):
@@ -17,6 +24,7 @@ def make_env(name, render_scale=1, render_fps=30):
             render_mode="human",
             render_scale=render_scale,
             render_fps=render_fps,
+            layout="chw",
         )
         env.unwrapped.action_space = env.unwrapped.sb3_action_space
         return env
@@ -24,6 +32,168 @@ def make_env(name, render_scale=1, render_fps=30):
     return _thunk
 
 
+def make_batch_env(pool_address, action_grid=None, episode_length=2000, viewer=None):
+    def _thunk():
+        env = rl_scape.make(
+            render_mode="rgb_array",
+            pool_address=pool_address,
+            action_grid=action_grid,
+            episode_length=episode_length,
+            layout="chw",
+            viewer=viewer,
+        )
+        env.unwrapped.action_space = env.unwrapped.sb3_action_space
+        return env
+
+    return _thunk
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class _Episode:
+    def __init__(self):
+        self.ret = 0.0
+        self.length = 0
+        self.start_xp = None
+        self.end_xp = None
+        self.start_levels = None
+        self.end_levels = None
+        self.skill_xp = [0] * len(SKILL_NAMES)
+        self.started = time.time()
+
+    def begin(self, reset_info):
+        # XP at reset, so whatever the first action earns is counted too.
+        if "total_xp" in reset_info:
+            self.start_xp = reset_info["total_xp"]
+            self.start_levels = reset_info["total_levels"]
+
+    def step(self, reward, info):
+        self.ret += float(reward)
+        self.length += 1
+        if "total_xp" in info:
+            if self.start_xp is None:
+                self.start_xp = info["total_xp"]
+                self.start_levels = info["total_levels"]
+            self.end_xp = info["total_xp"]
+            self.end_levels = info["total_levels"]
+        for skill, delta in info.get("skill_xp", {}).items():
+            if 0 <= int(skill) < len(self.skill_xp):
+                self.skill_xp[int(skill)] += int(delta)
+
+    def summary(self, env_index):
+        wall = max(1e-9, time.time() - self.started)
+        xp = (self.end_xp or 0) - (self.start_xp or 0)
+        return {
+            "env": env_index,
+            "return": self.ret,
+            "length": self.length,
+            "xp": xp,
+            "levels": (self.end_levels or 0) - (self.start_levels or 0),
+            "wall_s": wall,
+            "xp_per_hour": xp * 3600.0 / wall,
+            "xp_per_1k_steps": xp * 1000.0 / max(1, self.length),
+            "skill_xp": {name.lower(): v for name, v in zip(SKILL_NAMES, self.skill_xp) if v},
+        }
+
+
+def run_batch(args):
+    action_grid = None
+    if args.action_grid:
+        cols, rows = args.action_grid.lower().split("x", 1)
+        action_grid = (int(cols), int(rows))
+    pool = None
+    pool_address = args.pool
+    if pool_address is None:
+        # Private pool: one server and one warm headless client per env.
+        pool = InstancePool(
+            size=args.num_envs,
+            rpc_port=_free_port(),
+            base_port=args.base_port,
+            username_prefix=f"{args.name}_eval",
+            jvm_profile=args.jvm_profile,
+            render_on_demand=True,
+        )
+        pool.start()
+        threading.Thread(target=pool.serve_forever, daemon=True).start()
+        pool_address = f"127.0.0.1:{pool.rpc_port}"
+    vec_cls = SubprocVecEnv if args.num_envs > 1 else DummyVecEnv
+    viewers = [f"{args.name}_eval{i}" if args.viewer else None for i in range(args.num_envs)]
+    if args.viewer:
+        print(f"[viewer] publishing frames; watch with: python scripts/viewer.py {' '.join(viewers)}")
+    vec_env = vec_cls(
+        [make_batch_env(pool_address, action_grid, args.episode_length, viewer) for viewer in viewers]
+    )
+    model = PPO.load(args.model_path, env=vec_env)
+    n = vec_env.num_envs
+    current = [_Episode() for _ in range(n)]
+    done_per_env = [0] * n
+    episodes = []
+    steps = 0
+    started = time.time()
+    try:
+        obs = vec_env.reset()
+        for i in range(n):
+            current[i].begin(vec_env.reset_infos[i])
+        while min(done_per_env) < args.episodes:
+            # One forward pass for all envs.
+            actions, _ = model.predict(obs, deterministic=not args.stochastic)
+            obs, rewards, dones, infos = vec_env.step(actions)
+            steps += n
+            for i in range(n):
+                if done_per_env[i] >= args.episodes:
+                    continue
+                current[i].step(rewards[i], infos[i])
+                if dones[i]:
+                    episodes.append(current[i].summary(i))
+                    done_per_env[i] += 1
+                    current[i] = _Episode()
+                    # The VecEnv reset this env already; its reset info holds the new baseline.
+                    current[i].begin(vec_env.reset_infos[i])
+                    print(f"[eval] env {i} episode {done_per_env[i]}/{args.episodes} return={episodes[-1]['return']:.3f}")
+    finally:
+        vec_env.close()
+        if pool is not None:
+            pool.stop()
+    wall = time.time() - started
+    report = {
+        "model": os.path.abspath(args.model_path),
+        "num_envs": n,
+        "episodes_per_env": args.episodes,
+        "deterministic": not args.stochastic,
+        "steps": steps,
+        "wall_s": wall,
+        "summary": {
+            key: mean_ci95([e[key] for e in episodes])
+            for key in ("return", "length", "xp", "levels", "xp_per_hour", "xp_per_1k_steps")
+        },
+        "skills": {
+            name.lower(): mean_ci95([e["skill_xp"].get(name.lower(), 0) for e in episodes])
+            for name in SKILL_NAMES
+            if any(name.lower() in e["skill_xp"] for e in episodes)
+        },
+        "episodes": episodes,
+    }
+    ret = report["summary"]["return"]
+    xph = report["summary"]["xp_per_hour"]
+    print(
+        f"[eval] {len(episodes)} episodes in {wall:.0f}s: return {ret['mean']:.3f} "
+        f"[{ret['ci95_low']:.3f}, {ret['ci95_high']:.3f}], xp/h {xph['mean']:.0f} "
+        f"[{xph['ci95_low']:.0f}, {xph['ci95_high']:.0f}]"
+    )
+    if args.report:
+        parent = os.path.dirname(args.report)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"[eval] report written to {args.report}")
+    return report
+
+
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("--name", default="agent")
@@ -32,10 +202,24 @@ def main():
     parser.add_argument("--render-scale", type=int, default=1)
     parser.add_argument("--render-fps", type=int, default=30)
     parser.add_argument("--log-every", type=int, default=500)
+    parser.add_argument("--episodes", type=int, default=0, help="Headless batch mode: episodes per env")
+    parser.add_argument("--num-envs", type=int, default=4, help="Parallel envs in batch mode")
+    parser.add_argument("--pool", default=None, help="Lease instances from a running pool daemon (HOST:PORT)")
+    parser.add_argument("--base-port", type=int, default=5750, help="First bridge port of the private pool")
+    parser.add_argument("--jvm-profile", default="dense")
+    parser.add_argument("--action-grid", default=None, help="Must match the grid the model was trained with")
+    parser.add_argument("--stochastic", action="store_true", help="Sample actions instead of taking the mode")
+    parser.add_argument("--episode-length", type=int, default=2000, help="Steps per episode in batch mode")
+    parser.add_argument("--report", default=None, help="Write the JSON report here")
+    parser.add_argument(
+        "--viewer", action="store_true", help="Batch mode: publish each env's frames for scripts/viewer.py"
+    )
     args = parser.parse_args()
+    if args.episodes > 0:
+        run_batch(args)
+        return
 
     vec_env = DummyVecEnv([make_env(args.name, args.render_scale, args.render_fps)])
-    vec_env = VecTransposeImage(vec_env)
 
     model = PPO.load(args.model_path, env=vec_env)
 
@@ -1,4 +1,3 @@
-import json
 import os
 import sys
 import time
@@ -84,14 +83,6 @@ def main(
     launcher = None
     if launch:
         server_dir, client_dir, java_home = launch
-        if normal_speed:
-            config_path = os.path.join(server_dir, "ServerConfig.json")
-            if os.path.isfile(config_path):
-                with open(config_path, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                data["cycle_time_ms"] = 600
-                with open(config_path, "w", encoding="utf-8") as f:
-                    json.dump(data, f, indent=2, sort_keys=False)
         launcher = RLScapeLauncher(
             server_dir=server_dir,
             client_dir=client_dir,
@@ -100,6 +91,7 @@ def main(
             username=username,
             local=True,
             auto_tune=not normal_speed,
+            cycle_time_ms=600 if normal_speed else None,
         )
         launcher.start()
         time.sleep(2.0)
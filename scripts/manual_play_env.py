@@ -1,5 +1,4 @@
 import argparse
-import json
 import os
 import sys
 
@@ -47,13 +46,7 @@ def main(name="agent", scale=1, tick_fps=50, human_speed=False):
         launcher = getattr(env.unwrapped, "_launcher", None)
         if launcher is not None:
             launcher.auto_tune = False
-            config_path = os.path.join(launcher.server_dir, launcher.server_config)
-            if os.path.isfile(config_path):
-                with open(config_path, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                data["cycle_time_ms"] = 600
-                with open(config_path, "w", encoding="utf-8") as f:
-                    json.dump(data, f, indent=2, sort_keys=False)
+            launcher.cycle_time_ms = 600
     obs, _ = env.reset()
 
     pygame.init()
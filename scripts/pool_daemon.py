@@ -0,0 +1,54 @@
+import argparse
+import os
+import signal
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+from rl_scape.pool import DEFAULT_POOL_PORT, InstancePool
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Keep a pool of logged-in headless clients ready for RLScapeEnv(pool_address=...).")
+    parser.add_argument("--size", type=int, default=4)
+    parser.add_argument("--rpc-host", default="127.0.0.1")
+    parser.add_argument("--rpc-port", type=int, default=DEFAULT_POOL_PORT)
+    parser.add_argument("--base-port", type=int, default=5700, help="Bridge port of the first client")
+    parser.add_argument("--prefix", default="pool", help="Usernames are <prefix><index>")
+    parser.add_argument("--server-dir", default=None)
+    parser.add_argument("--client-dir", default=None)
+    parser.add_argument("--java-home", default=None)
+    parser.add_argument("--jvm-profile", default="default")
+    parser.add_argument("--pin-cpus", action="store_true")
+    parser.add_argument("--render-on-demand", action="store_true")
+    parser.add_argument(
+        "--account-template",
+        default=None,
+        help="Character file every pooled account starts from, and is reset to after each lease",
+    )
+    args = parser.parse_args()
+
+    pool = InstancePool(
+        size=args.size,
+        host=args.rpc_host,
+        rpc_port=args.rpc_port,
+        base_port=args.base_port,
+        username_prefix=args.prefix,
+        server_dir=args.server_dir,
+        client_dir=args.client_dir,
+        java_home=args.java_home,
+        jvm_profile=args.jvm_profile,
+        pin_cpus=args.pin_cpus,
+        render_on_demand=args.render_on_demand,
+        account_template=args.account_template,
+    )
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        pool.start()
+        pool.serve_forever()
+    finally:
+        pool.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,316 @@
+import argparse
+import csv
+import json
+import multiprocessing as mp
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+
+import rl_scape
+from rl_scape.control import RLControlClient
+from rl_scape.pool import InstancePool
+from rl_scape.resources import process_cpu_seconds, process_rss_kb
+
+
+def _parse_levels(text):
+    return [int(v) for v in text.split(",") if v.strip()]
+
+
+def drive_env(lease, args, seed, start_at, results):
+    # One env per process, so the Python side of the harness is not what saturates.
+    env = rl_scape.RLScapeEnv(
+        host=lease["host"],
+        port=lease["port"],
+        name=lease["username"],
+        launch=False,
+        episode_length=10**9,
+    )
+    rng = np.random.default_rng(seed)
+    latencies = []
+    steps = 0
+    try:
+        env.reset()
+        for _ in range(args.warmup):
+            env.step({"type": 0, "x": 0, "y": 0})
+        # All workers measure over the same wall-clock window.
+        time.sleep(max(0.0, start_at - time.time()))
+        deadline = start_at + args.duration_s
+        while time.time() < deadline:
+            action_type = int(rng.integers(0, 4)) if args.random_actions else 0
+            t0 = time.perf_counter()
+            env.step({"type": action_type, "x": int(rng.integers(0, env.width)), "y": int(rng.integers(0, env.height))})
+            latencies.append(time.perf_counter() - t0)
+            steps += 1
+        results.put({"username": lease["username"], "steps": steps, "latencies": latencies})
+    except Exception as err:
+        results.put({"username": lease["username"], "steps": steps, "latencies": latencies, "error": str(err)})
+    finally:
+        env.close()
+
+
+class TickRecorder:
+    # Sums the server's TICKSTATS windows over one level.
+
+    def __init__(self, control_port):
+        self.control_port = control_port
+        self.windows = []
+        self.error = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(timeout=35.0)
+
+    def _run(self):
+        client = RLControlClient(port=self.control_port, timeout=30.0)
+        try:
+            client.subscribe_stats()
+            while not self._stop.is_set():
+                self.windows.append(client.read_stats())
+        except (OSError, RuntimeError) as err:
+            if not self._stop.is_set():
+                self.error = str(err)
+        finally:
+            client.close()
+
+    def summary(self):
+        ticks = sum(w["ticks"] for w in self.windows)
+        if not ticks:
+            return {"ticks": 0, "error": self.error or "no tick telemetry (is telemetry_every above 0?)"}
+        histogram = np.sum([w["histogram"] for w in self.windows], axis=0).tolist()
+        return {
+            "ticks": ticks,
+            "avg_ms": sum(w["avg_ms"] * w["ticks"] for w in self.windows) / ticks,
+            "max_ms": max(w["max_ms"] for w in self.windows),
+            "overruns": sum(w["overruns"] for w in self.windows),
+            "cycle_time_ms": self.windows[-1]["cycle_time_ms"],
+            "histogram": histogram,
+        }
+
+
+def _jvm_usage(pids, cpu_before, wall_s):
+    usage = {}
+    for name, pid in pids.items():
+        cpu = process_cpu_seconds(pid)
+        before = cpu_before.get(name)
+        rss = process_rss_kb(pid)
+        usage[name] = {
+            "pid": pid,
+            "rss_mb": None if rss is None else rss / 1024,
+            "cpu_cores": None if cpu is None or before is None else (cpu - before) / max(1e-9, wall_s),
+        }
+    return usage
+
+
+def run_level(args, servers, clients):
+    pools = []
+    workers = []
+    recorders = []
+    try:
+        for s in range(servers):
+            # Each server gets its own world, ports and run dir so they can share the host.
+            base = args.base_port + s * 100
+            pool = InstancePool(
+                size=clients,
+                base_port=base,
+                username_prefix=f"{args.prefix}{s}_",
+                world=1 + s,
+                control_port=args.control_port + s,
+                http_port=args.http_port + s,
+                jaggrab_port=args.jaggrab_port + s,
+                jvm_profile=args.jvm_profile,
+                pin_cpus=args.pin_cpus,
+                cycle_time_ms=args.cycle_time_ms,
+                render_on_demand=True,
+                mass_save="off",
+            )
+            pool.start()
+            pools.append(pool)
+        leases = [pool.lease(owner="soak") for pool in pools for _ in range(clients)]
+        pids = {}
+        for s, pool in enumerate(pools):
+            if pool._server._server_proc is not None:
+                pids[f"server{s}"] = pool._server._server_proc.pid
+            for slot in pool._slots:
+                if slot.launcher._client_proc is not None:
+                    pids[f"client{s}_{slot.index}"] = slot.launcher._client_proc.pid
+
+        results = mp.Queue()
+        start_at = time.time() + args.startup_s
+        for i, lease in enumerate(leases):
+            proc = mp.Process(target=drive_env, args=(lease, args, args.seed + i, start_at, results), daemon=True)
+            proc.start()
+            workers.append(proc)
+        time.sleep(max(0.0, start_at - time.time()))
+        recorders = [TickRecorder(args.control_port + s).start() for s in range(servers)]
+        cpu_before = {name: process_cpu_seconds(pid) for name, pid in pids.items()}
+        started = time.time()
+        time.sleep(args.duration_s)
+        usage = _jvm_usage(pids, cpu_before, time.time() - started)
+        for rec in recorders:
+            rec.stop()
+        outcomes = [results.get(timeout=args.duration_s + 120) for _ in workers]
+    finally:
+        for proc in workers:
+            proc.join(timeout=30)
+            if proc.is_alive():
+                proc.terminate()
+        for pool in pools:
+            pool.stop()
+
+    latencies = np.concatenate([np.asarray(o["latencies"]) for o in outcomes if o["latencies"]] or [np.zeros(0)])
+    steps = sum(o["steps"] for o in outcomes)
+    servers_rss = [u["rss_mb"] for n, u in usage.items() if n.startswith("server") and u["rss_mb"] is not None]
+    clients_rss = [u["rss_mb"] for n, u in usage.items() if n.startswith("client") and u["rss_mb"] is not None]
+    servers_cpu = [u["cpu_cores"] for n, u in usage.items() if n.startswith("server") and u["cpu_cores"] is not None]
+    clients_cpu = [u["cpu_cores"] for n, u in usage.items() if n.startswith("client") and u["cpu_cores"] is not None]
+    return {
+        "servers": servers,
+        "clients_per_server": clients,
+        "envs": servers * clients,
+        "duration_s": args.duration_s,
+        "steps": steps,
+        "steps_per_s": steps / args.duration_s,
+        "steps_per_s_per_env": steps / args.duration_s / max(1, servers * clients),
+        "step_ms": {
+            f"p{q}": float(np.percentile(latencies, q)) * 1000 if latencies.size else None for q in (50, 90, 99)
+        },
+        "ticks": [rec.summary() for rec in recorders],
+        "server_rss_mb": float(np.mean(servers_rss)) if servers_rss else None,
+        "client_rss_mb": float(np.mean(clients_rss)) if clients_rss else None,
+        "server_cpu_cores": float(np.mean(servers_cpu)) if servers_cpu else None,
+        "client_cpu_cores": float(np.mean(clients_cpu)) if clients_cpu else None,
+        "jvms": usage,
+        "errors": [f"{o['username']}: {o['error']}" for o in outcomes if "error" in o],
+    }
+
+
+def mark_saturation(levels, efficiency_floor):
+    # Per-env rate relative to the smallest level; below the floor (or any tick overrun)
+    # means adding envs no longer adds throughput in proportion.
+    by_servers = {}
+    for level in levels:
+        by_servers.setdefault(level["servers"], []).append(level)
+    for group in by_servers.values():
+        base = group[0]["steps_per_s_per_env"] or 1e-9
+        for level in group:
+            level["efficiency"] = level["steps_per_s_per_env"] / base
+            overruns = sum(t.get("overruns", 0) for t in level["ticks"])
+            level["saturated"] = level["efficiency"] < efficiency_floor or overruns > 0
+    return levels
+
+
+def write_plot(levels, path):
+    try:
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+    except ImportError:
+        return False
+    fig = Figure(figsize=(10, 8))
+    FigureCanvasAgg(fig)
+    ax_rate, ax_lat, ax_tick = (fig.add_subplot(3, 1, i + 1) for i in range(3))
+    for servers in sorted({lv["servers"] for lv in levels}):
+        group = [lv for lv in levels if lv["servers"] == servers]
+        xs = [lv["envs"] for lv in group]
+        label = f"{servers} server(s)"
+        ax_rate.plot(xs, [lv["steps_per_s"] for lv in group], marker="o", label=label)
+        ax_lat.plot(xs, [lv["step_ms"]["p99"] or 0 for lv in group], marker="o", label=label)
+        ax_tick.plot(xs, [max((t.get("max_ms", 0) for t in lv["ticks"]), default=0) for lv in group], marker="o", label=label)
+    ax_rate.set_ylabel("steps/s (total)")
+    ax_lat.set_ylabel("step p99 ms")
+    ax_tick.set_ylabel("tick max ms")
+    ax_tick.set_xlabel("concurrent envs")
+    ax_rate.legend()
+    fig.tight_layout()
+    fig.savefig(path)
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ramp clients per server and servers per host; report scaling curves.")
+    parser.add_argument("--clients", default="1,2,4,8", help="Comma separated clients-per-server levels")
+    parser.add_argument("--servers", default="1", help="Comma separated servers-per-host levels")
+    parser.add_argument("--duration-s", type=float, default=60.0, help="Measured seconds per level")
+    parser.add_argument("--warmup", type=int, default=50, help="Unmeasured steps per env before each level")
+    parser.add_argument("--startup-s", type=float, default=30.0, help="Time given to workers to connect and warm up")
+    parser.add_argument("--random-actions", action="store_true")
+    parser.add_argument("--cycle-time-ms", type=int, default=600, help="Tick period used for every level")
+    parser.add_argument("--jvm-profile", default="dense")
+    parser.add_argument("--pin-cpus", action="store_true")
+    parser.add_argument("--base-port", type=int, default=6000)
+    parser.add_argument("--control-port", type=int, default=43620)
+    parser.add_argument("--http-port", type=int, default=8180)
+    parser.add_argument("--jaggrab-port", type=int, default=43700)
+    parser.add_argument("--prefix", default="soak")
+    parser.add_argument("--efficiency-floor", type=float, default=0.8)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="soak_report", help="Report directory (report.json, levels.csv, scaling.png)")
+    args = parser.parse_args()
+    server_levels = _parse_levels(args.servers)
+    client_levels = _parse_levels(args.clients)
+
+    levels = []
+    for servers in server_levels:
+        for clients in client_levels:
+            print(f"[soak] {servers} server(s) x {clients} client(s)", flush=True)
+            level = run_level(args, servers, clients)
+            levels.append(level)
+            ticks = level["ticks"][0] if level["ticks"] else {}
+            print(
+                f"[soak] {level['steps_per_s']:.1f} steps/s ({level['steps_per_s_per_env']:.1f}/env), "
+                f"p99 {level['step_ms']['p99'] or 0:.1f} ms, tick avg {ticks.get('avg_ms', 0):.1f} ms "
+                f"max {ticks.get('max_ms', 0)} ms overruns {ticks.get('overruns', 0)}",
+                flush=True,
+            )
+            for err in level["errors"]:
+                print(f"[soak] worker error: {err}", flush=True)
+    mark_saturation(levels, args.efficiency_floor)
+
+    os.makedirs(args.out, exist_ok=True)
+    with open(os.path.join(args.out, "report.json"), "w", encoding="utf-8") as f:
+        json.dump({"args": vars(args), "levels": levels}, f, indent=2)
+    fields = [
+        "servers", "clients_per_server", "envs", "steps_per_s", "steps_per_s_per_env", "efficiency", "saturated",
+        "step_p50_ms", "step_p90_ms", "step_p99_ms", "tick_avg_ms", "tick_max_ms", "tick_overruns",
+        "server_rss_mb", "client_rss_mb", "server_cpu_cores", "client_cpu_cores",
+    ]
+    with open(os.path.join(args.out, "levels.csv"), "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fields, extrasaction="ignore")
+        writer.writeheader()
+        for level in levels:
+            ticks = [t for t in level["ticks"] if t.get("ticks")]
+            writer.writerow({
+                **level,
+                "step_p50_ms": level["step_ms"]["p50"],
+                "step_p90_ms": level["step_ms"]["p90"],
+                "step_p99_ms": level["step_ms"]["p99"],
+                "tick_avg_ms": np.mean([t["avg_ms"] for t in ticks]) if ticks else None,
+                "tick_max_ms": max((t["max_ms"] for t in ticks), default=None),
+                "tick_overruns": sum(t["overruns"] for t in ticks) if ticks else None,
+            })
+    plotted = write_plot(levels, os.path.join(args.out, "scaling.png"))
+
+    print(f"{'servers':>8}{'clients':>9}{'steps/s':>10}{'per env':>9}{'eff':>6}{'p99 ms':>9}{'tick max':>10}{'overruns':>10}")
+    for level in levels:
+        ticks = [t for t in level["ticks"] if t.get("ticks")]
+        print(
+            f"{level['servers']:>8}{level['clients_per_server']:>9}{level['steps_per_s']:>10.1f}"
+            f"{level['steps_per_s_per_env']:>9.1f}{level['efficiency']:>6.2f}{level['step_ms']['p99'] or 0:>9.1f}"
+            f"{max((t['max_ms'] for t in ticks), default=0):>10}{sum(t['overruns'] for t in ticks):>10}"
+            f"{'  <- saturated' if level['saturated'] else ''}"
+        )
+    print(f"Saved report to {args.out}" + (" (with scaling.png)" if plotted else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,89 +1,117 @@
 import argparse
-import csv
+import io
 import os
+import queue
+import socket
 import sys
+import time
 from datetime import datetime
 
+import gymnasium as gym
+import numpy as np
+import torch as th
+from gymnasium import spaces
 from stable_baselines3 import PPO
 from stable_baselines3.common.callbacks import BaseCallback
 from stable_baselines3.common.monitor import Monitor
-from stable_baselines3.common.vec_env import DummyVecEnv, VecTransposeImage
+from stable_baselines3.common.utils import obs_as_tensor
+from stable_baselines3.common.vec_env import DummyVecEnv
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
 
 import rl_scape
-
-
-class RewardStepCounter(BaseCallback):
-    def __init__(self):
-        super().__init__()
-        self.reward_steps = 0
-        self.total_steps = 0
-
-    def _on_step(self) -> bool:
-        rewards = self.locals.get("rewards")
-        if rewards is not None:
-            self.reward_steps += int((rewards > 0).sum())
-            self.total_steps += len(rewards)
-        return True
+from rl_scape.checkpoints import CheckpointManager
+from rl_scape.distributed import DEFAULT_LEARNER_PORT, ActorClient, LearnerServer, compute_gae, unpack_arrays
+from rl_scape.metrics import TRAINING_FIELDS, BackgroundCsvWriter, TrainingMetrics
 
 
 class ProgressLogger(BaseCallback):
     def __init__(self, log_every=10_000, log_dir="runs", run_name="run"):
         super().__init__()
         self.log_every = int(log_every)
-        self.step_rewards = []
-        self.total_steps = 0
-        self.rows = []
+        self.metrics = TrainingMetrics()
         self._next_log = self.log_every
         stamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        os.makedirs(log_dir, exist_ok=True)
         self.csv_path = os.path.join(log_dir, f"{run_name}_progress_{stamp}.csv")
-        with open(self.csv_path, "w", newline="", encoding="utf-8") as f:
-            writer = csv.DictWriter(f, fieldnames=["timesteps", "avg_reward"])
-            writer.writeheader()
+        self.writer = BackgroundCsvWriter(
+            self.csv_path,
+            TRAINING_FIELDS,
+            plot_path=self.csv_path.replace("_progress_", "_avg_reward_").replace(".csv", ".png"),
+            plot_fields=("avg_reward", "ep_return_mean"),
+        )
 
     def _on_step(self) -> bool:
         rewards = self.locals.get("rewards")
         if rewards is not None:
-            self.step_rewards.extend(list(rewards))
-            self.total_steps += len(rewards)
-        if self.total_steps >= self._next_log:
-            avg_reward = sum(self.step_rewards) / max(1, len(self.step_rewards))
-            row = {
-                "timesteps": self.total_steps,
-                "avg_reward": avg_reward,
-            }
-            self.rows.append(row)
-            print(f"[progress] steps={self.total_steps} avg_reward={avg_reward:.6f}")
-            with open(self.csv_path, "a", newline="", encoding="utf-8") as f:
-                writer = csv.DictWriter(f, fieldnames=["timesteps", "avg_reward"])
-                writer.writerow(row)
-            self.step_rewards = []
-            self._next_log += self.log_every
+            self.record(rewards, self.locals.get("dones"), self.locals.get("infos"))
         return True
 
+    def record(self, rewards, dones=None, infos=None):
+        self.metrics.record(rewards, dones, infos)
+        if self.metrics.total_steps >= self._next_log:
+            row = self.metrics.row()
+            print(
+                f"[progress] steps={row['timesteps']} avg_reward={row['avg_reward']:.6f} "
+                f"episodes={row['episodes']} steps/s={row['steps_per_s']:.1f}"
+            )
+            self.writer.write(row)
+            self._next_log += self.log_every
+
+    def close(self):
+        self.writer.close()
+        print(f"Saved progress CSV to {self.csv_path}")
+        print(
+            f"Agent got reward in {self.metrics.reward_steps} steps out of {self.metrics.total_steps}."
+        )
+
 
 class CheckpointSaver(BaseCallback):
-    def __init__(self, save_path, save_every=100_000):
+    def __init__(self, checkpoints, save_every=100_000):
         super().__init__()
-        self.save_path = save_path
+        self.checkpoints = checkpoints
         self.save_every = int(save_every)
         self._next_save = self.save_every
 
+    def _on_training_start(self) -> None:
+        # Resumed runs continue the schedule from the restored step count.
+        self._next_save = (self.num_timesteps // self.save_every + 1) * self.save_every
+
     def _on_step(self) -> bool:
         if self.num_timesteps >= self._next_save:
-            path = f"{self.save_path}_step_{self.num_timesteps}"
-            self.model.save(path)
-            print(f"[checkpoint] saved {path}")
+            self.checkpoints.snapshot(self.model, self.num_timesteps, _ep_reward_mean(self.model))
             self._next_save += self.save_every
         return True
 
 
-def make_env(name):
+def _ep_reward_mean(model):
+    if not model.ep_info_buffer:
+        return None
+    return float(np.mean([e["r"] for e in model.ep_info_buffer]))
+
+
+def _resume_path(args, checkpoints):
+    if not args.resume:
+        return None
+    latest = checkpoints.latest()
+    if latest is None:
+        print("[checkpoint] nothing to resume from, starting fresh")
+        return None
+    print(f"[checkpoint] resuming from {latest['path']} (step {latest['step']})")
+    return latest["path"]
+
+
+def make_env(name, action_grid=None, pool_address=None, viewer=None):
     def _thunk():
         print("[startup] creating env", flush=True)
-        env = rl_scape.make(name=name, render_mode="rgb_array", log_tick_sync=False)
+        env = rl_scape.make(
+            name=name,
+            render_mode="rgb_array",
+            log_tick_sync=False,
+            action_grid=action_grid,
+            pool_address=pool_address,
+            layout="chw",
+            viewer=viewer,
+        )
         env.unwrapped.action_space = env.unwrapped.sb3_action_space
         print("[startup] env created", flush=True)
         return Monitor(env)
@@ -91,6 +119,234 @@ def make_env(name):
     return _thunk
 
 
+class _SpacesEnv(gym.Env):
+    # Stand-in env for the learner, which only needs the spaces to build the policy.
+
+    def __init__(self, observation_space, action_space):
+        self.observation_space = observation_space
+        self.action_space = action_space
+
+    def reset(self, *, seed=None, options=None):
+        super().reset(seed=seed)
+        return np.zeros(self.observation_space.shape, dtype=self.observation_space.dtype), {}
+
+    def step(self, action):
+        raise RuntimeError("The learner does not step environments")
+
+
+def _policy_bytes(policy):
+    buf = io.BytesIO()
+    th.save(policy.state_dict(), buf)
+    return buf.getvalue()
+
+
+def _load_policy(model, weights):
+    model.policy.load_state_dict(th.load(io.BytesIO(weights), map_location=model.device, weights_only=True))
+
+
+def _fill_rollout_buffer(buffer, batch, n):
+    buffer.reset()
+    buffer.observations[:] = batch["obs"][:n].reshape(buffer.observations.shape)
+    buffer.actions[:] = batch["actions"][:n].reshape(buffer.actions.shape)
+    for key in ("rewards", "returns", "episode_starts", "values", "log_probs", "advantages"):
+        getattr(buffer, key)[:] = batch[key][:n].reshape(-1, 1)
+    buffer.pos = buffer.buffer_size
+    buffer.full = True
+
+
+def run_learner(args):
+    server = LearnerServer(host=args.bind, port=args.learner_port, max_queued_chunks=args.max_queued_chunks)
+    server.start()
+    print("[learner] waiting for the first actor", flush=True)
+    spec = server.wait_for_spaces()
+    observation_space = spaces.Box(0, 255, shape=tuple(spec["obs_shape"]), dtype=np.uint8)
+    action_space = spaces.MultiDiscrete(spec["nvec"])
+    vec_env = DummyVecEnv([lambda: _SpacesEnv(observation_space, action_space)])
+    checkpoints = CheckpointManager(args.save_path, keep_last=args.keep_last, keep_best=args.keep_best)
+    resume = _resume_path(args, checkpoints)
+    if resume:
+        # The checkpoint may come from a run with another n_steps (e.g. a local one); the
+        # learner's updates are always --batch-steps long.
+        model = PPO.load(resume, env=vec_env, custom_objects={"n_steps": args.batch_steps})
+        if model.rollout_buffer.buffer_size != args.batch_steps:
+            model.rollout_buffer = type(model.rollout_buffer)(
+                args.batch_steps,
+                model.observation_space,
+                model.action_space,
+                device=model.device,
+                gamma=model.gamma,
+                gae_lambda=model.gae_lambda,
+                n_envs=model.n_envs,
+            )
+    else:
+        model = PPO(
+            "CnnPolicy",
+            vec_env,
+            verbose=1,
+            seed=args.seed,
+            n_steps=args.batch_steps,
+            batch_size=64,
+            ent_coef=0.01,
+        )
+    # Sets up the logger and episode stats that learn() would otherwise create.
+    model._setup_learn(args.total_steps, reset_num_timesteps=resume is None)
+    server.config = {"gamma": model.gamma, "gae_lambda": model.gae_lambda, "chunk_steps": args.chunk_steps}
+    server.publish(_policy_bytes(model.policy))
+    progress_logger = ProgressLogger(log_every=args.log_every, log_dir=args.log_dir, run_name=args.name)
+    next_save = (model.num_timesteps // args.save_every + 1) * args.save_every
+    pending = []
+    pending_steps = 0
+    dropped = 0
+    idle_since = None
+    try:
+        while model.num_timesteps < args.total_steps:
+            try:
+                header, blob = server.chunks.get(timeout=1.0)
+            except queue.Empty:
+                # Every actor gone (exited or crashed): give them a while to come back, then stop.
+                if server.actors:
+                    idle_since = None
+                elif idle_since is None:
+                    idle_since = time.time()
+                elif time.time() - idle_since > args.actor_timeout_s:
+                    print(f"[learner] no actors for {args.actor_timeout_s:.0f}s, stopping", flush=True)
+                    break
+                continue
+            idle_since = None
+            if server.version - int(header["version"]) > args.max_policy_lag:
+                # Collected by a policy too far behind for the PPO ratio to be meaningful.
+                dropped += 1
+                continue
+            chunk = unpack_arrays(blob)
+            progress_logger.record(chunk["rewards"])
+            for ret, length in header.get("episodes", ()):
+                model.ep_info_buffer.append({"r": ret, "l": length})
+                progress_logger.metrics.record_episode(ret, length)
+            pending.append(chunk)
+            pending_steps += len(chunk["rewards"])
+            if pending_steps < args.batch_steps:
+                continue
+            batch = {k: np.concatenate([c[k] for c in pending]) for k in pending[0]}
+            n = args.batch_steps
+            _fill_rollout_buffer(model.rollout_buffer, batch, n)
+            pending = [{k: v[n:] for k, v in batch.items()}] if pending_steps > n else []
+            pending_steps -= n
+            model.num_timesteps += n
+            model._update_current_progress_remaining(model.num_timesteps, args.total_steps)
+            model.train()
+            version = server.publish(_policy_bytes(model.policy))
+            model.logger.record("learner/policy_version", version)
+            model.logger.record("learner/actors", server.actors)
+            model.logger.record("learner/dropped_chunks", dropped)
+            model.logger.record("learner/queued_chunks", server.chunks.qsize())
+            ep_reward = _ep_reward_mean(model)
+            if ep_reward is not None:
+                model.logger.record("rollout/ep_rew_mean", ep_reward)
+            model.logger.dump(step=model.num_timesteps)
+            if model.num_timesteps >= next_save:
+                checkpoints.snapshot(model, model.num_timesteps, ep_reward)
+                next_save += args.save_every
+        model.save(args.save_path)
+    finally:
+        server.stopping = True
+        # Keep answering so connected actors get the stop flag instead of a dropped socket.
+        deadline = time.time() + 30.0
+        while server.actors and time.time() < deadline:
+            try:
+                server.chunks.get(timeout=0.5)
+            except queue.Empty:
+                pass
+        server.stop()
+        checkpoints.close()
+        progress_logger.close()
+
+
+def _viewer_name(args):
+    if not args.viewer:
+        return None
+    print(f"[viewer] publishing frames; watch with: python scripts/viewer.py {args.name}", flush=True)
+    return args.name
+
+
+def run_actor(args, action_grid):
+    vec_env = DummyVecEnv([make_env(args.name, action_grid, args.pool, _viewer_name(args))])
+    spec = {
+        "obs_shape": [int(d) for d in vec_env.observation_space.shape],
+        "nvec": [int(n) for n in vec_env.action_space.nvec],
+    }
+    client = ActorClient(args.learner)
+    print(f"[actor] connecting to learner {client.host}:{client.port}", flush=True)
+    config, weights = client.hello(spec, name=f"{socket.gethostname()}/{args.name}")
+    chunk_steps = int(config["chunk_steps"])
+    gamma = float(config["gamma"])
+    gae_lambda = float(config["gae_lambda"])
+    # Only the policy is used; collection and GAE happen here, updates on the learner.
+    model = PPO("CnnPolicy", vec_env, seed=args.seed, n_steps=chunk_steps, device=args.device)
+    _load_policy(model, weights)
+    model.policy.set_training_mode(False)
+    obs = vec_env.reset()
+    episode_start = True
+    chunks = 0
+    try:
+        while True:
+            observations = np.zeros((chunk_steps, *spec["obs_shape"]), dtype=np.uint8)
+            actions = np.zeros((chunk_steps, len(spec["nvec"])), dtype=np.int64)
+            rewards = np.zeros(chunk_steps, dtype=np.float32)
+            episode_starts = np.zeros(chunk_steps, dtype=np.float32)
+            values = np.zeros(chunk_steps, dtype=np.float32)
+            log_probs = np.zeros(chunk_steps, dtype=np.float32)
+            episodes = []
+            for t in range(chunk_steps):
+                with th.no_grad():
+                    action, value, log_prob = model.policy(obs_as_tensor(obs, model.device))
+                action = action.cpu().numpy()
+                new_obs, reward, dones, infos = vec_env.step(action)
+                info = infos[0]
+                if dones[0] and info.get("TimeLimit.truncated") and info.get("terminal_observation") is not None:
+                    # Bootstrap truncated episodes the way SB3's collect_rollouts does.
+                    terminal = model.policy.obs_to_tensor(info["terminal_observation"])[0]
+                    with th.no_grad():
+                        reward[0] += gamma * model.policy.predict_values(terminal)[0].item()
+                if "episode" in info:
+                    episodes.append([float(info["episode"]["r"]), int(info["episode"]["l"])])
+                observations[t] = obs[0]
+                actions[t] = action[0]
+                rewards[t] = reward[0]
+                episode_starts[t] = float(episode_start)
+                values[t] = value.item()
+                log_probs[t] = log_prob.item()
+                obs = new_obs
+                episode_start = bool(dones[0])
+            with th.no_grad():
+                last_value = model.policy.predict_values(obs_as_tensor(obs, model.device)).item()
+            advantages, returns = compute_gae(
+                rewards, values, episode_starts, last_value, episode_start, gamma, gae_lambda
+            )
+            reply, weights = client.send_chunk(
+                {
+                    "obs": observations,
+                    "actions": actions,
+                    "rewards": rewards,
+                    "episode_starts": episode_starts,
+                    "values": values,
+                    "log_probs": log_probs,
+                    "advantages": advantages,
+                    "returns": returns,
+                },
+                episodes=episodes,
+                steps=chunk_steps,
+            )
+            chunks += 1
+            if weights:
+                _load_policy(model, weights)
+            if reply.get("stop"):
+                print(f"[actor] learner finished after {chunks} chunks")
+                break
+    finally:
+        client.close()
+        vec_env.close()
+
+
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("--name", default="agent")
@@ -100,61 +356,80 @@ def main():
     parser.add_argument("--log-dir", default="experiments/runs")
     parser.add_argument("--log-every", type=int, default=10_000)
     parser.add_argument("--save-every", type=int, default=100_000)
+    parser.add_argument("--keep-last", type=int, default=3, help="Keep this many of the newest checkpoints")
+    parser.add_argument("--keep-best", type=int, default=1, help="Also keep this many by mean episode reward")
+    parser.add_argument("--resume", action="store_true", help="Continue from the newest checkpoint of --save-path")
+    parser.add_argument("--action-grid", default=None, help="Quantize clicks to a COLSxROWS grid, e.g. 64x42")
+    parser.add_argument("--pool", default=None, help="Lease an instance from scripts/pool_daemon.py at HOST:PORT")
+    parser.add_argument(
+        "--role",
+        choices=("local", "learner", "actor"),
+        default="local",
+        help="local: collect and learn in this process; learner/actor: split across processes or hosts",
+    )
+    parser.add_argument("--learner", default=f"127.0.0.1:{DEFAULT_LEARNER_PORT}", help="Learner HOST:PORT (actor)")
+    parser.add_argument("--bind", default="0.0.0.0", help="Address the learner listens on")
+    parser.add_argument("--learner-port", type=int, default=DEFAULT_LEARNER_PORT)
+    parser.add_argument("--chunk-steps", type=int, default=128, help="Steps per rollout chunk sent by an actor")
+    parser.add_argument("--batch-steps", type=int, default=2048, help="Steps per learner update")
+    parser.add_argument("--max-policy-lag", type=int, default=4, help="Drop chunks this many versions behind")
+    parser.add_argument("--max-queued-chunks", type=int, default=64)
+    parser.add_argument(
+        "--actor-timeout-s", type=float, default=300.0, help="Learner stops after this long with no actor connected"
+    )
+    parser.add_argument("--device", default="cpu", help="Torch device for actor inference")
+    parser.add_argument(
+        "--viewer", action="store_true", help="Publish frames under --name for scripts/viewer.py (local/actor)"
+    )
     args = parser.parse_args()
+    action_grid = None
+    if args.action_grid:
+        cols, rows = args.action_grid.lower().split("x", 1)
+        action_grid = (int(cols), int(rows))
+    if args.role == "actor":
+        run_actor(args, action_grid)
+        return
     save_dir = os.path.dirname(args.save_path)
     if save_dir:
         os.makedirs(save_dir, exist_ok=True)
     os.makedirs(args.log_dir, exist_ok=True)
+    if args.role == "learner":
+        run_learner(args)
+        return
 
     print("[startup] building vec env", flush=True)
-    vec_env = DummyVecEnv([make_env(args.name)])
-    vec_env = VecTransposeImage(vec_env)
+    vec_env = DummyVecEnv([make_env(args.name, action_grid, args.pool, _viewer_name(args))])
     print("[startup] vec env ready", flush=True)
 
     print("[startup] building model", flush=True)
-    model = PPO(
-        "CnnPolicy",
-        vec_env,
-        verbose=1,
-        seed=args.seed,
-        n_steps=512,
-        batch_size=64,
-        ent_coef=0.01,
-    )
+    checkpoints = CheckpointManager(args.save_path, keep_last=args.keep_last, keep_best=args.keep_best)
+    resume = _resume_path(args, checkpoints)
+    if resume:
+        model = PPO.load(resume, env=vec_env)
+    else:
+        model = PPO(
+            "CnnPolicy",
+            vec_env,
+            verbose=1,
+            seed=args.seed,
+            n_steps=512,
+            batch_size=64,
+            ent_coef=0.01,
+        )
     print("[startup] model ready", flush=True)
-    reward_counter = RewardStepCounter()
     progress_logger = ProgressLogger(log_every=args.log_every, log_dir=args.log_dir, run_name=args.name)
-    checkpoint_saver = CheckpointSaver(args.save_path, save_every=args.save_every)
+    checkpoint_saver = CheckpointSaver(checkpoints, save_every=args.save_every)
     try:
-        model.learn(total_timesteps=args.total_steps, callback=[reward_counter, progress_logger, checkpoint_saver])
+        model.learn(
+            total_timesteps=max(0, args.total_steps - model.num_timesteps),
+            callback=[progress_logger, checkpoint_saver],
+            reset_num_timesteps=resume is None,
+        )
         model.save(args.save_path)
     finally:
         vec_env.close()
-        print(f"Agent got reward in {reward_counter.reward_steps} steps out of {reward_counter.total_steps}.")
-        _write_progress_plot(progress_logger.rows, progress_logger.csv_path)
-
-
-def _write_progress_plot(rows, csv_path):
-    if not rows:
-        print("No progress logs collected.")
-        return
-    png_path = csv_path.replace("_progress_", "_avg_reward_").replace(".csv", ".png")
-    try:
-        import matplotlib.pyplot as plt
-
-        xs = [e["timesteps"] for e in rows]
-        ys = [e["avg_reward"] for e in rows]
-        plt.figure(figsize=(10, 4))
-        plt.plot(xs, ys, linewidth=1)
-        plt.title("Avg Reward vs Timesteps")
-        plt.xlabel("Timesteps")
-        plt.ylabel("Avg Reward")
-        plt.tight_layout()
-        plt.savefig(png_path)
-        plt.close()
-        print(f"Saved progress plot to {png_path}")
-    except Exception as exc:
-        print(f"Saved progress CSV to {csv_path}; plot failed ({exc}).")
+        checkpoints.close()
+        progress_logger.close()
 
 
 if __name__ == "__main__":
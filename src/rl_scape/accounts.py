@@ -0,0 +1,68 @@
+import os
+import threading
+
+
+def render_character(template_text, username, password, overrides=None):
+    # A saved character file with its identity replaced. `overrides` sets any other
+    # "key = value" line, e.g. {"character-posx": 3222, "character-posy": 3218}.
+    values = {"character-username": username, "character-password": password}
+    values.update(overrides or {})
+    seen = set()
+    lines = []
+    for line in template_text.splitlines():
+        key, sep, _ = line.partition("=")
+        key = key.strip()
+        if sep and key in values and key not in seen:
+            line = f"{key} = {values[key]}"
+            seen.add(key)
+        lines.append(line)
+    missing = [k for k in values if k not in seen]
+    if missing:
+        raise ValueError(f"Template has no line for: {', '.join(missing)}")
+    return "\n".join(lines) + "\n"
+
+
+class AccountPool:
+    # Accounts <prefix>0..N-1 cloned from one template character file. A reset is a rendered
+    # copy dropped into reset_dir; the server moves it over the real save at the next login
+    # (after the previous session's logout save), so the character starts from the template.
+
+    def __init__(self, template, reset_dir, size=0, prefix="rl", password="rl", overrides=None):
+        with open(template, "r", encoding="utf-8") as f:
+            self.template_text = f.read()
+        self.template = template
+        self.reset_dir = reset_dir
+        self.prefix = prefix
+        self.password = password
+        self.overrides = dict(overrides or {})
+        self.usernames = [f"{prefix}{i}" for i in range(int(size))]
+        self._free = list(self.usernames)
+        self._lock = threading.Lock()
+
+    def reset(self, username):
+        text = render_character(self.template_text, username, self.password, self.overrides)
+        os.makedirs(self.reset_dir, exist_ok=True)
+        path = os.path.join(self.reset_dir, f"{username}.txt")
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp, path)
+        return path
+
+    def provision(self):
+        for username in self.usernames:
+            self.reset(username)
+        return list(self.usernames)
+
+    def lease(self):
+        with self._lock:
+            if not self._free:
+                raise RuntimeError("No free account")
+            return self._free.pop(0)
+
+    def release(self, username, reset=True):
+        if reset:
+            self.reset(username)
+        with self._lock:
+            if username in self.usernames and username not in self._free:
+                self._free.append(username)
@@ -1,4 +1,6 @@
+import queue
 import socket
+import threading
 import time
 import struct
 
@@ -10,14 +12,34 @@ class RLBridgeClient:
         self.timeout = timeout
         self._sock = None
         self._file = None
+        self.bytes_received = 0
+        self.last_wait_s = 0.0
+        self.last_transfer_s = 0.0
+        self._subscribe_every = None
+        self._reader = None
+        self._replies = None
+        self._frame_cond = threading.Condition()
+        self._frame_buffers = [bytearray(), bytearray()]
+        self._frame_meta = None
+        self._frame_seq = 0
+        self._consumed_seq = 0
+        self._reader_error = None
+        # Last PUSHERR line from the frame stream (unprompted, never a command reply).
+        self.push_error = None
+        # Optional callable; when it returns False the retry loops stop reconnecting.
+        self.alive = None
 
     def connect(self):
         if self._sock is not None:
             return
         self._sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
         self._file = self._sock.makefile("rb")
+        if self._subscribe_every is not None:
+            self._start_subscription()
 
     def close(self):
+        self._reader = None
+        self._replies = None
         if self._file is not None:
             try:
                 self._file.close()
@@ -29,6 +51,102 @@ class RLBridgeClient:
             finally:
                 self._sock = None
 
+    @property
+    def subscribed(self) -> bool:
+        return self._reader is not None
+
+    def subscribe(self, every: int = 1):
+        self._subscribe_every = max(1, int(every))
+        if self._sock is not None and self._reader is None:
+            self._start_subscription()
+
+    def unsubscribe(self):
+        self._subscribe_every = None
+        if self._reader is None:
+            return
+        self._send_line("UNSUBSCRIBE")
+        while self._readline().strip() != b"UNSUBSCRIBED":
+            pass
+        self._reader.join(timeout=self.timeout)
+        self._reader = None
+        self._replies = None
+        self._sock.settimeout(self.timeout)
+
+    def latest_frame(self, newer=False, timeout_s=None):
+        # Returns the newest pushed frame; with newer=True, waits for one not returned before.
+        timeout_s = self.timeout if timeout_s is None else timeout_s
+        t0 = time.perf_counter()
+        with self._frame_cond:
+            target = self._consumed_seq if newer else 0
+            while self._frame_seq <= target:
+                if self._reader_error is not None:
+                    raise RuntimeError(f"Frame stream closed: {self._reader_error}")
+                remaining = timeout_s - (time.perf_counter() - t0)
+                if remaining <= 0:
+                    raise TimeoutError("No pushed frame received")
+                self._frame_cond.wait(remaining)
+            t1 = time.perf_counter()
+            width, height, channels, length = self._frame_meta
+            data = bytes(memoryview(self._frame_buffers[0])[:length])
+            self._consumed_seq = self._frame_seq
+        self.last_wait_s = t1 - t0
+        self.last_transfer_s = time.perf_counter() - t1
+        return width, height, channels, data
+
+    def _start_subscription(self):
+        self._send_line(f"SUBSCRIBE {self._subscribe_every}")
+        reply = self._readline().decode("utf-8").strip()
+        if reply != "OK":
+            raise RuntimeError(f"Bad subscribe reply: {reply}")
+        # The reader owns the socket from here on; replies are handed back through a queue.
+        self._sock.settimeout(None)
+        self._replies = queue.Queue()
+        self._reader_error = None
+        self._reader = threading.Thread(
+            target=self._reader_loop,
+            args=(self._file, self._replies),
+            name="RLBridgeClient-reader",
+            daemon=True,
+        )
+        self._reader.start()
+
+    def _reader_loop(self, file, replies):
+        try:
+            while True:
+                line = file.readline()
+                if not line:
+                    raise RuntimeError("Connection closed")
+                if line.startswith(b"PUSHERR "):
+                    self.push_error = line[len(b"PUSHERR "):].decode("utf-8").strip()
+                    continue
+                if not line.startswith(b"FRAME "):
+                    replies.put(line)
+                    if line.strip() == b"UNSUBSCRIBED":
+                        return
+                    continue
+                parts = line.split()
+                width, height, channels, length = (int(v) for v in parts[1:5])
+                back = self._frame_buffers[1]
+                if len(back) < length:
+                    back.extend(bytes(length - len(back)))
+                view = memoryview(back)[:length]
+                n = file.readinto(view)
+                view.release()
+                if n != length:
+                    raise RuntimeError("Incomplete frame data")
+                self.bytes_received += len(line) + length
+                with self._frame_cond:
+                    self._frame_buffers.reverse()
+                    self._frame_meta = (width, height, channels, length)
+                    self._frame_seq += 1
+                    self._frame_cond.notify_all()
+        except Exception as err:
+            if self._replies is replies:
+                with self._frame_cond:
+                    self._reader_error = err
+                    self._frame_cond.notify_all()
+            replies.put(None)
+
     def _send_line(self, line: str):
         if self._sock is None:
             raise RuntimeError("Not connected")
@@ -37,6 +155,14 @@ class RLBridgeClient:
     def _readline(self) -> bytes:
         if self._file is None:
             raise RuntimeError("Not connected")
+        if self._reader is not None:
+            try:
+                line = self._replies.get(timeout=self.timeout)
+            except queue.Empty:
+                raise TimeoutError("Timed out waiting for bridge reply")
+            if line is None:
+                raise RuntimeError(f"Connection closed: {self._reader_error}")
+            return line
         line = self._file.readline()
         if not line:
             raise RuntimeError("Connection closed")
@@ -63,13 +189,22 @@ class RLBridgeClient:
         return self._readline().decode("utf-8").strip()
 
     def step(self):
+        if self._reader is not None:
+            return self._latest_frame_with_retry(newer=True)
         self._send_line("STEP")
         return self._read_frame_with_retry()
 
     def frame(self):
+        if self._reader is not None:
+            return self._latest_frame_with_retry(newer=False)
         self._send_line("FRAME")
         return self._read_frame_with_retry()
 
+    def advance(self, cycles: int = 1):
+        # Stepped clients only: run `cycles` game cycles, draw once and return that frame.
+        self._send_line(f"ADVANCE {max(1, int(cycles))}")
+        return self._read_frame_with_retry()
+
     def state(self):
         self._send_line("STATE")
         line = self._readline().decode("utf-8").strip()
@@ -86,8 +221,31 @@ class RLBridgeClient:
             "loop_cycle": int(parts[7]),
             "skill_index": int(parts[8]),
             "skill_delta": int(parts[9]),
+            "server_tick": int(parts[10]) if len(parts) > 10 else 0,
+            "moving": int(parts[11]) if len(parts) > 11 else 0,
         }
 
+    def sync(self) -> int:
+        # Returns once the client has run a couple of game cycles, so earlier input has reached the server.
+        self._send_line("SYNC")
+        line = self._readline().decode("utf-8").strip()
+        parts = line.split()
+        if len(parts) < 2 or parts[0] != "SYNC":
+            raise RuntimeError(f"Bad sync header: {line}")
+        return int(parts[1])
+
+    def click_mask(self, cols: int, rows: int):
+        # Row-major bitmap of clickable grid cells, MSB first, padded to whole bytes.
+        # None when the client has not drawn recently (ERR no-frame); callers pick a fallback.
+        self._send_line(f"MASK {int(cols)} {int(rows)}")
+        line = self._readline().decode("utf-8").strip()
+        if line.startswith("ERR"):
+            return None
+        parts = line.split()
+        if len(parts) < 4 or parts[0] != "MASK":
+            raise RuntimeError(f"Bad mask header: {line}")
+        return bytes.fromhex(parts[3])
+
     def ready(self) -> bool:
         self._send_line("READY")
         line = self._readline().decode("utf-8").strip()
@@ -97,6 +255,7 @@ class RLBridgeClient:
         return parts[1] == "1"
 
     def _read_frame(self):
+        t0 = time.perf_counter()
         header = self._readline().decode("utf-8").strip()
         if header == "ERR no-headless":
             # allow a short retry window during startup
@@ -112,9 +271,13 @@ class RLBridgeClient:
         height = int(parts[2])
         channels = int(parts[3])
         length = int(parts[4])
+        t1 = time.perf_counter()
         data = self._file.read(length)
         if data is None or len(data) != length:
             raise RuntimeError("Incomplete frame data")
+        self.last_wait_s = t1 - t0
+        self.last_transfer_s = time.perf_counter() - t1
+        self.bytes_received += len(header) + 1 + length
         return width, height, channels, data
 
     def _read_frame_with_retry(self, timeout_s=15.0):
@@ -125,6 +288,8 @@ class RLBridgeClient:
                 return self._read_frame()
             except (TimeoutError, RuntimeError, OSError) as err:
                 last_err = err
+                if self.alive is not None and not self.alive():
+                    raise ConnectionError("Bridge process has exited") from err
                 try:
                     self.close()
                 except Exception:
@@ -137,3 +302,24 @@ class RLBridgeClient:
         if last_err is not None:
             raise last_err
         raise RuntimeError("Failed to read frame")
+
+    def _latest_frame_with_retry(self, newer, timeout_s=15.0):
+        deadline = time.time() + timeout_s
+        last_err = None
+        while time.time() < deadline:
+            try:
+                if self._reader is None:
+                    self.connect()
+                return self.latest_frame(newer=newer)
+            except (TimeoutError, RuntimeError, OSError) as err:
+                last_err = err
+                if self.alive is not None and not self.alive():
+                    raise ConnectionError("Bridge process has exited") from err
+                try:
+                    self.close()
+                except Exception:
+                    pass
+                time.sleep(0.1)
+        if last_err is not None:
+            raise last_err
+        raise RuntimeError("Failed to read pushed frame")
@@ -0,0 +1,120 @@
+import io
+import json
+import os
+import queue
+import threading
+import time
+
+
+class CheckpointManager:
+    # Models are serialized into memory on the caller's thread (no disk I/O there). A daemon
+    # thread writes each snapshot to a temp file, fsyncs it, renames it into place and then
+    # applies retention: the newest keep_last plus the keep_best highest-reward checkpoints
+    # survive, everything else this manager wrote is deleted. The manifest
+    # <save_path>_checkpoints.json records what is on disk so a run can resume from it.
+
+    _CLOSE = object()
+
+    def __init__(self, save_path, keep_last=3, keep_best=1, max_pending=2):
+        self.save_path = save_path
+        self.keep_last = max(1, int(keep_last))
+        self.keep_best = max(0, int(keep_best))
+        self.manifest_path = f"{save_path}_checkpoints.json"
+        self.skipped = 0
+        self._lock = threading.Lock()
+        self._entries = self._read_manifest()
+        self._queue = queue.Queue(maxsize=int(max_pending))
+        parent = os.path.dirname(save_path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="checkpoint-writer", daemon=True)
+        self._thread.start()
+
+    def snapshot(self, model, step, reward=None):
+        buf = io.BytesIO()
+        model.save(buf)
+        item = {"step": int(step), "reward": None if reward is None else float(reward), "data": buf.getvalue()}
+        try:
+            self._queue.put_nowait(item)
+            return True
+        except queue.Full:
+            # The writer is behind; dropping this one keeps training from waiting on the disk.
+            self.skipped += 1
+            print(f"[checkpoint] writer busy, skipped step {step}")
+            return False
+
+    def close(self, timeout_s=120.0):
+        self._queue.put(self._CLOSE)
+        self._thread.join(timeout_s)
+
+    def latest(self):
+        with self._lock:
+            entries = [e for e in self._entries if os.path.exists(e["path"])]
+        if not entries:
+            return None
+        return max(entries, key=lambda e: e["step"])
+
+    def best(self):
+        with self._lock:
+            entries = [e for e in self._entries if e["reward"] is not None and os.path.exists(e["path"])]
+        if not entries:
+            return None
+        return max(entries, key=lambda e: (e["reward"], e["step"]))
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is self._CLOSE:
+                break
+            try:
+                self._write(item)
+            except OSError as err:
+                print(f"[checkpoint] failed to write step {item['step']}: {err}")
+
+    def _write(self, item):
+        path = f"{self.save_path}_step_{item['step']}.zip"
+        tmp = f"{path}.tmp"
+        t0 = time.perf_counter()
+        with open(tmp, "wb") as f:
+            f.write(item["data"])
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+        entry = {"path": path, "step": item["step"], "reward": item["reward"], "time": time.time()}
+        with self._lock:
+            self._entries = [e for e in self._entries if e["path"] != path] + [entry]
+            removed = self._apply_retention()
+            self._write_manifest()
+        for old in removed:
+            try:
+                os.remove(old)
+            except FileNotFoundError:
+                pass
+        reward = "n/a" if item["reward"] is None else f"{item['reward']:.3f}"
+        print(
+            f"[checkpoint] saved {path} ({len(item['data']) / 1e6:.1f} MB, "
+            f"{time.perf_counter() - t0:.2f}s, reward={reward})"
+        )
+
+    def _apply_retention(self):
+        by_step = sorted(self._entries, key=lambda e: e["step"], reverse=True)
+        keep = {e["path"] for e in by_step[: self.keep_last]}
+        rewarded = [e for e in self._entries if e["reward"] is not None]
+        rewarded.sort(key=lambda e: (e["reward"], e["step"]), reverse=True)
+        keep.update(e["path"] for e in rewarded[: self.keep_best])
+        removed = [e["path"] for e in self._entries if e["path"] not in keep]
+        self._entries = [e for e in self._entries if e["path"] in keep]
+        return removed
+
+    def _read_manifest(self):
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                return list(json.load(f).get("checkpoints", []))
+        except (OSError, ValueError):
+            return []
+
+    def _write_manifest(self):
+        tmp = f"{self.manifest_path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"checkpoints": sorted(self._entries, key=lambda e: e["step"])}, f, indent=2)
+        os.replace(tmp, self.manifest_path)
@@ -0,0 +1,243 @@
+import math
+import socket
+import threading
+import time
+
+
+# Upper bounds (ms) of the server's tick histogram buckets; one more bucket holds longer ticks.
+TICK_HISTOGRAM_MS = (5, 10, 25, 50, 100, 250, 500)
+
+
+def parse_tick_stats(parts):
+    # TICKSTATS <ticks> <avg_ms> <max_ms> <overruns> <cycle_time_ms> <bucket counts...>
+    return {
+        "ticks": int(parts[1]),
+        "avg_ms": float(parts[2]),
+        "max_ms": int(parts[3]),
+        "overruns": int(parts[4]),
+        "cycle_time_ms": int(parts[5]),
+        "histogram": [int(v) for v in parts[6:]],
+        "time": time.time(),
+    }
+
+
+class RLControlClient:
+    def __init__(self, host="127.0.0.1", port=43610, timeout=10.0):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.tick = None
+        self.attached = False
+        self.last_stats = None
+        self._sock = None
+        self._file = None
+
+    def connect(self):
+        if self._sock is not None:
+            return
+        self._sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._file = self._sock.makefile("rb")
+
+    def close(self):
+        self.attached = False
+        if self._file is not None:
+            try:
+                self._file.close()
+            finally:
+                self._file = None
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            finally:
+                self._sock = None
+
+    def _send_line(self, line: str):
+        if self._sock is None:
+            raise RuntimeError("Not connected")
+        self._sock.sendall((line + "\n").encode("utf-8"))
+
+    def _readline(self) -> str:
+        if self._file is None:
+            raise RuntimeError("Not connected")
+        line = self._file.readline()
+        if not line:
+            raise RuntimeError("Control channel closed")
+        return line.decode("utf-8").strip()
+
+    def _read_until(self, prefix):
+        # TICK lines can arrive between replies; keep the newest one.
+        while True:
+            parts = self._readline().split()
+            if not parts:
+                continue
+            if parts[0] == "TICK" and prefix != "TICK":
+                self.tick = max(self.tick or 0, int(parts[1]))
+                continue
+            if parts[0] == "TICKSTATS" and prefix != "TICKSTATS":
+                self.last_stats = parse_tick_stats(parts)
+                continue
+            if parts[0] == "DETACHED" and prefix != "DETACHED":
+                self.attached = False
+                raise RuntimeError("Detached from lockstep (no ACK within the server timeout)")
+            if parts[0] != prefix:
+                raise RuntimeError(f"Unexpected control reply: {' '.join(parts)}")
+            return parts
+
+    def ping(self) -> str:
+        self._send_line("PING")
+        return self._read_until("PONG")[0]
+
+    def subscribe_stats(self, on=True):
+        self.connect()
+        self._send_line("STATS ON" if on else "STATS OFF")
+        self._read_until("STATS")
+
+    def read_stats(self):
+        # Blocks until the server's next telemetry window.
+        self.last_stats = parse_tick_stats(self._read_until("TICKSTATS"))
+        return self.last_stats
+
+    def set_cycle(self, ms) -> int:
+        self.connect()
+        self._send_line(f"SET_CYCLE {int(ms)}")
+        return int(self._read_until("CYCLE")[1])
+
+    def attach(self) -> int:
+        self.connect()
+        self._send_line("ATTACH")
+        parts = self._read_until("ATTACHED")
+        self.tick = max(self.tick or 0, int(parts[1]))
+        self.attached = True
+        return self.tick
+
+    def detach(self):
+        if not self.attached:
+            return
+        self._send_line("DETACH")
+        self._read_until("DETACHED")
+        self.attached = False
+
+    def ack(self, tick=None):
+        self._send_line(f"ACK {self.tick if tick is None else int(tick)}")
+
+    def wait_tick(self, after: int) -> int:
+        while self.tick is None or self.tick <= after:
+            parts = self._read_until("TICK")
+            self.tick = max(self.tick or 0, int(parts[1]))
+        return self.tick
+
+    def advance(self) -> int:
+        # Release the current tick and block until the server has run the next one.
+        if not self.attached:
+            self.attach()
+        before = self.tick
+        self.ack(before)
+        try:
+            return self.wait_tick(before)
+        except RuntimeError:
+            if self.attached:
+                raise
+            print("[rl-scape] lockstep detached by server, re-attaching")
+            return self.attach()
+
+
+class CycleController:
+    # Keeps a running server's tick period just above what its load needs. Any overrun (or an
+    # average above avg_ratio of the period) raises the period by raise_factor straight away;
+    # after calm_windows quiet telemetry windows it is lowered by lower_factor, but only if
+    # the slowest recent tick and the average still fit the lower period. Runs on a daemon
+    # thread with its own control connection and reconnects if the server restarts.
+
+    def __init__(
+        self,
+        host="127.0.0.1",
+        port=43610,
+        min_ms=60,
+        max_ms=600,
+        avg_ratio=0.9,
+        raise_factor=1.25,
+        lower_factor=0.9,
+        calm_windows=6,
+        on_change=None,
+    ):
+        self.host = host
+        self.port = int(port)
+        self.min_ms = int(min_ms)
+        self.max_ms = int(max_ms)
+        self.avg_ratio = float(avg_ratio)
+        self.raise_factor = float(raise_factor)
+        self.lower_factor = float(lower_factor)
+        self.calm_windows = max(1, int(calm_windows))
+        self.on_change = on_change
+        self.cycle_time_ms = None
+        self.last_stats = None
+        self.changes = []
+        self._calm = 0
+        self._window_max = 0
+        self._settle = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="cycle-controller", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5.0)
+            self._thread = None
+
+    def decide(self, stats):
+        # New period for this telemetry window, or None to keep the current one.
+        cycle = stats["cycle_time_ms"]
+        if self._settle:
+            # This window may still hold ticks from before the last change.
+            self._settle -= 1
+            return None
+        if stats["overruns"] > 0 or stats["avg_ms"] > cycle * self.avg_ratio:
+            self._calm = 0
+            self._window_max = 0
+            target = min(self.max_ms, max(cycle + 1, math.ceil(cycle * self.raise_factor)))
+            return target if target != cycle else None
+        self._calm += 1
+        self._window_max = max(self._window_max, stats["max_ms"])
+        if self._calm < self.calm_windows:
+            return None
+        target = max(self.min_ms, math.floor(cycle * self.lower_factor))
+        peak = self._window_max
+        self._calm = 0
+        self._window_max = 0
+        if target >= cycle or peak >= target or stats["avg_ms"] > target * self.avg_ratio:
+            return None
+        return target
+
+    def _run(self):
+        while not self._stop.is_set():
+            client = RLControlClient(host=self.host, port=self.port, timeout=30.0)
+            try:
+                client.subscribe_stats()
+                while not self._stop.is_set():
+                    stats = client.read_stats()
+                    self.last_stats = stats
+                    self.cycle_time_ms = stats["cycle_time_ms"]
+                    target = self.decide(stats)
+                    if target is None:
+                        continue
+                    applied = client.set_cycle(target)
+                    print(
+                        f"[rl-scape] cycle time {stats['cycle_time_ms']}ms -> {applied}ms "
+                        f"(avg {stats['avg_ms']:.1f}ms, max {stats['max_ms']}ms, overruns {stats['overruns']})"
+                    )
+                    self.cycle_time_ms = applied
+                    self._settle = 1
+                    self.changes.append((time.time(), applied))
+                    if self.on_change is not None:
+                        self.on_change(applied)
+            except (OSError, RuntimeError, ValueError):
+                # Server not up yet or restarting.
+                self._stop.wait(1.0)
+            finally:
+                client.close()
@@ -0,0 +1,248 @@
+import io
+import json
+import queue
+import socket
+import struct
+import threading
+import time
+
+import numpy as np
+
+
+DEFAULT_LEARNER_PORT = 5680
+
+# Frame: header length, blob length, JSON header, binary blob.
+_FRAME = struct.Struct("!II")
+
+
+def parse_address(address, default_port=DEFAULT_LEARNER_PORT):
+    if isinstance(address, (tuple, list)):
+        return str(address[0]), int(address[1])
+    host, _, port = str(address).rpartition(":")
+    return host or "127.0.0.1", int(port or default_port)
+
+
+def send_message(f, header, blob=b""):
+    head = json.dumps(header).encode("utf-8")
+    f.write(_FRAME.pack(len(head), len(blob)))
+    f.write(head)
+    if blob:
+        f.write(blob)
+    f.flush()
+
+
+def _read_exact(f, n):
+    data = f.read(n)
+    if data is None or len(data) < n:
+        raise RuntimeError("Connection closed mid-message")
+    return data
+
+
+def recv_message(f):
+    raw = f.read(_FRAME.size)
+    if not raw:
+        return None, b""
+    if len(raw) < _FRAME.size:
+        raise RuntimeError("Connection closed mid-message")
+    head_len, blob_len = _FRAME.unpack(raw)
+    header = json.loads(_read_exact(f, head_len))
+    blob = _read_exact(f, blob_len) if blob_len else b""
+    return header, blob
+
+
+def pack_arrays(arrays):
+    # Frames compress well, so the whole chunk goes out deflated.
+    buf = io.BytesIO()
+    np.savez_compressed(buf, **arrays)
+    return buf.getvalue()
+
+
+def unpack_arrays(blob):
+    with np.load(io.BytesIO(blob), allow_pickle=False) as data:
+        return {k: data[k] for k in data.files}
+
+
+def compute_gae(rewards, values, episode_starts, last_value, last_done, gamma, gae_lambda):
+    # Same recursion as SB3's RolloutBuffer.compute_returns_and_advantage, for one env.
+    n = len(rewards)
+    advantages = np.zeros(n, dtype=np.float32)
+    last_gae = 0.0
+    for step in reversed(range(n)):
+        if step == n - 1:
+            next_non_terminal = 1.0 - float(last_done)
+            next_value = float(last_value)
+        else:
+            next_non_terminal = 1.0 - float(episode_starts[step + 1])
+            next_value = float(values[step + 1])
+        delta = rewards[step] + gamma * next_value * next_non_terminal - values[step]
+        last_gae = delta + gamma * gae_lambda * next_non_terminal * last_gae
+        advantages[step] = last_gae
+    returns = (advantages + values).astype(np.float32)
+    return advantages, returns
+
+
+class LearnerServer:
+    # Accepts actor connections, queues their rollout chunks and hands out the newest weights.
+    # Actors never wait for a learner update: every chunk is answered straight away, with the
+    # weights attached only if they are newer than the version the actor is running.
+
+    def __init__(self, host="0.0.0.0", port=DEFAULT_LEARNER_PORT, config=None, max_queued_chunks=64):
+        self.host = host
+        self.port = int(port)
+        self.config = dict(config or {})
+        self.chunks = queue.Queue(maxsize=int(max_queued_chunks))
+        self.spaces = None
+        self.stopping = False
+        self._spaces_ready = threading.Event()
+        self._lock = threading.Lock()
+        self._version = 0
+        self._weights = b""
+        self._sock = None
+        self._actors = 0
+
+    def publish(self, weights):
+        with self._lock:
+            self._version += 1
+            self._weights = weights
+            return self._version
+
+    @property
+    def version(self):
+        with self._lock:
+            return self._version
+
+    @property
+    def actors(self):
+        with self._lock:
+            return self._actors
+
+    def wait_for_spaces(self, timeout_s=None):
+        # The first actor to connect describes the observation and action spaces.
+        if not self._spaces_ready.wait(timeout_s):
+            raise RuntimeError("No actor connected")
+        return self.spaces
+
+    def wait_for_weights(self):
+        while not self.stopping:
+            with self._lock:
+                if self._version:
+                    return
+            time.sleep(0.1)
+
+    def start(self):
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._sock.bind((self.host, self.port))
+        self._sock.listen(64)
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+        print(f"[learner] listening on {self.host}:{self.port}")
+
+    def _accept_loop(self):
+        while not self.stopping:
+            try:
+                conn, addr = self._sock.accept()
+            except OSError:
+                break
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            threading.Thread(target=self._handle, args=(conn, addr), daemon=True).start()
+
+    def _weights_since(self, version):
+        with self._lock:
+            if self._version > version:
+                return self._version, self._weights
+            return self._version, b""
+
+    def _handle(self, conn, addr):
+        name = f"{addr[0]}:{addr[1]}"
+        with self._lock:
+            self._actors += 1
+        try:
+            with conn, conn.makefile("rwb") as f:
+                while True:
+                    header, blob = recv_message(f)
+                    if header is None:
+                        break
+                    op = header.get("op")
+                    if op == "hello":
+                        name = header.get("name") or name
+                        if self.spaces is None:
+                            self.spaces = header["spaces"]
+                            self._spaces_ready.set()
+                        elif header["spaces"] != self.spaces:
+                            send_message(f, {"ok": False, "error": "spaces differ from the other actors"})
+                            break
+                        self.wait_for_weights()
+                        version, weights = self._weights_since(0)
+                        print(f"[learner] actor {name} joined")
+                        send_message(f, {"ok": True, "version": version, "stop": self.stopping, **self.config}, weights)
+                    elif op == "chunk":
+                        header["actor"] = name
+                        # A full queue holds the actor back until the learner catches up.
+                        while not self.stopping:
+                            try:
+                                self.chunks.put((header, blob), timeout=1.0)
+                                break
+                            except queue.Full:
+                                continue
+                        version, weights = self._weights_since(int(header.get("version", 0)))
+                        send_message(f, {"ok": True, "version": version, "stop": self.stopping}, weights)
+                    else:
+                        send_message(f, {"ok": False, "error": f"unknown op: {op}"})
+        except (OSError, RuntimeError) as err:
+            print(f"[learner] actor {name} dropped: {err}")
+        finally:
+            with self._lock:
+                self._actors -= 1
+
+    def stop(self):
+        self.stopping = True
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            finally:
+                self._sock = None
+
+
+class ActorClient:
+    def __init__(self, address=("127.0.0.1", DEFAULT_LEARNER_PORT), timeout=300.0):
+        self.host, self.port = parse_address(address)
+        self.timeout = timeout
+        self.version = 0
+        self._sock = None
+        self._file = None
+
+    def _call(self, header, blob=b""):
+        if self._sock is None:
+            self._sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+            self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._file = self._sock.makefile("rwb")
+        send_message(self._file, header, blob)
+        reply, weights = recv_message(self._file)
+        if reply is None:
+            raise RuntimeError("Learner closed the connection")
+        if not reply.get("ok"):
+            raise RuntimeError(f"Learner rejected {header.get('op')}: {reply.get('error')}")
+        if weights:
+            self.version = int(reply["version"])
+        return reply, weights
+
+    def hello(self, spaces, name=None):
+        return self._call({"op": "hello", "name": name, "spaces": spaces})
+
+    def send_chunk(self, arrays, episodes=(), steps=None):
+        header = {"op": "chunk", "version": self.version, "episodes": list(episodes)}
+        if steps is not None:
+            header["steps"] = int(steps)
+        return self._call(header, pack_arrays(arrays))
+
+    def close(self):
+        if self._file is not None:
+            try:
+                self._file.close()
+            finally:
+                self._file = None
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            finally:
+                self._sock = None
@@ -1,11 +1,17 @@
-import os
 import time
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
 import gymnasium as gym
 from gymnasium import spaces
 
 from .bridge import RLBridgeClient
+from .control import RLControlClient
 from .launcher import RLScapeLauncher
+from .metrics import StepMetrics
+from .pool import PoolClient
+from .profiling import ProfileSession, default_profile_dir
+from .viewer import FramePublisher
 
 
 ACTION_NOOP = 0
@@ -13,6 +19,36 @@ ACTION_MOVE = 1
 ACTION_LEFT_CLICK = 2
 ACTION_RIGHT_CLICK = 3
 
+# Length of one client game cycle at the default 50 fps.
+CLIENT_CYCLE_S = 0.02
+
+
+def default_busy(state):
+    # Animating (chopping, fighting, ...), walking, or engaged with an NPC/player.
+    return state["anim"] != -1 or state.get("moving", 0) != 0 or state["interacting"] != -1
+
+
+def _merge_reward_info(acc, info):
+    if not acc:
+        return dict(info)
+    if not info:
+        return acc
+    merged = dict(info)
+    merged["reward_xp"] = acc.get("reward_xp", 0.0) + info.get("reward_xp", 0.0)
+    merged["reward_level"] = acc.get("reward_level", 0.0) + info.get("reward_level", 0.0)
+    # Per-skill totals, so XP on one skill is not lost when another skill gains later on.
+    skill_xp = dict(acc.get("skill_xp", {}))
+    for skill, delta in info.get("skill_xp", {}).items():
+        skill_xp[skill] = skill_xp.get(skill, 0) + delta
+    merged["skill_xp"] = skill_xp
+    if info.get("reward_xp", 0) <= 0:
+        # Keep the last skill that actually gained XP during the macro-step.
+        merged["skill_index"] = acc.get("skill_index", -1)
+        merged["skill_delta"] = acc.get("skill_delta", 0)
+    elif acc.get("skill_index") == info.get("skill_index"):
+        merged["skill_delta"] = acc.get("skill_delta", 0) + info.get("skill_delta", 0)
+    return merged
+
 
 class RLScapeEnv(gym.Env):
     metadata = {"render_modes": ["rgb_array", "human"], "render_fps": 50}
@@ -30,6 +66,7 @@ class RLScapeEnv(gym.Env):
         name=None,
         local=True,
         resize=(384, 252),
+        layout="hwc",
         render_mode="rgb_array",
         render_scale=1,
         render_fps=50,
@@ -43,6 +80,29 @@ class RLScapeEnv(gym.Env):
         calibrate_window_sec=1.5,
         target_tick_seconds=None,
         log_tick_sync=False,
+        metrics=False,
+        metrics_file=None,
+        metrics_every_s=10.0,
+        stream_frames=False,
+        stream_every=1,
+        prefetch=False,
+        action_grid=None,
+        action_mask=False,
+        render_on_demand=False,
+        lockstep=False,
+        control_port=43610,
+        stepped=False,
+        cycles_per_step=30,
+        supervise=True,
+        jvm_profile="default",
+        pin_cpus=False,
+        instance=0,
+        pool_address=None,
+        viewer=None,
+        macro_steps=False,
+        macro_max_ticks=16,
+        busy_predicate=None,
+        account_template=None,
     ):
         super().__init__()
         self.render_mode = render_mode
@@ -52,12 +112,30 @@ class RLScapeEnv(gym.Env):
         self._clock = None
         self.render_scale = max(1, int(render_scale))
         self.render_fps = int(render_fps)
+        self._pool = None
+        self._lease = None
+        if pool_address is not None:
+            # Lease a warm, logged-in instance from the pool daemon instead of launching one.
+            self._pool = PoolClient(pool_address)
+            self._lease = self._pool.lease()
+            host, port = self._lease["host"], self._lease["port"]
+            username = name = self._lease["username"]
+            launch = False
         self._client = RLBridgeClient(host=host, port=port, timeout=timeout)
+        self.stream_frames = bool(stream_frames)
+        if self.stream_frames:
+            # The bridge pushes every Nth rendered frame; reads return the newest one.
+            self._client.subscribe(stream_every)
         self._connected = False
         self._launcher = None
         self._launch_enabled = launch
         if name is not None:
             username = name
+        # Macro-steps: after an action, keep advancing ticks while busy_predicate(state) holds.
+        self.macro_max_ticks = max(1, int(macro_max_ticks))
+        self.busy_predicate = busy_predicate or default_busy
+        # Out-of-process viewing: frames go to shared memory for scripts/viewer.py to pick up.
+        self._publisher = FramePublisher(username if viewer is True else viewer) if viewer else None
         if launch:
             self._launcher = RLScapeLauncher(
                 server_dir=server_dir,
@@ -67,7 +145,47 @@ class RLScapeEnv(gym.Env):
                 username=username,
                 local=local,
                 headless=self.headless,
+                render_on_demand=render_on_demand,
+                lockstep=lockstep,
+                control_port=control_port,
+                stepped=stepped,
+                jvm_profile=jvm_profile,
+                pin_cpus=pin_cpus,
+                instance=instance,
+                account_template=account_template,
             )
+        # Supervision: a crashed JVM is restarted and the episode truncated instead of raising.
+        self.supervise = bool(supervise) and self._launcher is not None
+        if self.supervise:
+            # Either JVM exiting ends the bridge's retry loop at once.
+            self._client.alive = lambda: not self._launcher.poll()
+        # Lockstep: the server only runs the next tick once this env has acked the current one.
+        self.lockstep = bool(lockstep)
+        self._control = RLControlClient(host=host, port=control_port, timeout=timeout) if self.lockstep else None
+        if self.lockstep:
+            sync_to_tick = True
+            auto_calibrate_tick = False
+            # The world is frozen until the next action, so a prefetched frame is always stale.
+            prefetch = False
+        # Stepped: the client only runs game cycles when the env sends ADVANCE.
+        self.stepped = bool(stepped)
+        self.cycles_per_step = max(1, int(cycles_per_step))
+        if self.stepped:
+            if self.stream_frames:
+                raise ValueError("stepped does not support stream_frames")
+            sync_to_tick = True
+            auto_calibrate_tick = False
+            # Prefetching would advance the client before the action is known.
+            prefetch = False
+            if not self.lockstep:
+                # A step is a fixed number of client cycles, so the tick counter is exact.
+                tick_divisor = self.cycles_per_step
+        self.macro_steps = bool(macro_steps)
+        if self.macro_steps and not sync_to_tick:
+            # Each extra read must be one tick for elapsed_ticks and episode_length to hold.
+            raise ValueError("macro_steps requires sync_to_tick")
+        # With lockstep the server tick is awaited one client cycle at a time.
+        self._advance_cycles = 1 if self.lockstep else self.cycles_per_step
 
         # Full client frame size: 765x503
         self.raw_width = 765
@@ -80,28 +198,42 @@ class RLScapeEnv(gym.Env):
             self.width = int(resize[0])
             self.height = int(resize[1])
 
+        # "chw" hands out channel-first observations, gathered straight from the received frame.
+        if layout not in ("hwc", "chw"):
+            raise ValueError(f"layout must be 'hwc' or 'chw', got {layout!r}")
+        self.layout = layout
+        self._gather = None
         self.observation_space = spaces.Box(
             low=0,
             high=255,
-            shape=(self.height, self.width, 3),
+            shape=self._obs_shape(),
             dtype=np.uint8,
         )
 
         # Minimal action: (type, x, y)
         # 0 noop, 1 move, 2 left click, 3 right click
+        # With action_grid=(cols, rows), x/y index grid cells instead of observation pixels.
+        self.action_grid = None if action_grid is None else (int(action_grid[0]), int(action_grid[1]))
+        if action_mask and self.action_grid is None:
+            raise ValueError("action_mask requires action_grid")
+        self.action_mask = bool(action_mask)
+        action_w, action_h = self.action_grid or (self.width, self.height)
         self.action_space = spaces.Dict(
             {
                 "type": spaces.Discrete(4),
-                "x": spaces.Box(low=0, high=self.width - 1, shape=(), dtype=np.int32),
-                "y": spaces.Box(low=0, high=self.height - 1, shape=(), dtype=np.int32),
+                "x": spaces.Box(low=0, high=action_w - 1, shape=(), dtype=np.int32),
+                "y": spaces.Box(low=0, high=action_h - 1, shape=(), dtype=np.int32),
             }
         )
-        self.sb3_action_space = spaces.MultiDiscrete([4, self.width, self.height])
+        self.sb3_action_space = spaces.MultiDiscrete([4, action_w, action_h])
+        self._build_action_lut()
+        self._last_mask = None
 
         self._last_obs = None
         self._prev_state = None
         self.episode_length = int(episode_length)
         self._step_count = 0
+        self._next_calibrate = 0
         self.reward_xp_scale = float(reward_xp_scale)
         self.reward_level_bonus = float(reward_level_bonus)
         self.sync_to_tick = bool(sync_to_tick)
@@ -112,6 +244,20 @@ class RLScapeEnv(gym.Env):
         self.target_tick_seconds = target_tick_seconds
         self.log_tick_sync = bool(log_tick_sync)
         self._last_tick = None
+        self.prefetch = bool(prefetch)
+        self._prefetch_pool = None
+        self._prefetch_future = None
+        self._metrics = None
+        if metrics or metrics_file is not None:
+            self._metrics = StepMetrics(
+                labels={"username": username, "port": port},
+                prom_path=metrics_file,
+                prom_every_s=metrics_every_s,
+            )
+
+    @property
+    def launcher(self):
+        return self._launcher
 
     def _ensure_connected(self):
         if not self._connected:
@@ -127,26 +273,97 @@ class RLScapeEnv(gym.Env):
 
     def reset(self, *, seed=None, options=None):
         super().reset(seed=seed)
+        self._collect_prefetch()
+        t_start = time.perf_counter()
+        if self._metrics is not None:
+            self._metrics.begin()
         if self._launcher is not None:
+            if self.supervise:
+                dead = self._launcher.poll()
+                if dead:
+                    self._launcher.restart(dead)
             self._launcher.start()
+            if (options or {}).get("reset_account"):
+                # Fresh client login, so the bridge connection has to be rebuilt.
+                self._launcher.reset_character()
+                self._client.close()
+                self._connected = False
         self._ensure_connected()
         try:
-            obs = self._read_frame()
+            obs = self._read_frame(step=self.stepped)
             self._wait_for_ready()
             self._prev_state = self._wait_for_stable_state()
         except Exception:
             self.close()
             raise
+        if self._control is not None and not self._control.attached:
+            self._control.attach()
         if self.auto_calibrate_tick:
             self._calibrate_tick_divisor()
         if self._prev_state is not None:
-            self._last_tick = self._prev_state["loop_cycle"] // self.tick_divisor
+            self._last_tick = self._tick_of(self._prev_state)
         self._last_obs = obs
+        if self._publisher is not None:
+            # Same HWC view as step(), or a chw frame would be published as 3 x H.
+            self._publisher.publish(self._hwc(obs))
         self._step_count = 0
+        self._next_calibrate = self.calibrate_every
         info = {}
+        if self._prev_state is not None:
+            # Baseline for per-episode XP: the first step's info is already after an action.
+            info["total_xp"] = self._prev_state["total_xp"]
+            info["total_levels"] = self._prev_state["total_levels"]
+        if self.action_mask:
+            info["action_mask"] = self._read_click_mask()
+        if self._metrics is not None:
+            self._metrics.observe("reset", time.perf_counter() - t_start)
+            self._metrics.incr("resets")
+            info["timings"] = self._metrics.last_timings()
+        self._start_prefetch()
         return obs, info
 
     def step(self, action):
+        if not self.supervise:
+            return self._step(action)
+        dead = self._launcher.poll()
+        if dead:
+            return self._recover(RuntimeError(f"{' and '.join(dead)} process exited"), dead)
+        try:
+            return self._step(action)
+        except (RuntimeError, OSError) as err:
+            # Only a dead or unresponsive process counts as a crash; protocol errors are bugs
+            # and are raised. The bridge is closed first so the health ping can get through.
+            self._collect_prefetch()
+            self._client.close()
+            self._connected = False
+            failed = self._launcher.check_health()
+            if not failed:
+                raise
+            return self._recover(err, failed)
+
+    def _recover(self, err, failed):
+        self._collect_prefetch()
+        self._client.close()
+        self._connected = False
+        if self._control is not None:
+            self._control.close()
+        self._launcher.restart(failed)
+        restarted = list(failed)
+        print(f"[rl-scape] step failed ({err}); restarted: {', '.join(restarted) or 'nothing'}")
+        obs = self._last_obs
+        if obs is None:
+            obs = np.zeros(self.observation_space.shape, dtype=np.uint8)
+        info = {"step_count": self._step_count, "restarted": restarted, "error": str(err)}
+        # Truncate so the caller resets; reset reconnects and waits for the login.
+        return obs, 0.0, False, True, info
+
+    def _step(self, action):
+        t_start = time.perf_counter()
+        pending, fresh = self._collect_prefetch()
+        if self._metrics is not None:
+            self._metrics.begin()
+            if pending is not None:
+                self._metrics.observe("prefetch_wait", time.perf_counter() - t_start)
         self._ensure_connected()
         if isinstance(action, dict):
             action_type = int(action.get("type", ACTION_NOOP))
@@ -157,14 +374,98 @@ class RLScapeEnv(gym.Env):
             x = int(action[1])
             y = int(action[2])
 
+        if pending is not None and action_type == ACTION_NOOP:
+            # Nothing to send, so the prefetched frame is what this step would read,
+            # provided the tick has moved on since the last step.
+            obs, state = pending
+            if self.sync_to_tick and self._tick_of(state) <= self._last_tick:
+                obs, state = self._read_observation(self._last_tick)
+            elif self.sync_to_tick:
+                self._last_tick = self._tick_of(state)
+        else:
+            # A prefetch we had to block on finished just now, so its state can stand in
+            # for the pre-action read; an older one may be ticks behind and is re-read.
+            obs, state = self._act(action_type, x, y, state_before=pending[1] if fresh else None)
+
+        self._last_obs = obs
+        self._show(obs)
+
+        t0 = time.perf_counter()
+        reward, reward_info = self._compute_reward(self._prev_state, state, action_type)
+        self._observe("reward", t0)
+        self._prev_state = state
+        elapsed = 1
+        if self.macro_steps:
+            obs, reward, reward_info, elapsed = self._macro_advance(obs, reward, reward_info)
+        terminated = False
+        self._step_count += elapsed
+        truncated = self._step_count >= self.episode_length
+        info = {"step_count": self._step_count, "elapsed_ticks": elapsed}
+        info.update(reward_info)
+        if self.action_mask:
+            info["action_mask"] = self._read_click_mask()
+        if self.auto_calibrate_tick and self.calibrate_every > 0:
+            # Macro actions advance several ticks per step, so compare against a threshold.
+            if self._step_count >= self._next_calibrate:
+                self._calibrate_tick_divisor()
+                self._next_calibrate = self._step_count + self.calibrate_every
+        if self._metrics is not None:
+            self._metrics.observe("step", time.perf_counter() - t_start)
+            self._metrics.incr("steps")
+            info["timings"] = self._metrics.last_timings()
+            self._metrics.maybe_dump()
+        if not truncated:
+            self._start_prefetch()
+        return obs, reward, terminated, truncated, info
+
+    def _show(self, obs):
+        if self.render_mode == "human":
+            t0 = time.perf_counter()
+            self.render()
+            self._observe("render", t0)
+        if self._publisher is not None:
+            t0 = time.perf_counter()
+            self._publisher.publish(self._hwc(obs))
+            self._observe("render", t0)
+
+    def _macro_advance(self, obs, reward, reward_info):
+        # The policy is not consulted for these ticks; their rewards fold into this transition.
+        # Ticks count toward episode_length, so an episode still covers a fixed amount of game time.
+        elapsed = 1
+        t0 = time.perf_counter()
+        state = self._prev_state
+        while (
+            state is not None
+            and elapsed < self.macro_max_ticks
+            and self._step_count + elapsed < self.episode_length
+            and self.busy_predicate(state)
+        ):
+            obs, next_state = self._read_observation(self._last_tick)
+            self._last_obs = obs
+            self._show(obs)
+            tick_reward, tick_info = self._compute_reward(state, next_state, ACTION_NOOP)
+            reward += tick_reward
+            reward_info = _merge_reward_info(reward_info, tick_info)
+            state = next_state
+            elapsed += 1
+        self._prev_state = state
+        if elapsed > 1:
+            self._observe("macro_wait", t0)
+            if self._metrics is not None:
+                self._metrics.incr("macro_ticks", elapsed - 1)
+        return obs, reward, reward_info, elapsed
+
+    def _act(self, action_type, x, y, state_before=None):
         x_raw, y_raw = self._to_raw_coords(x, y)
 
         tick_before = None
         if self.sync_to_tick:
-            state_before = self._read_state()
-            tick_before = state_before["loop_cycle"] // self.tick_divisor
+            if state_before is None:
+                state_before = self._read_state()
+            tick_before = self._tick_of(state_before)
             self._last_tick = tick_before
 
+        t0 = time.perf_counter()
         if action_type == ACTION_MOVE:
             self._client.move(x_raw, y_raw)
         elif action_type == ACTION_LEFT_CLICK:
@@ -175,38 +476,81 @@ class RLScapeEnv(gym.Env):
             self._client.move(x_raw, y_raw)
             self._client.down(3)
             self._client.up(3)
-
-        obs = None
-        state = None
-        if self.sync_to_tick and tick_before is not None:
-            while True:
-                obs = self._read_frame(step=True)
-                state = self._read_state()
-                tick_after = state["loop_cycle"] // self.tick_divisor
-                if tick_after > tick_before:
-                    self._last_tick = tick_after
-                    if self.log_tick_sync:
-                        print(f"[rl-scape] tick {tick_before} -> {tick_after} action={action_type}")
-                    break
-        else:
+        self._observe("action_send", t0)
+        return self._read_observation(tick_before, action_type)
+
+    def _read_observation(self, tick_before, action_type=ACTION_NOOP):
+        if not self.sync_to_tick or tick_before is None:
+            # When streaming, take whatever frame is newest instead of waiting for the next one.
+            obs = self._read_frame(step=not self.stream_frames)
+            return obs, self._read_state()
+        if self._control is not None:
+            t0 = time.perf_counter()
+            if action_type != ACTION_NOOP:
+                # Make sure the client has sent the input before the server runs the tick.
+                self._client.sync()
+            self._control.advance()
+            self._observe("lockstep_wait", t0)
+        reads = 0
+        while True:
             obs = self._read_frame(step=True)
             state = self._read_state()
+            reads += 1
+            tick_after = self._tick_of(state)
+            if tick_after > tick_before:
+                if self._metrics is not None and reads > 1:
+                    self._metrics.incr("extra_frames", reads - 1)
+                self._last_tick = tick_after
+                if self.log_tick_sync:
+                    print(f"[rl-scape] tick {tick_before} -> {tick_after} action={action_type}")
+                return obs, state
+
+    def _tick_of(self, state):
+        if self.lockstep:
+            return state["server_tick"]
+        return state["loop_cycle"] // self.tick_divisor
+
+    def _start_prefetch(self):
+        if not self.prefetch or not self._connected:
+            return
+        if self._prefetch_pool is None:
+            self._prefetch_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rl-scape-prefetch")
+        # Runs while the caller computes its next action; the bridge client is not
+        # touched on the main thread until _collect_prefetch() has joined it.
+        self._prefetch_future = self._prefetch_pool.submit(self._read_observation, None)
+
+    def _collect_prefetch(self):
+        future = self._prefetch_future
+        if future is None:
+            return None, False
+        self._prefetch_future = None
+        fresh = not future.done()
+        try:
+            return future.result(), fresh
+        except Exception:
+            # Fall back to a synchronous read; a dead connection will surface there.
+            return None, False
+
+    def action_masks(self):
+        # Factorized mask for MultiDiscrete([4, cols, rows]) policies (e.g. sb3-contrib MaskablePPO).
+        cols, rows = self.action_grid or (self.width, self.height)
+        mask = self._last_mask
+        if mask is None or not mask.any():
+            return np.ones(4 + cols + rows, dtype=bool)
+        return np.concatenate([np.ones(4, dtype=bool), mask.any(axis=0), mask.any(axis=1)])
+
+    def get_metrics(self):
+        if self._metrics is None:
+            return None
+        return self._metrics.snapshot()
 
-        self._last_obs = obs
-        if self.render_mode == "human":
-            self.render()
-
-        reward, reward_info = self._compute_reward(self._prev_state, state, action_type)
-        self._prev_state = state
-        terminated = False
-        self._step_count += 1
-        truncated = self._step_count >= self.episode_length
-        info = {"step_count": self._step_count}
-        info.update(reward_info)
-        if self.auto_calibrate_tick and self.calibrate_every > 0:
-            if self._step_count % self.calibrate_every == 0:
-                self._calibrate_tick_divisor()
-        return obs, reward, terminated, truncated, info
+    def profile(self, duration_s=30.0, out_dir=None):
+        # Keep stepping as usual; the capture ends by itself. session.wait() returns the report.
+        metrics = self.get_metrics if self._metrics is not None else None
+        if self._launcher is not None:
+            return self._launcher.profile(duration_s, out_dir=out_dir, metrics=metrics)
+        # Leased or external instances: their JVMs belong to another process, so Python only.
+        return ProfileSession(out_dir or default_profile_dir("."), duration_s=duration_s, metrics=metrics).start()
 
     def render(self):
         if self.render_mode == "human":
@@ -218,7 +562,7 @@ class RLScapeEnv(gym.Env):
                 self._pygame = pygame
                 pygame.init()
                 self._clock = pygame.time.Clock()
-            frame = self._last_obs
+            frame = self._hwc(self._last_obs)
             h, w, _ = frame.shape
             if self._screen is None:
                 self._screen = self._pygame.display.set_mode((w * self.render_scale, h * self.render_scale))
@@ -231,16 +575,37 @@ class RLScapeEnv(gym.Env):
             self._pygame.event.pump()
             self._clock.tick(self.render_fps)
             return None
-        return self._last_obs
+        if self._last_obs is None:
+            return None
+        return self._hwc(self._last_obs)
 
     def close(self):
+        self._collect_prefetch()
+        if self._prefetch_pool is not None:
+            self._prefetch_pool.shutdown(wait=False)
+            self._prefetch_pool = None
+        if self._metrics is not None and self._metrics.prom_path is not None:
+            try:
+                self._metrics.write_prometheus(self._metrics.prom_path)
+            except OSError:
+                pass
         if self._connected:
             try:
                 self._client.close()
             finally:
                 self._connected = False
+        if self._control is not None:
+            self._control.close()
         if self._launcher is not None:
             self._launcher.stop()
+        if self._pool is not None:
+            try:
+                self._pool.release(self._lease["lease"])
+            finally:
+                self._pool.close()
+                self._pool = None
+        if self._publisher is not None:
+            self._publisher.close()
         if self._pygame is not None:
             self._pygame.quit()
             self._pygame = None
@@ -248,10 +613,17 @@ class RLScapeEnv(gym.Env):
             self._clock = None
 
     def _read_frame(self, step=False):
-        if step:
+        bytes_before = self._client.bytes_received
+        if step and self.stepped:
+            width, height, channels, data = self._client.advance(self._advance_cycles)
+        elif step:
             width, height, channels, data = self._client.step()
         else:
             width, height, channels, data = self._client.frame()
+        if self._metrics is not None:
+            self._metrics.observe("tick_wait", self._client.last_wait_s)
+            self._metrics.observe("frame_transfer", self._client.last_transfer_s)
+            self._metrics.incr("bytes_received", self._client.bytes_received - bytes_before)
 
         if channels != 3:
             raise RuntimeError(f"Unexpected channels: {channels}")
@@ -261,15 +633,72 @@ class RLScapeEnv(gym.Env):
             if self.resize is None:
                 self.width = width
                 self.height = height
+            self._build_action_lut()
 
+        t0 = time.perf_counter()
         arr = np.frombuffer(data, dtype=np.uint8)
         arr = arr.reshape((height, width, 3))
-        if self.resize is None:
+        t0 = self._observe("decode", t0)
+        if self.resize is None and self.layout == "hwc":
             return arr
-        return self._resize_nearest(arr, self.width, self.height)
+        # One np.take through a precomputed flat index resizes (and, for CHW, transposes) in a
+        # single pass and returns a contiguous array.
+        arr = np.take(arr.reshape(-1), self._gather_index(height, width))
+        self._observe("resize", t0)
+        return arr
+
+    def _obs_shape(self):
+        if self.layout == "chw":
+            return (3, self.height, self.width)
+        return (self.height, self.width, 3)
+
+    def _gather_index(self, height, width):
+        # Nearest-neighbour source offset of every observation byte, rebuilt when a size changes.
+        key = (height, width, self.height, self.width)
+        if self._gather is None or self._gather[0] != key:
+            ys = np.linspace(0, height - 1, self.height).astype(np.intp)
+            xs = np.linspace(0, width - 1, self.width).astype(np.intp)
+            pixel = ys[:, None] * (width * 3) + xs[None, :] * 3
+            channels = np.arange(3, dtype=np.intp)
+            if self.layout == "chw":
+                index = pixel[None, :, :] + channels[:, None, None]
+            else:
+                index = pixel[:, :, None] + channels
+            self._gather = (key, index)
+        return self._gather[1]
+
+    def _hwc(self, obs):
+        # Viewers and render() want HWC; for CHW this is a view, not a copy.
+        if self.layout == "chw":
+            return obs.transpose(1, 2, 0)
+        return obs
 
     def _read_state(self):
-        return self._client.state()
+        t0 = time.perf_counter()
+        state = self._client.state()
+        self._observe("state_parse", t0)
+        return state
+
+    def _read_click_mask(self):
+        t0 = time.perf_counter()
+        cols, rows = self.action_grid
+        raw = self._client.click_mask(cols, rows)
+        if raw is None:
+            # The client stalled for a moment; keep the last mask, or allow every cell.
+            mask = self._last_mask if self._last_mask is not None else np.ones((rows, cols), dtype=bool)
+            self._observe("mask", t0)
+            return mask
+        bits = np.frombuffer(raw, dtype=np.uint8)
+        mask = np.unpackbits(bits)[: cols * rows].reshape(rows, cols).astype(bool)
+        self._last_mask = mask
+        self._observe("mask", t0)
+        return mask
+
+    def _observe(self, phase, t0):
+        t1 = time.perf_counter()
+        if self._metrics is not None:
+            self._metrics.observe(phase, t1 - t0)
+        return t1
 
     def _wait_for_ready(self, poll_s=0.1, timeout_s=60.0):
         start = time.time()
@@ -284,13 +713,13 @@ class RLScapeEnv(gym.Env):
             if elapsed - last_print >= 5.0:
                 print("[startup] waiting for READY...", flush=True)
                 last_print = elapsed
-            time.sleep(poll_s)
+            self._idle(poll_s)
 
     def _wait_for_stable_state(self, stable_reads_required=3, poll_s=0.1):
         stable_reads = 0
         last = self._read_state()
         while stable_reads < stable_reads_required:
-            time.sleep(poll_s)
+            self._idle(poll_s)
             current = self._read_state()
             if current["total_xp"] == last["total_xp"] and current["total_levels"] == last["total_levels"]:
                 stable_reads += 1
@@ -300,6 +729,13 @@ class RLScapeEnv(gym.Env):
                 last = current
         return last
 
+    def _idle(self, seconds):
+        # A stepped client only moves when told to, so waiting means advancing it.
+        if self.stepped:
+            self._client.advance(max(1, int(round(seconds / CLIENT_CYCLE_S))))
+        else:
+            time.sleep(seconds)
+
     def _calibrate_tick_divisor(self):
         if not self.sync_to_tick:
             return
@@ -325,14 +761,7 @@ class RLScapeEnv(gym.Env):
             return float(self.target_tick_seconds)
         if self._launcher is None:
             return 0.6
-        try:
-            config_path = os.path.join(self._launcher.server_dir, self._launcher.server_config)
-            with open(config_path, "r", encoding="utf-8") as f:
-                data = __import__("json").load(f)
-            cycle_ms = float(data.get("cycle_time_ms", 600.0))
-            return max(0.01, cycle_ms / 1000.0)
-        except Exception:
-            return 0.6
+        return max(0.01, self._launcher.server_cycle_time_ms() / 1000.0)
 
     def _compute_reward(self, prev_state, state, action_type):
         if prev_state is None or state is None:
@@ -342,28 +771,33 @@ class RLScapeEnv(gym.Env):
         reward_xp = xp_delta * self.reward_xp_scale
         reward_level = level_delta * self.reward_level_bonus
         reward = reward_xp + reward_level
+        skill = state.get("skill_index", -1)
+        skill_delta = state.get("skill_delta", 0)
         info = {
             "reward_xp": reward_xp,
             "reward_level": reward_level,
             "total_xp": state["total_xp"],
             "total_levels": state["total_levels"],
-            "skill_index": state.get("skill_index", -1),
-            "skill_delta": state.get("skill_delta", 0),
+            "skill_index": skill,
+            "skill_delta": skill_delta,
+            "skill_xp": {skill: skill_delta} if xp_delta > 0 and skill >= 0 and skill_delta > 0 else {},
         }
         return reward, info
 
+    def _build_action_lut(self):
+        # Precomputed action index -> raw client coordinate tables (grid cell centers in grid mode).
+        if self.action_grid is not None:
+            cols, rows = self.action_grid
+            xs = (np.arange(cols) + 0.5) * self.raw_width / cols
+            ys = (np.arange(rows) + 0.5) * self.raw_height / rows
+        else:
+            xs = np.arange(self.width) * self.raw_width / max(1, self.width)
+            ys = np.arange(self.height) * self.raw_height / max(1, self.height)
+        self._raw_x = np.clip(xs.astype(np.int64), 0, self.raw_width - 1).tolist()
+        self._raw_y = np.clip(ys.astype(np.int64), 0, self.raw_height - 1).tolist()
+
     def _to_raw_coords(self, x, y):
-        if self.resize is None:
-            return x, y
-        x_raw = int(x * self.raw_width / max(1, self.width))
-        y_raw = int(y * self.raw_height / max(1, self.height))
-        x_raw = max(0, min(self.raw_width - 1, x_raw))
-        y_raw = max(0, min(self.raw_height - 1, y_raw))
-        return x_raw, y_raw
-
-    @staticmethod
-    def _resize_nearest(img, out_w, out_h):
-        h, w, _ = img.shape
-        ys = (np.linspace(0, h - 1, out_h)).astype(np.int32)
-        xs = (np.linspace(0, w - 1, out_w)).astype(np.int32)
-        return img[ys][:, xs]
+        x = min(max(x, 0), len(self._raw_x) - 1)
+        y = min(max(y, 0), len(self._raw_y) - 1)
+        return self._raw_x[x], self._raw_y[y]
+
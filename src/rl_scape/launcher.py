@@ -1,8 +1,14 @@
 import json
 import os
+import socket
 import subprocess
 import time
 
+from .accounts import AccountPool
+from .control import CycleController
+from .profiling import ProfileSession, default_profile_dir
+from .resources import affinity_prefix, jvm_args, pin_process, plan_affinity, process_rss_kb
+
 
 def _env_or(default, key):
     value = os.environ.get(key)
@@ -37,6 +43,39 @@ class RLScapeLauncher:
         tune_cycle_times=None,
         tune_timeout_s=8.0,
         tune_avg_ratio=0.9,
+        render_on_demand=False,
+        lockstep=False,
+        control_port=43610,
+        lockstep_timeout_ms=60000,
+        stepped=False,
+        max_restarts=5,
+        restart_window_s=600.0,
+        restart_backoff_s=1.0,
+        restart_backoff_max_s=30.0,
+        jvm_profile="default",
+        server_jvm_args=None,
+        client_jvm_args=None,
+        pin_cpus=False,
+        instance=0,
+        server_cores=1,
+        client_cores=1,
+        launch_server=True,
+        launch_client=True,
+        build=True,
+        sessions=1,
+        session_stagger_ms=2000,
+        cycle_time_ms=None,
+        world=1,
+        http_port=None,
+        jaggrab_port=None,
+        characters_dir=None,
+        run_dir=None,
+        account_template=None,
+        account_overrides=None,
+        mass_save="async",
+        adaptive_cycle=False,
+        cycle_bounds_ms=None,
+        telemetry_every=10,
     ):
         default_server, default_client, default_java = _default_paths()
         self.server_dir = _env_or(server_dir or default_server, "RL_SCAPE_SERVER_DIR")
@@ -53,6 +92,53 @@ class RLScapeLauncher:
         self.tune_cycle_times = tune_cycle_times
         self.tune_timeout_s = float(tune_timeout_s)
         self.tune_avg_ratio = float(tune_avg_ratio)
+        self.render_on_demand = render_on_demand
+        self.lockstep = lockstep
+        self.control_port = int(control_port)
+        self.lockstep_timeout_ms = int(lockstep_timeout_ms)
+        self.stepped = stepped
+        self.max_restarts = int(max_restarts)
+        self.restart_window_s = float(restart_window_s)
+        self.restart_backoff_s = float(restart_backoff_s)
+        self.restart_backoff_max_s = float(restart_backoff_max_s)
+        self._restarts = {"server": [], "client": []}
+        self.server_jvm_args = jvm_args(jvm_profile, "server") + list(server_jvm_args or [])
+        self.client_jvm_args = jvm_args(jvm_profile, "client") + list(client_jvm_args or [])
+        self.launch_server = launch_server
+        self.launch_client = launch_client
+        self.build = build
+        # Per-server settings go into a generated config under run_dir; the base config is only read.
+        self.cycle_time_ms = None if cycle_time_ms is None else int(cycle_time_ms)
+        self.world = int(world)
+        self.http_port = http_port
+        self.jaggrab_port = jaggrab_port
+        self.characters_dir = characters_dir
+        self.run_dir = run_dir or os.path.join(
+            self.server_dir, "data", "rl_runs", f"world{self.world}-control{self.control_port}"
+        )
+        # Template character file every account launched here starts from.
+        self.account_template = account_template
+        self.account_overrides = account_overrides
+        self.account_reset_dir = os.path.join(self.run_dir, "account_resets")
+        self._accounts_queued = False
+        if mass_save not in ("sync", "async", "off"):
+            raise ValueError(f"mass_save must be 'sync', 'async' or 'off', got {mass_save!r}")
+        self.mass_save = mass_save
+        # Online tuning: follow the server's tick telemetry and move cycle_time_ms while it runs.
+        self.adaptive_cycle = adaptive_cycle
+        self.cycle_bounds_ms = cycle_bounds_ms
+        self.telemetry_every = int(telemetry_every)
+        if self.adaptive_cycle and self.telemetry_every < 1:
+            raise ValueError("adaptive_cycle needs telemetry_every of at least 1")
+        self._cycle_controller = None
+        self.sessions = int(sessions)
+        self.session_stagger_ms = int(session_stagger_ms)
+        if self.sessions < 1:
+            raise ValueError("sessions must be at least 1")
+        self.server_cpus = None
+        self.client_cpus = None
+        if pin_cpus:
+            self.server_cpus, self.client_cpus = plan_affinity(int(instance), int(server_cores), int(client_cores))
         self._server_proc = None
         self._client_proc = None
         self._built_modules = set()
@@ -73,16 +159,15 @@ class RLScapeLauncher:
         self._build("2006Scape Server")
         cmd = [
             "java",
+            *self.server_jvm_args,
             "-jar",
             "target/server-1.0-jar-with-dependencies.jar",
             "-c",
-            self.server_config,
+            self._write_overlay(),
         ]
-        self._server_proc = subprocess.Popen(
-            cmd,
-            cwd=self.server_dir,
-            env=self._env(),
-        )
+        if self.server_cpus:
+            print(f"[rl-scape] pinning server to cpus {self.server_cpus}")
+        self._server_proc = self._popen_pinned(cmd, self.server_dir, self.server_cpus)
         time.sleep(2.0)
 
     def start_client(self):
@@ -91,29 +176,129 @@ class RLScapeLauncher:
         if not os.path.isdir(self.client_dir):
             raise FileNotFoundError(f"Client dir not found: {self.client_dir}")
         self._build("2006Scape Client")
-        cmd = [
-            "java",
-            "-jar",
-            "target/client-1.0-jar-with-dependencies.jar",
-            "-rl",
-            "-rl-port",
-            str(self.port),
-        ]
+        jar = "target/client-1.0-jar-with-dependencies.jar"
+        if self.sessions > 1:
+            # One JVM hosting several clients; session i uses port + i and username + i.
+            cmd = [
+                "java",
+                *self.client_jvm_args,
+                "-cp",
+                jar,
+                "RLSessionHost",
+                "-sessions",
+                str(self.sessions),
+                "-session-stagger-ms",
+                str(self.session_stagger_ms),
+            ]
+        else:
+            cmd = ["java", *self.client_jvm_args, "-jar", jar, "-rl"]
+        cmd += ["-rl-port", str(self.port)]
         if self.headless:
             cmd.append("-headless")
+        if self.render_on_demand:
+            cmd.append("-rl-render-on-demand")
+        if self.stepped:
+            cmd.append("-rl-stepped")
         if self.local:
             cmd.append("-local")
+        if self.world != 1:
+            cmd += ["-w", str(self.world)]
         cmd += ["-u", self.username, "-p", self.password]
         print(f"[rl-scape] launching client: cwd={self.client_dir} cmd={' '.join(cmd)}")
-        self._client_proc = subprocess.Popen(
-            cmd,
-            cwd=self.client_dir,
-            env=self._env(),
-        )
+        if self.client_cpus:
+            print(f"[rl-scape] pinning client to cpus {self.client_cpus}")
+        self._client_proc = self._popen_pinned(cmd, self.client_dir, self.client_cpus)
         time.sleep(2.0)
 
+    def _popen_pinned(self, cmd, cwd, cpus):
+        prefix = affinity_prefix(cpus)
+        proc = subprocess.Popen(prefix + cmd, cwd=cwd, env=self._env())
+        if cpus and not prefix:
+            pin_process(proc.pid, cpus)
+        return proc
+
+    def rss_kb(self):
+        return {
+            "server": process_rss_kb(self._server_proc.pid) if self._server_proc is not None else None,
+            "client": process_rss_kb(self._client_proc.pid) if self._client_proc is not None else None,
+        }
+
+    def poll(self):
+        # Names of the managed processes that have exited.
+        dead = []
+        if self._server_proc is not None and self._server_proc.poll() is not None:
+            dead.append("server")
+        if self._client_proc is not None and self._client_proc.poll() is not None:
+            dead.append("client")
+        return dead
+
+    def session_endpoints(self):
+        # (port, username) of every client session this launcher starts.
+        if self.sessions == 1:
+            return [(self.port, self.username)]
+        return [(self.port + i, f"{self.username}{i}") for i in range(self.sessions)]
+
+    def ping_client(self, timeout_s=2.0, port=None):
+        # The bridge serves one connection at a time, so the env must have closed its own first.
+        try:
+            with socket.create_connection(("127.0.0.1", port or self.port), timeout=timeout_s) as sock:
+                sock.sendall(b"PING\n")
+                reply = sock.makefile("rb").readline().strip()
+                sock.sendall(b"QUIT\n")
+            return reply == b"PONG"
+        except OSError:
+            return False
+
+    def check_health(self):
+        failed = self.poll()
+        if self._client_proc is not None and "client" not in failed:
+            # A session host is one process, so any unresponsive session restarts all of them.
+            if not all(self.ping_client(port=port) for port, _ in self.session_endpoints()):
+                failed.append("client")
+        return failed
+
+    def restart(self, names):
+        for name in names:
+            now = time.time()
+            history = [t for t in self._restarts[name] if now - t < self.restart_window_s]
+            if len(history) >= self.max_restarts:
+                raise RuntimeError(
+                    f"{name} failed {len(history)} times in {self.restart_window_s:.0f}s, not restarting again"
+                )
+            delay = min(self.restart_backoff_max_s, self.restart_backoff_s * (2 ** len(history)))
+            print(f"[rl-scape] {name} is down, restarting in {delay:.1f}s")
+            time.sleep(delay)
+            history.append(time.time())
+            self._restarts[name] = history
+            if name == "server":
+                self._stop_process(self._server_proc)
+                self._server_proc = None
+                self.start_server()
+            else:
+                self._stop_process(self._client_proc)
+                self._client_proc = None
+                self.start_client()
+
+    def recover(self):
+        failed = self.check_health()
+        if failed:
+            self.restart(failed)
+        return failed
+
+    def _stop_process(self, proc):
+        if proc is None:
+            return
+        try:
+            proc.terminate()
+            proc.wait(timeout=5)
+        except Exception:
+            try:
+                proc.kill()
+            except Exception:
+                pass
+
     def _build(self, module_name):
-        if module_name in self._built_modules:
+        if not self.build or module_name in self._built_modules:
             return
         if not self.mvn_path or not os.path.isfile(self.mvn_path):
             raise FileNotFoundError(f"Maven not found: {self.mvn_path}")
@@ -127,28 +312,80 @@ class RLScapeLauncher:
         subprocess.run(cmd, cwd=os.path.dirname(self.server_dir), env=self._env(), check=True)
         self._built_modules.add(module_name)
 
-    def _config_path(self):
+    def _base_config_path(self):
         return os.path.join(self.server_dir, self.server_config)
 
-    def _load_config(self):
-        path = self._config_path()
+    def _load_base_config(self):
+        path = self._base_config_path()
+        if not os.path.isfile(path):
+            return {}
         with open(path, "r", encoding="utf-8") as f:
             return json.load(f)
 
-    def _write_config(self, data):
-        path = self._config_path()
-        with open(path, "w", encoding="utf-8") as f:
+    def overlay_path(self):
+        return os.path.join(self.run_dir, "ServerConfig.json")
+
+    def _write_overlay(self):
+        # Base config plus this instance's settings, written where only this launcher looks.
+        data = self._load_base_config()
+        if self.cycle_time_ms is not None:
+            data["cycle_time_ms"] = self.cycle_time_ms
+        data["rl_lockstep"] = bool(self.lockstep)
+        data["rl_control_port"] = self.control_port
+        data["rl_lockstep_timeout_ms"] = self.lockstep_timeout_ms
+        data["rl_tick_report_file"] = self._tick_stats_path()
+        if self.world != 1:
+            data["world_id"] = self.world
+        if self.http_port is not None:
+            data["http_port"] = int(self.http_port)
+        if self.jaggrab_port is not None:
+            data["jaggrab_port"] = int(self.jaggrab_port)
+        if self.characters_dir is not None:
+            data["characters_dir"] = os.path.abspath(self.characters_dir)
+        data["rl_account_reset_dir"] = os.path.abspath(self.account_reset_dir)
+        data["rl_mass_save"] = self.mass_save
+        data["rl_telemetry_every"] = self.telemetry_every
+        os.makedirs(self.run_dir, exist_ok=True)
+        path = self.overlay_path()
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
             json.dump(data, f, indent=2, sort_keys=False)
+        os.replace(tmp, path)
+        return path
+
+    def reset_accounts(self):
+        # Queue a template copy for every username this launcher logs in; applied at next login.
+        if not self.account_template:
+            return []
+        accounts = AccountPool(
+            self.account_template,
+            self.account_reset_dir,
+            password=self.password,
+            overrides=self.account_overrides,
+        )
+        return [accounts.reset(username) for _, username in self.session_endpoints()]
 
-    def _set_cycle_time_ms(self, ms):
-        data = self._load_config()
-        data["cycle_time_ms"] = int(ms)
-        self._write_config(data)
+    def reset_character(self):
+        # Back to the template now: queue the reset and log in again so the server applies it.
+        if self.reset_accounts():
+            self.relog()
+
+    def relog(self):
+        # New client process, so the server runs a fresh login (and applies any queued reset).
+        self._stop_process(self._client_proc)
+        self._client_proc = None
+        self.start_client()
+
+    def server_cycle_time_ms(self):
+        if self.cycle_time_ms is not None:
+            return self.cycle_time_ms
+        try:
+            return int(self._load_base_config().get("cycle_time_ms", 600))
+        except (OSError, ValueError):
+            return 600
 
     def _tick_stats_path(self):
-        data = self._load_config()
-        rel = data.get("rl_tick_report_file", "data/rl_tick.json")
-        return os.path.join(self.server_dir, rel)
+        return os.path.abspath(os.path.join(self.run_dir, "rl_tick.json"))
 
     def _read_tick_stats(self):
         path = self._tick_stats_path()
@@ -178,7 +415,12 @@ class RLScapeLauncher:
         chosen = None
         for ms in candidates:
             print(f"[rl-scape] testing cycle_time_ms={ms}")
-            self._set_cycle_time_ms(ms)
+            self.cycle_time_ms = ms
+            try:
+                # Stats left by the previous candidate must not count for this one.
+                os.remove(self._tick_stats_path())
+            except FileNotFoundError:
+                pass
             self.start_server()
             stats = self._wait_for_tick_stats(self.tune_timeout_s)
             self.stop()
@@ -195,15 +437,68 @@ class RLScapeLauncher:
         if chosen is None:
             chosen = candidates[-1]
             print(f"[rl-scape] falling back to {chosen}ms")
-        self._set_cycle_time_ms(chosen)
+        self.cycle_time_ms = chosen
         self._auto_tuned = True
 
     def start(self):
-        self._auto_tune_cycle_time()
-        self.start_server()
-        self.start_client()
+        if self.launch_server:
+            if not self.lockstep and self.cycle_time_ms is None:
+                # In lockstep the tick rate follows the agents, so there is no period to tune.
+                self._auto_tune_cycle_time()
+            self.start_server()
+            if self.adaptive_cycle and not self.lockstep:
+                self.start_cycle_controller()
+        if self.launch_client:
+            if not self._accounts_queued:
+                # Only the first login starts from the template; later resets are explicit
+                # (reset_character), since a queued reset waits for whatever login comes next.
+                self.reset_accounts()
+                self._accounts_queued = True
+            self.start_client()
+
+    def start_cycle_controller(self):
+        if self._cycle_controller is not None:
+            return self._cycle_controller
+        candidates = self.tune_cycle_times or [60, 80, 100, 120, 150, 200, 300, 400, 600]
+        low, high = self.cycle_bounds_ms or (min(candidates), max(candidates))
+
+        def _changed(ms):
+            # A restarted server comes back at the current period, not the startup one.
+            self.cycle_time_ms = ms
+
+        self._cycle_controller = CycleController(
+            port=self.control_port,
+            min_ms=low,
+            max_ms=high,
+            avg_ratio=self.tune_avg_ratio,
+            on_change=_changed,
+        ).start()
+        return self._cycle_controller
+
+    def profile(self, duration_s=30.0, out_dir=None, metrics=None):
+        # JFR on whichever JVMs this launcher started, plus the Python sampler; returns at once.
+        pids = {}
+        for name, proc in (("server", self._server_proc), ("client", self._client_proc)):
+            if proc is not None and proc.poll() is None:
+                pids[name] = proc.pid
+        return ProfileSession(
+            out_dir or default_profile_dir(self.run_dir),
+            duration_s=duration_s,
+            jvms=pids,
+            java_home=self.java_home,
+            metrics=metrics,
+        ).start()
+
+    def tick_stats(self):
+        # Latest telemetry window seen by the cycle controller, or None.
+        if self._cycle_controller is None:
+            return None
+        return self._cycle_controller.last_stats
 
     def stop(self):
+        if self._cycle_controller is not None:
+            self._cycle_controller.stop()
+            self._cycle_controller = None
         for proc in (self._client_proc, self._server_proc):
             if proc is None:
                 continue
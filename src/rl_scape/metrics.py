@@ -0,0 +1,438 @@
+import bisect
+import csv
+import os
+import queue
+import random
+import threading
+import time
+
+import numpy as np
+
+
+STEP_PHASES = (
+    "action_send",
+    "tick_wait",
+    "frame_transfer",
+    "decode",
+    "resize",
+    "state_parse",
+    "reward",
+    "render",
+)
+
+# Exponential bucket bounds in seconds: 25us .. ~13s.
+DEFAULT_BUCKETS = tuple(25e-6 * (2 ** i) for i in range(20))
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, q):
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank and n:
+                if i >= len(self.buckets):
+                    return self.max
+                return min(self.buckets[i], self.max)
+        return self.max
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean": self.mean(),
+            "p50": self.percentile(0.5),
+            "p90": self.percentile(0.9),
+            "p99": self.percentile(0.99),
+            "max": self.max,
+        }
+
+
+class StepMetrics:
+    # The prefetch worker records its reads while the env thread (or a profiler) may snapshot,
+    # so every access to phases/counters/last goes through one lock.
+
+    def __init__(self, labels=None, prom_path=None, prom_every_s=10.0):
+        self.labels = dict(labels or {})
+        self.prom_path = prom_path
+        self.prom_every_s = float(prom_every_s)
+        self.phases = {}
+        self.counters = {"bytes_received": 0, "extra_frames": 0, "steps": 0, "resets": 0}
+        self.last = {}
+        self._last_dump = time.time()
+        self._lock = threading.Lock()
+
+    def begin(self):
+        with self._lock:
+            self.last = {}
+
+    def observe(self, phase, seconds):
+        with self._lock:
+            hist = self.phases.get(phase)
+            if hist is None:
+                hist = self.phases[phase] = Histogram()
+            hist.observe(seconds)
+            self.last[phase] = self.last.get(phase, 0.0) + seconds
+
+    def incr(self, name, amount=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def last_timings(self):
+        with self._lock:
+            return dict(self.last)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "phases": {name: hist.summary() for name, hist in self.phases.items()},
+                "counters": dict(self.counters),
+            }
+
+    def maybe_dump(self):
+        if self.prom_path is None:
+            return
+        now = time.time()
+        if now - self._last_dump < self.prom_every_s:
+            return
+        self._last_dump = now
+        self.write_prometheus(self.prom_path)
+
+    def write_prometheus(self, path):
+        label_str = ",".join(f'{k}="{v}"' for k, v in sorted(self.labels.items()))
+        prefix = label_str + "," if label_str else ""
+        lines = [
+            "# HELP rlscape_phase_seconds Time spent per env phase.",
+            "# TYPE rlscape_phase_seconds histogram",
+        ]
+        with self._lock:
+            self._prometheus_lines(lines, prefix, label_str)
+        tmp = f"{path}.tmp"
+        parent = os.path.dirname(path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp, path)
+
+    def _prometheus_lines(self, lines, prefix, label_str):
+        for name, hist in sorted(self.phases.items()):
+            cumulative = 0
+            for bound, n in zip(hist.buckets, hist.counts):
+                cumulative += n
+                lines.append(f'rlscape_phase_seconds_bucket{{{prefix}phase="{name}",le="{bound:.6g}"}} {cumulative}')
+            lines.append(f'rlscape_phase_seconds_bucket{{{prefix}phase="{name}",le="+Inf"}} {hist.count}')
+            lines.append(f'rlscape_phase_seconds_sum{{{prefix}phase="{name}"}} {hist.total:.9f}')
+            lines.append(f'rlscape_phase_seconds_count{{{prefix}phase="{name}"}} {hist.count}')
+        for name, value in sorted(self.counters.items()):
+            lines.append(f"# TYPE rlscape_{name}_total counter")
+            lines.append(f"rlscape_{name}_total{{{label_str}}} {value}")
+
+
+SKILL_NAMES = (
+    "Attack",
+    "Defence",
+    "Strength",
+    "Hitpoints",
+    "Ranged",
+    "Prayer",
+    "Magic",
+    "Cooking",
+    "Woodcutting",
+    "Fletching",
+    "Fishing",
+    "Firemaking",
+    "Crafting",
+    "Smithing",
+    "Mining",
+    "Herblore",
+    "Agility",
+    "Thieving",
+    "Slayer",
+    "Farming",
+    "Runecrafting",
+)
+
+
+class RunningStats:
+    # Streaming mean/std (Welford) plus a fixed-size reservoir sample for percentiles,
+    # so memory stays constant however many values are observed.
+
+    def __init__(self, reservoir=1024, seed=0):
+        self.reservoir_size = int(reservoir)
+        self._rng = random.Random(seed)
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = None
+        self.max = None
+        self._sample = []
+
+    def observe(self, value):
+        value = float(value)
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        if len(self._sample) < self.reservoir_size:
+            self._sample.append(value)
+        else:
+            j = self._rng.randrange(self.count)
+            if j < self.reservoir_size:
+                self._sample[j] = value
+
+    def observe_many(self, values):
+        for value in np.asarray(values, dtype=np.float64).ravel():
+            self.observe(value)
+
+    def std(self):
+        return (self._m2 / self.count) ** 0.5 if self.count > 1 else 0.0
+
+    def percentile(self, q):
+        if not self._sample:
+            return 0.0
+        return float(np.percentile(self._sample, q * 100.0))
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean": self.mean,
+            "std": self.std(),
+            "p50": self.percentile(0.5),
+            "p90": self.percentile(0.9),
+            "p99": self.percentile(0.99),
+            "min": self.min if self.min is not None else 0.0,
+            "max": self.max if self.max is not None else 0.0,
+        }
+
+
+# Two-sided 95% Student t critical values by degrees of freedom; 1.96 beyond the table.
+_T95 = (12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228, 2.201, 2.179, 2.160, 2.145, 2.131,
+        2.120, 2.110, 2.101, 2.093, 2.086, 2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042)
+
+
+def mean_ci95(values):
+    # Mean with a t-based 95% confidence interval (assumes roughly independent samples).
+    values = np.asarray(values, dtype=np.float64).ravel()
+    n = len(values)
+    if n == 0:
+        return {"n": 0, "mean": 0.0, "std": 0.0, "ci95_low": 0.0, "ci95_high": 0.0, "min": 0.0, "max": 0.0}
+    mean = float(values.mean())
+    std = float(values.std(ddof=1)) if n > 1 else 0.0
+    t = _T95[n - 2] if 1 < n <= len(_T95) + 1 else 1.96
+    half = t * std / n ** 0.5 if n > 1 else 0.0
+    return {
+        "n": n,
+        "mean": mean,
+        "std": std,
+        "ci95_low": mean - half,
+        "ci95_high": mean + half,
+        "min": float(values.min()),
+        "max": float(values.max()),
+    }
+
+
+TRAINING_FIELDS = (
+    "timesteps",
+    "avg_reward",
+    "reward_p50",
+    "reward_p99",
+    "reward_steps",
+    "episodes",
+    "ep_return_mean",
+    "ep_return_p50",
+    "ep_length_mean",
+    "steps_per_s",
+) + tuple(f"xp_total_{name.lower()}" for name in SKILL_NAMES)
+
+
+class TrainingMetrics:
+    # Interval aggregates (reset by row()) and run totals for a training loop. The reward and
+    # episode stats and steps_per_s cover the interval; timesteps, reward_steps, episodes and
+    # the xp_total_* columns (skill_xp_total) count from the start of the run.
+
+    def __init__(self, reservoir=1024):
+        self.total_steps = 0
+        self.reward_steps = 0
+        self.episodes = 0
+        self.step_rewards = RunningStats(reservoir)
+        self.episode_returns = RunningStats(reservoir)
+        self.episode_lengths = RunningStats(reservoir)
+        self.skill_xp_total = [0] * len(SKILL_NAMES)
+        self._ep_return = None
+        self._ep_length = None
+        self._interval_start = time.time()
+        self._interval_steps = 0
+
+    def record(self, rewards, dones=None, infos=None):
+        rewards = np.asarray(rewards, dtype=np.float64).ravel()
+        n = len(rewards)
+        self.total_steps += n
+        self._interval_steps += n
+        self.reward_steps += int((rewards > 0).sum())
+        self.step_rewards.observe_many(rewards)
+        if dones is not None:
+            if self._ep_return is None or len(self._ep_return) != n:
+                self._ep_return = np.zeros(n)
+                self._ep_length = np.zeros(n, dtype=np.int64)
+            self._ep_return += rewards
+            self._ep_length += 1
+            for i in np.flatnonzero(np.asarray(dones)):
+                self.record_episode(self._ep_return[i], self._ep_length[i])
+                self._ep_return[i] = 0.0
+                self._ep_length[i] = 0
+        for info in infos or ():
+            for skill, delta in info.get("skill_xp", {}).items():
+                if 0 <= int(skill) < len(self.skill_xp_total):
+                    self.skill_xp_total[int(skill)] += int(delta)
+
+    def record_episode(self, episode_return, length):
+        self.episodes += 1
+        self.episode_returns.observe(episode_return)
+        self.episode_lengths.observe(length)
+
+    def row(self):
+        now = time.time()
+        elapsed = max(1e-9, now - self._interval_start)
+        row = {
+            "timesteps": self.total_steps,
+            "avg_reward": self.step_rewards.mean,
+            "reward_p50": self.step_rewards.percentile(0.5),
+            "reward_p99": self.step_rewards.percentile(0.99),
+            "reward_steps": self.reward_steps,
+            "episodes": self.episodes,
+            "ep_return_mean": self.episode_returns.mean,
+            "ep_return_p50": self.episode_returns.percentile(0.5),
+            "ep_length_mean": self.episode_lengths.mean,
+            "steps_per_s": self._interval_steps / elapsed,
+        }
+        for name, xp in zip(SKILL_NAMES, self.skill_xp_total):
+            row[f"xp_total_{name.lower()}"] = xp
+        self.step_rewards.reset()
+        self.episode_returns.reset()
+        self.episode_lengths.reset()
+        self._interval_start = now
+        self._interval_steps = 0
+        return row
+
+
+class BackgroundCsvWriter:
+    # The training loop only enqueues rows. A daemon thread keeps the CSV open, flushes it
+    # every flush_every_s and redraws the plot every plot_every_s when new rows arrived.
+
+    _CLOSE = object()
+
+    def __init__(
+        self,
+        path,
+        fieldnames,
+        flush_every_s=5.0,
+        plot_path=None,
+        plot_fields=("avg_reward",),
+        plot_every_s=60.0,
+        max_queued=10000,
+    ):
+        self.path = path
+        self.fieldnames = list(fieldnames)
+        self.flush_every_s = float(flush_every_s)
+        self.plot_path = plot_path
+        self.plot_fields = tuple(plot_fields)
+        self.plot_every_s = float(plot_every_s)
+        self.dropped = 0
+        # One point per row and plotted field; rows are per logging interval, so this stays small.
+        self._series = {field: ([], []) for field in self.plot_fields}
+        self._queue = queue.Queue(maxsize=int(max_queued))
+        parent = os.path.dirname(path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="csv-writer", daemon=True)
+        self._thread.start()
+
+    def write(self, row):
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            # Never block training on the disk.
+            self.dropped += 1
+
+    def close(self, timeout_s=30.0):
+        self._queue.put(self._CLOSE)
+        self._thread.join(timeout_s)
+
+    def _run(self):
+        last_flush = last_plot = time.time()
+        dirty = False
+        with open(self.path, "w", newline="", encoding="utf-8", buffering=1 << 16) as f:
+            writer = csv.DictWriter(f, fieldnames=self.fieldnames, extrasaction="ignore")
+            writer.writeheader()
+            while True:
+                try:
+                    row = self._queue.get(timeout=self.flush_every_s)
+                except queue.Empty:
+                    row = None
+                if row is self._CLOSE:
+                    break
+                if row is not None:
+                    writer.writerow(row)
+                    for field, (xs, ys) in self._series.items():
+                        if field in row:
+                            xs.append(row.get("timesteps", len(xs)))
+                            ys.append(row[field])
+                    dirty = True
+                now = time.time()
+                if now - last_flush >= self.flush_every_s:
+                    f.flush()
+                    last_flush = now
+                if dirty and self.plot_path and now - last_plot >= self.plot_every_s:
+                    self._plot()
+                    last_plot = now
+                    dirty = False
+        if dirty and self.plot_path:
+            self._plot()
+
+    def _plot(self):
+        try:
+            # The object API does not touch pyplot's global state, so it is safe off the main thread.
+            from matplotlib.backends.backend_agg import FigureCanvasAgg
+            from matplotlib.figure import Figure
+        except ImportError:
+            return
+        if not self._series:
+            return
+        fig = Figure(figsize=(10, 3 * len(self._series)))
+        FigureCanvasAgg(fig)
+        for i, (field, (xs, ys)) in enumerate(self._series.items()):
+            ax = fig.add_subplot(len(self._series), 1, i + 1)
+            ax.plot(xs, ys, linewidth=1)
+            ax.set_ylabel(field)
+        fig.axes[-1].set_xlabel("Timesteps")
+        fig.tight_layout()
+        tmp = f"{self.plot_path}.tmp.png"
+        try:
+            fig.savefig(tmp)
+            os.replace(tmp, self.plot_path)
+        except Exception as exc:
+            print(f"[progress] plot failed ({exc})")
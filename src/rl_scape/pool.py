@@ -0,0 +1,297 @@
+import itertools
+import json
+import socket
+import threading
+import time
+
+from .accounts import AccountPool
+from .bridge import RLBridgeClient
+from .launcher import DEFAULT_PASSWORD, RLScapeLauncher
+
+
+DEFAULT_POOL_PORT = 5690
+
+
+def parse_address(address):
+    if isinstance(address, (tuple, list)):
+        return str(address[0]), int(address[1])
+    host, _, port = str(address).rpartition(":")
+    return host or "127.0.0.1", int(port or DEFAULT_POOL_PORT)
+
+
+class _Slot:
+    def __init__(self, index, launcher):
+        self.index = index
+        self.launcher = launcher
+        self.lease = None
+        self.ready = False
+        self.needs_reset = False
+
+
+class InstancePool:
+    # One server plus `size` logged-in headless clients, leased out over a JSON-lines socket.
+    # A lease belongs to the RPC connection that took it and is released if that connection drops.
+
+    def __init__(
+        self,
+        size=4,
+        host="127.0.0.1",
+        rpc_port=DEFAULT_POOL_PORT,
+        base_port=5700,
+        username_prefix="pool",
+        ready_timeout_s=120.0,
+        account_spares=2,
+        **launcher_kwargs,
+    ):
+        self.size = int(size)
+        self.host = host
+        self.rpc_port = int(rpc_port)
+        self.base_port = int(base_port)
+        self.username_prefix = username_prefix
+        self.ready_timeout_s = float(ready_timeout_s)
+        self.launcher_kwargs = dict(launcher_kwargs)
+        # With an account_template, usernames come from an AccountPool with a few spares, so a
+        # released account is reset and rests while the slot logs in with another one.
+        self.account_spares = max(0, int(account_spares))
+        self.accounts = None
+        self._cond = threading.Condition()
+        self._server = None
+        self._slots = []
+        self._lease_ids = itertools.count(1)
+        self._sock = None
+        self._stopping = False
+        self._server_lock = threading.Lock()
+
+    def start(self):
+        kwargs = dict(self.launcher_kwargs)
+        self._server = RLScapeLauncher(launch_client=False, **kwargs)
+        self._server.start()
+        # Later launchers share the already built jars.
+        kwargs.pop("pin_cpus", None)
+        kwargs.pop("instance", None)
+        # The pool owns account resets; its client launchers never queue their own.
+        template = kwargs.pop("account_template", None)
+        overrides = kwargs.pop("account_overrides", None)
+        if template:
+            self.accounts = AccountPool(
+                template,
+                self._server.account_reset_dir,
+                size=self.size + self.account_spares,
+                prefix=self.username_prefix,
+                password=DEFAULT_PASSWORD,
+                overrides=overrides,
+            )
+            self.accounts.provision()
+        for i in range(self.size):
+            username = self.accounts.lease() if self.accounts is not None else f"{self.username_prefix}{i}"
+            launcher = RLScapeLauncher(
+                port=self.base_port + i,
+                username=username,
+                launch_server=False,
+                build=i == 0,
+                pin_cpus=self.launcher_kwargs.get("pin_cpus", False),
+                instance=i,
+                **kwargs,
+            )
+            launcher.start()
+            self._slots.append(_Slot(i, launcher))
+        for slot in self._slots:
+            self._warm(slot)
+        print(f"[pool] {self.size} instances ready")
+
+    def _warm(self, slot):
+        # Restart anything that died, then wait until the client is logged in again.
+        with self._server_lock:
+            if "server" in self._server.poll():
+                self._server.restart(["server"])
+        if slot.needs_reset:
+            # Queue the used account's reset and log in with the longest-rested free account.
+            self.accounts.release(slot.launcher.username)
+            slot.launcher.username = self.accounts.lease()
+        failed = slot.launcher.check_health()
+        if failed:
+            slot.launcher.restart(failed)
+        elif slot.needs_reset:
+            slot.launcher.relog()
+        slot.needs_reset = False
+        client = RLBridgeClient(host="127.0.0.1", port=slot.launcher.port, timeout=10.0)
+        deadline = time.time() + self.ready_timeout_s
+        try:
+            while time.time() < deadline:
+                try:
+                    client.connect()
+                    if client.ready():
+                        break
+                except (OSError, RuntimeError):
+                    client.close()
+                time.sleep(0.5)
+            else:
+                raise RuntimeError(f"pool instance {slot.index} did not become ready")
+        finally:
+            client.close()
+        with self._cond:
+            slot.ready = True
+            self._cond.notify_all()
+
+    def _warm_async(self, slot):
+        def _run():
+            try:
+                self._warm(slot)
+            except Exception as err:
+                print(f"[pool] instance {slot.index} failed to warm up: {err}")
+                # Retry after a pause rather than losing the slot.
+                time.sleep(5.0)
+                if not self._stopping:
+                    self._warm_async(slot)
+
+        threading.Thread(target=_run, daemon=True).start()
+
+    def lease(self, owner, timeout_s=120.0):
+        deadline = time.time() + float(timeout_s)
+        with self._cond:
+            while True:
+                for slot in self._slots:
+                    if slot.lease is None and slot.ready:
+                        slot.lease = (next(self._lease_ids), owner)
+                        slot.ready = False
+                        return self._describe(slot)
+                left = deadline - time.time()
+                if left <= 0:
+                    raise RuntimeError("no free instance")
+                self._cond.wait(left)
+
+    def release(self, lease_id=None, owner=None):
+        released = []
+        with self._cond:
+            for slot in self._slots:
+                if slot.lease is None:
+                    continue
+                if (lease_id is not None and slot.lease[0] == lease_id) or (lease_id is None and slot.lease[1] is owner):
+                    slot.lease = None
+                    slot.needs_reset = self.accounts is not None
+                    released.append(slot)
+        for slot in released:
+            self._warm_async(slot)
+        return len(released)
+
+    def status(self):
+        with self._cond:
+            return {
+                "size": self.size,
+                "leased": sum(1 for s in self._slots if s.lease is not None),
+                "ready": sum(1 for s in self._slots if s.lease is None and s.ready),
+            }
+
+    def _describe(self, slot):
+        return {
+            "lease": slot.lease[0],
+            "host": "127.0.0.1",
+            "port": slot.launcher.port,
+            "username": slot.launcher.username,
+        }
+
+    def serve_forever(self):
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._sock.bind((self.host, self.rpc_port))
+        self._sock.listen(64)
+        print(f"[pool] listening on {self.host}:{self.rpc_port}")
+        try:
+            while not self._stopping:
+                try:
+                    conn, _ = self._sock.accept()
+                except OSError:
+                    break
+                threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+        finally:
+            self._sock.close()
+            self.stop()
+
+    def _handle(self, conn):
+        owner = object()
+        try:
+            with conn, conn.makefile("rwb") as f:
+                for line in f:
+                    try:
+                        request = json.loads(line)
+                        reply = self._dispatch(request, owner)
+                    except Exception as err:
+                        reply = {"ok": False, "error": str(err)}
+                    f.write((json.dumps(reply) + "\n").encode("utf-8"))
+                    f.flush()
+        except OSError:
+            pass
+        finally:
+            self.release(owner=owner)
+
+    def _dispatch(self, request, owner):
+        op = request.get("op")
+        if op == "lease":
+            return {"ok": True, **self.lease(owner, request.get("timeout_s", 120.0))}
+        if op == "release":
+            return {"ok": True, "released": self.release(lease_id=request.get("lease"))}
+        if op == "status":
+            return {"ok": True, **self.status()}
+        if op == "shutdown":
+            self._stopping = True
+            # close() alone does not wake a thread blocked in accept() on Linux; shutdown() does,
+            # and serve_forever then closes the socket and stops the instances.
+            try:
+                self._sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            return {"ok": True}
+        raise RuntimeError(f"unknown op: {op}")
+
+    def stop(self):
+        self._stopping = True
+        for slot in self._slots:
+            slot.launcher.stop()
+        if self._server is not None:
+            self._server.stop()
+
+
+class PoolClient:
+    def __init__(self, address=("127.0.0.1", DEFAULT_POOL_PORT), timeout=180.0):
+        self.host, self.port = parse_address(address)
+        self.timeout = timeout
+        self._sock = None
+        self._file = None
+
+    def _call(self, **request):
+        if self._sock is None:
+            self._sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+            self._file = self._sock.makefile("rwb")
+        self._file.write((json.dumps(request) + "\n").encode("utf-8"))
+        self._file.flush()
+        line = self._file.readline()
+        if not line:
+            raise RuntimeError("Pool daemon closed the connection")
+        reply = json.loads(line)
+        if not reply.get("ok"):
+            raise RuntimeError(f"Pool request {request.get('op')} failed: {reply.get('error')}")
+        return reply
+
+    def lease(self, timeout_s=120.0):
+        return self._call(op="lease", timeout_s=timeout_s)
+
+    def release(self, lease_id):
+        return self._call(op="release", lease=lease_id)
+
+    def status(self):
+        return self._call(op="status")
+
+    def shutdown(self):
+        return self._call(op="shutdown")
+
+    def close(self):
+        if self._file is not None:
+            try:
+                self._file.close()
+            finally:
+                self._file = None
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            finally:
+                self._sock = None
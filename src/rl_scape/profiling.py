@@ -0,0 +1,197 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+
+
+class PythonSampler:
+    # Samples every Python thread's stack every interval_s (sys._current_frames, no extra
+    # dependency) and counts collapsed stacks, the input format of flamegraph.pl/speedscope.
+    # Wall-clock sampling: a thread blocked on a socket shows up as that read.
+
+    _SKIP_THREADS = ("py-sampler", "profile-session")
+
+    def __init__(self, interval_s=0.005, max_depth=64):
+        self.interval_s = float(interval_s)
+        self.max_depth = int(max_depth)
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="py-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval_s):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own or names.get(ident) in self._SKIP_THREADS:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < self.max_depth:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def write_collapsed(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+    def top_functions(self, limit=25):
+        # Leaf frames by share of samples: where the Python side actually spends its time.
+        leaves = Counter()
+        for stack, count in self.stacks.items():
+            parts = stack.split(";")
+            leaves[f"{parts[0]}: {parts[-1]}"] += count
+        total = max(1, sum(leaves.values()))
+        return [{"frame": frame, "samples": n, "share": n / total} for frame, n in leaves.most_common(limit)]
+
+
+def _jcmd(java_home=None):
+    if java_home:
+        path = os.path.join(java_home, "bin", "jcmd")
+        if os.path.isfile(path):
+            return path
+    return shutil.which("jcmd")
+
+
+def start_jfr(pid, path, duration_s, name="rl-scape", java_home=None, settings="profile"):
+    # The recording stops and is dumped to `path` by the JVM itself once duration_s is up.
+    jcmd = _jcmd(java_home)
+    if jcmd is None:
+        raise RuntimeError("jcmd not found (set java_home or put a JDK on PATH)")
+    cmd = [
+        jcmd,
+        str(pid),
+        "JFR.start",
+        f"name={name}",
+        f"settings={settings}",
+        f"duration={max(1, int(round(duration_s)))}s",
+        f"filename={os.path.abspath(path)}",
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+    if result.returncode != 0 or "Started recording" not in result.stdout:
+        raise RuntimeError(f"JFR.start failed for pid {pid}: {(result.stdout + result.stderr).strip()}")
+
+
+def summarize_jfr(path, java_home=None):
+    # `jfr summary` ships with the JDK; without it the .jfr file is still in the report.
+    jfr = os.path.join(java_home, "bin", "jfr") if java_home else shutil.which("jfr")
+    if not jfr or not os.path.isfile(jfr):
+        return None
+    result = subprocess.run([jfr, "summary", path], capture_output=True, text=True, timeout=60)
+    return result.stdout if result.returncode == 0 else None
+
+
+class ProfileSession:
+    # One capture: JFR on each JVM, the Python sampler in this process and env step timings,
+    # all over the same wall-clock window, written to one directory. Starts immediately and
+    # finishes on its own thread, so the training loop keeps running while it is profiled.
+
+    def __init__(self, out_dir, duration_s=30.0, jvms=None, java_home=None, metrics=None, interval_s=0.005):
+        self.out_dir = out_dir
+        self.duration_s = float(duration_s)
+        self.jvms = {name: pid for name, pid in (jvms or {}).items() if pid is not None}
+        self.java_home = java_home
+        self.metrics = metrics
+        self.sampler = PythonSampler(interval_s=interval_s)
+        self.report = None
+        self._done = threading.Event()
+        self._thread = None
+
+    def start(self):
+        os.makedirs(self.out_dir, exist_ok=True)
+        self._started = time.time()
+        self._metrics_before = self._snapshot_metrics()
+        self._jfr = {}
+        for name, pid in self.jvms.items():
+            path = os.path.join(self.out_dir, f"{name}.jfr")
+            try:
+                start_jfr(pid, path, self.duration_s, name=f"rl-scape-{name}", java_home=self.java_home)
+                self._jfr[name] = {"pid": pid, "path": path}
+            except (OSError, RuntimeError, subprocess.TimeoutExpired) as err:
+                self._jfr[name] = {"pid": pid, "error": str(err)}
+        self.sampler.start()
+        print(f"[profile] capturing {self.duration_s:.0f}s into {self.out_dir}")
+        self._thread = threading.Thread(target=self._finish, name="profile-session", daemon=True)
+        self._thread.start()
+        return self
+
+    def wait(self, timeout_s=None):
+        self._done.wait(timeout_s)
+        return self.report
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    def _snapshot_metrics(self):
+        # The "after" snapshot runs on the session thread while training keeps stepping, so
+        # `metrics` must be safe to call from another thread; RLScapeEnv passes
+        # StepMetrics.snapshot, which copies under the metrics lock.
+        if self.metrics is None:
+            return None
+        try:
+            return self.metrics()
+        except Exception as err:
+            # A failed snapshot should not cost the rest of the report.
+            return {"error": str(err)}
+
+    def _finish(self):
+        time.sleep(self.duration_s)
+        self.sampler.stop()
+        metrics_after = self._snapshot_metrics()
+        self.sampler.write_collapsed(os.path.join(self.out_dir, "python.collapsed"))
+        # The JVM writes the recording when it stops; give it a moment after the deadline.
+        deadline = time.time() + 30.0
+        for entry in self._jfr.values():
+            if "path" not in entry:
+                continue
+            while not os.path.isfile(entry["path"]) and time.time() < deadline:
+                time.sleep(0.5)
+            if not os.path.isfile(entry["path"]):
+                entry["error"] = "recording was not written (JVM exited?)"
+                continue
+            summary = summarize_jfr(entry["path"], self.java_home)
+            if summary:
+                entry["summary"] = entry["path"][: -len(".jfr")] + "_summary.txt"
+                with open(entry["summary"], "w", encoding="utf-8") as f:
+                    f.write(summary)
+        self.report = {
+            "started": self._started,
+            "duration_s": self.duration_s,
+            "python": {
+                "samples": self.sampler.samples,
+                "interval_s": self.sampler.interval_s,
+                "collapsed": "python.collapsed",
+                "top": self.sampler.top_functions(),
+            },
+            "jvms": self._jfr,
+            "env_metrics": {"before": self._metrics_before, "after": metrics_after},
+        }
+        with open(os.path.join(self.out_dir, "report.json"), "w", encoding="utf-8") as f:
+            json.dump(self.report, f, indent=2)
+        print(f"[profile] report written to {os.path.join(self.out_dir, 'report.json')}")
+        self._done.set()
+
+
+def default_profile_dir(base):
+    return os.path.join(base, "profiles", time.strftime("%Y%m%d-%H%M%S"))
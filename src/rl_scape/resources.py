@@ -0,0 +1,125 @@
+import glob
+import os
+import shutil
+
+
+# JVM flags per profile; all of them are valid on Java 8.
+JVM_PROFILES = {
+    # Whatever the JVM picks for this machine (the previous behaviour).
+    "default": {"server": [], "client": []},
+    # Fixed heaps and parallel GC for one or a few instances per host.
+    "throughput": {
+        "server": ["-Xms1g", "-Xmx1g", "-XX:+UseParallelGC", "-XX:ParallelGCThreads=2", "-XX:+AlwaysPreTouch"],
+        "client": ["-Xms384m", "-Xmx384m", "-XX:+UseParallelGC", "-XX:ParallelGCThreads=1", "-XX:+AlwaysPreTouch"],
+    },
+    # Many instances per host: small heaps, serial GC, fewer JIT threads and a smaller code cache.
+    "dense": {
+        "server": ["-Xms256m", "-Xmx512m", "-XX:+UseSerialGC", "-XX:CICompilerCount=2", "-XX:ReservedCodeCacheSize=64m"],
+        "client": [
+            "-Xms128m",
+            "-Xmx256m",
+            "-XX:+UseSerialGC",
+            "-XX:CICompilerCount=2",
+            "-XX:ReservedCodeCacheSize=48m",
+            "-Xss512k",
+        ],
+    },
+}
+
+
+def jvm_args(profile, role):
+    if profile not in JVM_PROFILES:
+        raise ValueError(f"Unknown JVM profile: {profile} (expected one of {', '.join(sorted(JVM_PROFILES))})")
+    return list(JVM_PROFILES[profile][role])
+
+
+def parse_cpulist(text):
+    # "0-3,8,10-11" -> [0, 1, 2, 3, 8, 10, 11]
+    cpus = []
+    for part in text.strip().split(","):
+        if not part:
+            continue
+        if "-" in part:
+            lo, hi = part.split("-", 1)
+            cpus.extend(range(int(lo), int(hi) + 1))
+        else:
+            cpus.append(int(part))
+    return cpus
+
+
+def numa_nodes():
+    # CPUs usable by this process, grouped by NUMA node.
+    allowed = os.sched_getaffinity(0) if hasattr(os, "sched_getaffinity") else set(range(os.cpu_count() or 1))
+    nodes = []
+    for path in sorted(glob.glob("/sys/devices/system/node/node[0-9]*/cpulist")):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                cpus = [c for c in parse_cpulist(f.read()) if c in allowed]
+        except OSError:
+            continue
+        if cpus:
+            nodes.append(cpus)
+    if not nodes:
+        nodes = [sorted(allowed)]
+    return nodes
+
+
+def plan_affinity(instance, server_cores=1, client_cores=1, nodes=None):
+    # Instances go round-robin over NUMA nodes. Within a node each instance gets its own
+    # server and client cores, wrapping around once the node is full.
+    nodes = nodes or numa_nodes()
+    node = nodes[instance % len(nodes)]
+    slot = instance // len(nodes)
+    width = server_cores + client_cores
+    start = (slot * width) % len(node)
+    picked = [node[(start + i) % len(node)] for i in range(width)]
+    return sorted(set(picked[:server_cores])), sorted(set(picked[server_cores:]))
+
+
+def affinity_prefix(cpus):
+    # taskset pins itself and execs the JVM, so every JVM thread inherits the mask. A
+    # preexec_fn would run Python between fork and exec, which is unsafe once this process
+    # has threads (prefetch, bridge reader, pool warmers, cycle controller).
+    if not cpus:
+        return []
+    taskset = shutil.which("taskset")
+    if taskset is None:
+        return []
+    return [taskset, "-c", ",".join(str(cpu) for cpu in sorted(cpus))]
+
+
+def pin_process(pid, cpus):
+    # Fallback without taskset: pin every thread the child has so far; threads it starts
+    # later inherit the mask from the thread that creates them.
+    if not cpus or not hasattr(os, "sched_setaffinity"):
+        return
+    try:
+        tids = [int(tid) for tid in os.listdir(f"/proc/{pid}/task")]
+    except OSError:
+        tids = [pid]
+    for tid in tids:
+        try:
+            os.sched_setaffinity(tid, set(cpus))
+        except OSError:
+            pass
+
+
+def process_rss_kb(pid):
+    try:
+        with open(f"/proc/{pid}/status", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def process_cpu_seconds(pid):
+    # User + system CPU time of a process so far, from /proc/<pid>/stat.
+    try:
+        with open(f"/proc/{pid}/stat", "r", encoding="utf-8") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return None
@@ -0,0 +1,178 @@
+import argparse
+import math
+import os
+import struct
+import subprocess
+import sys
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+
+# Header: sequence number (odd while a frame is being written), height, width.
+_HEADER = struct.Struct("<QII")
+
+
+def segment_name(name):
+    return f"rlscape_view_{name}"
+
+
+class FramePublisher:
+    # Writes the newest observation into a shared-memory segment. Publishing is a single copy
+    # into memory nobody waits on, so a viewer (or none) never slows the env down.
+
+    def __init__(self, name):
+        self.name = name
+        self._shm = None
+        self._shape = None
+        self._seq = 0
+
+    def _open(self, shape):
+        self.close()
+        size = _HEADER.size + int(np.prod(shape))
+        seg = segment_name(self.name)
+        try:
+            self._shm = shared_memory.SharedMemory(name=seg, create=True, size=size)
+        except FileExistsError:
+            # Left over from a crashed run with the same name.
+            stale = shared_memory.SharedMemory(name=seg)
+            stale.close()
+            stale.unlink()
+            self._shm = shared_memory.SharedMemory(name=seg, create=True, size=size)
+        self._shape = shape
+
+    def publish(self, frame):
+        if frame is None:
+            return
+        if self._shape != frame.shape:
+            self._open(frame.shape)
+        h, w = frame.shape[:2]
+        buf = self._shm.buf
+        self._seq += 1
+        _HEADER.pack_into(buf, 0, self._seq, h, w)
+        np.ndarray(frame.shape, dtype=np.uint8, buffer=buf, offset=_HEADER.size)[...] = frame
+        self._seq += 1
+        _HEADER.pack_into(buf, 0, self._seq, h, w)
+
+    def close(self):
+        if self._shm is not None:
+            try:
+                self._shm.close()
+                self._shm.unlink()
+            except FileNotFoundError:
+                pass
+            self._shm = None
+            self._shape = None
+
+
+class FrameSubscriber:
+    def __init__(self, name):
+        self.name = name
+        self.seq = 0
+        self._shm = None
+
+    def _attach(self):
+        try:
+            self._shm = shared_memory.SharedMemory(name=segment_name(self.name))
+        except FileNotFoundError:
+            return False
+        # Python < 3.13 would unlink the publisher's segment when this process exits.
+        resource_tracker.unregister(self._shm._name, "shared_memory")
+        return True
+
+    def read(self):
+        # Newest complete frame if it changed since the last read, else None.
+        if self._shm is None and not self._attach():
+            return None
+        buf = self._shm.buf
+        seq, h, w = _HEADER.unpack_from(buf, 0)
+        if seq == self.seq or seq % 2 or h * w * 3 + _HEADER.size > len(buf):
+            return None
+        frame = np.ndarray((h, w, 3), dtype=np.uint8, buffer=buf, offset=_HEADER.size).copy()
+        if _HEADER.unpack_from(buf, 0)[0] != seq:
+            # Overwritten while copying; the next poll gets the newer frame.
+            return None
+        self.seq = seq
+        return frame
+
+    def reattach(self):
+        self.close()
+        self.seq = 0
+
+    def close(self):
+        if self._shm is not None:
+            self._shm.close()
+            self._shm = None
+
+
+def launch_viewer(names, fps=30, scale=1):
+    # Separate interpreter, so pygame and the display never share the training process's GIL.
+    if isinstance(names, str):
+        names = [names]
+    cmd = [sys.executable, "-m", "rl_scape.viewer", *names, "--fps", str(fps), "--scale", str(scale)]
+    env = os.environ.copy()
+    src = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env["PYTHONPATH"] = src + os.pathsep + env.get("PYTHONPATH", "")
+    return subprocess.Popen(cmd, env=env)
+
+
+def run_viewer(names, fps=30, scale=1):
+    import pygame
+
+    pygame.init()
+    clock = pygame.time.Clock()
+    subscribers = [FrameSubscriber(n) for n in names]
+    frames = [None] * len(names)
+    cols = math.ceil(math.sqrt(len(names)))
+    rows = math.ceil(len(names) / cols)
+    screen = None
+    cell = None
+    last_seen = [time.time()] * len(names)
+    running = True
+    while running:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+        dirty = False
+        for i, sub in enumerate(subscribers):
+            frame = sub.read()
+            if frame is not None:
+                frames[i] = frame
+                last_seen[i] = time.time()
+                dirty = True
+            elif time.time() - last_seen[i] > 5.0:
+                # The env may have restarted and recreated its segment.
+                sub.reattach()
+                last_seen[i] = time.time()
+        if dirty:
+            if screen is None:
+                h, w = next(f for f in frames if f is not None).shape[:2]
+                cell = (w * scale, h * scale)
+                screen = pygame.display.set_mode((cell[0] * cols, cell[1] * rows))
+                pygame.display.set_caption("rl-scape viewer: " + ", ".join(names))
+            for i, frame in enumerate(frames):
+                if frame is None:
+                    continue
+                surface = pygame.surfarray.make_surface(frame.swapaxes(0, 1))
+                if surface.get_size() != cell:
+                    surface = pygame.transform.scale(surface, cell)
+                screen.blit(surface, ((i % cols) * cell[0], (i // cols) * cell[1]))
+            pygame.display.flip()
+        clock.tick(fps)
+    for sub in subscribers:
+        sub.close()
+    pygame.quit()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Watch envs that publish frames (RLScapeEnv(viewer=...)).")
+    parser.add_argument("names", nargs="+", help="Frame stream names; an env publishes under its username by default")
+    parser.add_argument("--fps", type=int, default=30)
+    parser.add_argument("--scale", type=int, default=1)
+    args = parser.parse_args(argv)
+    run_viewer(args.names, fps=args.fps, scale=args.scale)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import pytest
+
+from rl_scape.accounts import AccountPool, render_character
+
+TEMPLATE = """[ACCOUNT]
+character-username = template
+character-password = secret
+
+[CHARACTER]
+character-height = 0
+character-posx = 3200
+character-posy = 3200
+"""
+
+
+def test_render_character_replaces_identity_and_overrides():
+    text = render_character(TEMPLATE, "rl3", "pw", {"character-posx": 3222})
+    assert "character-username = rl3\n" in text
+    assert "character-password = pw\n" in text
+    assert "character-posx = 3222\n" in text
+    assert "character-posy = 3200\n" in text
+    assert "template" not in text
+
+
+def test_render_character_missing_key_raises():
+    with pytest.raises(ValueError, match="character-energy"):
+        render_character(TEMPLATE, "rl0", "pw", {"character-energy": 100})
+
+
+def test_render_character_template_without_identity_raises():
+    with pytest.raises(ValueError, match="character-username"):
+        render_character("[CHARACTER]\ncharacter-height = 0\n", "rl0", "pw")
+
+
+@pytest.fixture
+def pool(tmp_path):
+    template = tmp_path / "template.txt"
+    template.write_text(TEMPLATE)
+    return AccountPool(str(template), str(tmp_path / "resets"), size=2, prefix="rl", password="pw")
+
+
+def test_provision_writes_one_reset_per_account(pool, tmp_path):
+    assert pool.provision() == ["rl0", "rl1"]
+    assert "character-username = rl1\n" in (tmp_path / "resets" / "rl1.txt").read_text()
+
+
+def test_lease_and_release(pool, tmp_path):
+    assert pool.lease() == "rl0"
+    assert pool.lease() == "rl1"
+    with pytest.raises(RuntimeError, match="No free account"):
+        pool.lease()
+    pool.release("rl0")
+    assert (tmp_path / "resets" / "rl0.txt").is_file()
+    assert pool.lease() == "rl0"
+
+
+def test_release_without_reset_and_twice(pool, tmp_path):
+    first = pool.lease()
+    pool.release(first, reset=False)
+    pool.release(first, reset=False)
+    assert not (tmp_path / "resets").exists()
+    # A double release does not hand the account out twice.
+    assert pool.lease() == "rl1"
+    assert pool.lease() == first
+    with pytest.raises(RuntimeError):
+        pool.lease()
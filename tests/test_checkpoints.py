@@ -0,0 +1,64 @@
+import json
+
+from rl_scape.checkpoints import CheckpointManager
+
+
+class FakeModel:
+    def __init__(self, payload=b"weights"):
+        self.payload = payload
+
+    def save(self, f):
+        f.write(self.payload)
+
+
+def _fill(save_path, rewards, **kwargs):
+    manager = CheckpointManager(str(save_path), max_pending=len(rewards) + 1, **kwargs)
+    for step, reward in enumerate(rewards, start=1):
+        assert manager.snapshot(FakeModel(f"step{step}".encode()), step * 100, reward)
+    manager.close()
+    return manager
+
+
+def test_keeps_newest_and_best(tmp_path):
+    save_path = tmp_path / "ckpt" / "ppo"
+    manager = _fill(save_path, [5.0, 1.0, 2.0, 3.0, 0.0], keep_last=2, keep_best=1)
+    kept = sorted(p.name for p in (tmp_path / "ckpt").glob("*.zip"))
+    assert kept == ["ppo_step_100.zip", "ppo_step_400.zip", "ppo_step_500.zip"]
+    assert manager.latest()["step"] == 500
+    assert manager.best()["step"] == 100
+    assert (tmp_path / "ckpt" / "ppo_step_500.zip").read_bytes() == b"step5"
+    assert not list((tmp_path / "ckpt").glob("*.tmp"))
+
+
+def test_keep_best_zero_keeps_only_newest(tmp_path):
+    save_path = tmp_path / "ppo"
+    _fill(save_path, [9.0, None, 1.0], keep_last=1, keep_best=0)
+    assert sorted(p.name for p in tmp_path.glob("*.zip")) == ["ppo_step_300.zip"]
+
+
+def test_manifest_lets_a_new_manager_resume(tmp_path):
+    save_path = tmp_path / "ppo"
+    _fill(save_path, [1.0, 2.0], keep_last=3, keep_best=1)
+    manifest = json.loads((tmp_path / "ppo_checkpoints.json").read_text())
+    assert [e["step"] for e in manifest["checkpoints"]] == [100, 200]
+    resumed = CheckpointManager(str(save_path))
+    try:
+        assert resumed.latest()["path"] == str(tmp_path / "ppo_step_200.zip")
+    finally:
+        resumed.close()
+
+
+def test_latest_ignores_checkpoints_deleted_from_disk(tmp_path):
+    save_path = tmp_path / "ppo"
+    manager = _fill(save_path, [1.0, 2.0], keep_last=3)
+    (tmp_path / "ppo_step_200.zip").unlink()
+    assert manager.latest()["step"] == 100
+
+
+def test_no_checkpoints(tmp_path):
+    manager = CheckpointManager(str(tmp_path / "ppo"))
+    try:
+        assert manager.latest() is None
+        assert manager.best() is None
+    finally:
+        manager.close()
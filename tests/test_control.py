@@ -0,0 +1,66 @@
+from rl_scape.control import CycleController, parse_tick_stats
+
+
+def _stats(cycle=100, avg=30.0, max_ms=40, overruns=0):
+    return {"ticks": 10, "avg_ms": avg, "max_ms": max_ms, "overruns": overruns, "cycle_time_ms": cycle}
+
+
+def test_parse_tick_stats():
+    stats = parse_tick_stats("TICKSTATS 10 12.5 40 1 600 3 4 2 1 0 0 0 0".split())
+    assert stats["ticks"] == 10
+    assert stats["avg_ms"] == 12.5
+    assert (stats["max_ms"], stats["overruns"], stats["cycle_time_ms"]) == (40, 1, 600)
+    assert stats["histogram"] == [3, 4, 2, 1, 0, 0, 0, 0]
+
+
+def test_overrun_raises_period_at_once():
+    controller = CycleController()
+    assert controller.decide(_stats(cycle=100, overruns=1)) == 125
+
+
+def test_high_average_raises_period():
+    controller = CycleController(avg_ratio=0.9)
+    assert controller.decide(_stats(cycle=100, avg=95.0)) == 125
+
+
+def test_raise_is_capped_at_max():
+    controller = CycleController(max_ms=600)
+    assert controller.decide(_stats(cycle=550, overruns=2)) == 600
+    assert controller.decide(_stats(cycle=600, overruns=2)) is None
+
+
+def test_lowers_only_after_calm_windows():
+    controller = CycleController(calm_windows=3)
+    assert controller.decide(_stats()) is None
+    assert controller.decide(_stats()) is None
+    assert controller.decide(_stats()) == 90
+
+
+def test_overrun_restarts_the_calm_count():
+    controller = CycleController(calm_windows=2)
+    assert controller.decide(_stats()) is None
+    assert controller.decide(_stats(overruns=1)) == 125
+    assert controller.decide(_stats(cycle=125)) is None
+    assert controller.decide(_stats(cycle=125)) == 112
+
+
+def test_does_not_lower_below_a_recent_slow_tick():
+    controller = CycleController(calm_windows=2)
+    assert controller.decide(_stats(max_ms=95)) is None
+    assert controller.decide(_stats(max_ms=20)) is None
+    # The window max was reset, so the next calm stretch may lower again.
+    assert controller.decide(_stats(max_ms=20)) is None
+    assert controller.decide(_stats(max_ms=20)) == 90
+
+
+def test_lowering_stops_at_min():
+    controller = CycleController(min_ms=60, calm_windows=1)
+    assert controller.decide(_stats(cycle=64, avg=10.0, max_ms=10)) == 60
+    assert controller.decide(_stats(cycle=60, avg=10.0, max_ms=10)) is None
+
+
+def test_settle_window_is_ignored_after_a_change():
+    controller = CycleController()
+    controller._settle = 1
+    assert controller.decide(_stats(overruns=5)) is None
+    assert controller.decide(_stats(overruns=5)) == 125
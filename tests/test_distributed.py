@@ -0,0 +1,80 @@
+import io
+
+import numpy as np
+import pytest
+
+from rl_scape.distributed import compute_gae, pack_arrays, parse_address, recv_message, send_message, unpack_arrays
+
+
+def test_compute_gae_matches_hand_computed_returns():
+    # lambda=1 turns GAE into discounted return minus value.
+    adv, ret = compute_gae(
+        rewards=np.array([1.0, 1.0, 1.0]),
+        values=np.zeros(3),
+        episode_starts=np.array([1.0, 0.0, 0.0]),
+        last_value=0.0,
+        last_done=True,
+        gamma=0.5,
+        gae_lambda=1.0,
+    )
+    np.testing.assert_allclose(adv, [1.75, 1.5, 1.0])
+    np.testing.assert_allclose(ret, [1.75, 1.5, 1.0])
+
+
+def test_compute_gae_stops_at_episode_start_and_bootstraps_last_value():
+    adv, _ = compute_gae(
+        rewards=np.array([1.0, 1.0, 1.0]),
+        values=np.zeros(3),
+        episode_starts=np.array([1.0, 0.0, 1.0]),
+        last_value=2.0,
+        last_done=False,
+        gamma=0.5,
+        gae_lambda=1.0,
+    )
+    # Step 1 ends an episode, so it does not see step 2; step 2 bootstraps from last_value.
+    np.testing.assert_allclose(adv, [1.5, 1.0, 2.0])
+
+
+def test_compute_gae_matches_sb3_rollout_buffer():
+    torch = pytest.importorskip("torch")
+    pytest.importorskip("stable_baselines3")
+    from gymnasium import spaces
+    from stable_baselines3.common.buffers import RolloutBuffer
+
+    rng = np.random.default_rng(0)
+    n, gamma, gae_lambda = 64, 0.99, 0.95
+    rewards = rng.normal(size=n).astype(np.float32)
+    values = rng.normal(size=n).astype(np.float32)
+    episode_starts = (rng.random(n) < 0.1).astype(np.float32)
+    last_value, last_done = 0.7, False
+
+    buffer = RolloutBuffer(
+        n, spaces.Box(0, 1, (1,)), spaces.Discrete(2), device="cpu", gamma=gamma, gae_lambda=gae_lambda, n_envs=1
+    )
+    buffer.rewards[:, 0] = rewards
+    buffer.values[:, 0] = values
+    buffer.episode_starts[:, 0] = episode_starts
+    buffer.compute_returns_and_advantage(last_values=torch.tensor([last_value]), dones=np.array([last_done]))
+
+    adv, ret = compute_gae(rewards, values, episode_starts, last_value, last_done, gamma, gae_lambda)
+    np.testing.assert_allclose(adv, buffer.advantages[:, 0], rtol=1e-5, atol=1e-5)
+    np.testing.assert_allclose(ret, buffer.returns[:, 0], rtol=1e-5, atol=1e-5)
+
+
+def test_message_round_trip():
+    arrays = {"obs": np.arange(12, dtype=np.uint8).reshape(3, 4), "rewards": np.array([0.5, -1.0])}
+    buf = io.BytesIO()
+    send_message(buf, {"type": "chunk", "version": 3}, pack_arrays(arrays))
+    buf.seek(0)
+    header, blob = recv_message(buf)
+    assert header == {"type": "chunk", "version": 3}
+    out = unpack_arrays(blob)
+    np.testing.assert_array_equal(out["obs"], arrays["obs"])
+    np.testing.assert_array_equal(out["rewards"], arrays["rewards"])
+    assert recv_message(buf) == (None, b"")
+
+
+def test_parse_address():
+    assert parse_address("10.0.0.2:7000") == ("10.0.0.2", 7000)
+    assert parse_address(":7000") == ("127.0.0.1", 7000)
+    assert parse_address(("host", "7001")) == ("host", 7001)
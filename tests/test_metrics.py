@@ -0,0 +1,144 @@
+import numpy as np
+import pytest
+
+from rl_scape.metrics import (
+    TRAINING_FIELDS,
+    BackgroundCsvWriter,
+    Histogram,
+    RunningStats,
+    StepMetrics,
+    TrainingMetrics,
+    mean_ci95,
+)
+
+
+def test_histogram_counts_into_upper_bound_bucket():
+    hist = Histogram(buckets=(1.0, 2.0, 4.0))
+    for value in (0.5, 1.0, 1.5, 3.0, 10.0):
+        hist.observe(value)
+    assert hist.counts == [2, 1, 1, 1]
+    assert hist.count == 5
+    assert hist.total == pytest.approx(16.0)
+    assert hist.max == 10.0
+    assert hist.mean() == pytest.approx(3.2)
+
+
+def test_histogram_percentile_reports_bucket_bound_capped_at_max():
+    hist = Histogram(buckets=(1.0, 2.0, 4.0))
+    for value in (0.5, 0.6, 0.7, 1.5):
+        hist.observe(value)
+    assert hist.percentile(0.5) == 1.0
+    # The top bucket's bound (2.0) is above anything observed, so the max is reported.
+    assert hist.percentile(0.99) == 1.5
+
+
+def test_histogram_overflow_bucket_reports_max():
+    hist = Histogram(buckets=(1.0,))
+    hist.observe(7.5)
+    assert hist.percentile(0.5) == 7.5
+
+
+def test_empty_histogram_summary_is_zero():
+    summary = Histogram().summary()
+    assert summary == {"count": 0, "mean": 0.0, "p50": 0.0, "p90": 0.0, "p99": 0.0, "max": 0.0}
+
+
+def test_step_metrics_last_timings_cover_one_step():
+    metrics = StepMetrics()
+    metrics.begin()
+    metrics.observe("decode", 0.25)
+    metrics.observe("decode", 0.25)
+    metrics.incr("steps")
+    assert metrics.last_timings() == {"decode": 0.5}
+    metrics.begin()
+    assert metrics.last_timings() == {}
+    snapshot = metrics.snapshot()
+    assert snapshot["phases"]["decode"]["count"] == 2
+    assert snapshot["counters"]["steps"] == 1
+
+
+def test_step_metrics_write_prometheus(tmp_path):
+    metrics = StepMetrics(labels={"env": "a"})
+    metrics.observe("step", 0.001)
+    path = tmp_path / "metrics.prom"
+    metrics.write_prometheus(str(path))
+    text = path.read_text()
+    assert 'rlscape_phase_seconds_count{env="a",phase="step"} 1' in text
+    assert 'rlscape_steps_total{env="a"} 0' in text
+
+
+def test_running_stats_mean_std_min_max():
+    stats = RunningStats()
+    stats.observe_many([2.0, 4.0, 4.0, 4.0, 5.0, 5.0, 7.0, 9.0])
+    assert stats.count == 8
+    assert stats.mean == pytest.approx(5.0)
+    assert stats.std() == pytest.approx(2.0)
+    assert (stats.min, stats.max) == (2.0, 9.0)
+    assert stats.percentile(0.5) == pytest.approx(4.5)
+
+
+def test_running_stats_reservoir_stays_bounded():
+    stats = RunningStats(reservoir=16, seed=1)
+    stats.observe_many(np.arange(10_000, dtype=np.float64))
+    assert stats.count == 10_000
+    assert len(stats._sample) == 16
+    assert stats.mean == pytest.approx(4999.5)
+    # A uniform sample of 0..9999 has its median somewhere in the middle.
+    assert 1000 < stats.percentile(0.5) < 9000
+
+
+def test_running_stats_reset_and_empty_summary():
+    stats = RunningStats()
+    stats.observe(3.0)
+    stats.reset()
+    summary = stats.summary()
+    assert summary["count"] == 0
+    assert summary["min"] == summary["max"] == summary["p50"] == 0.0
+
+
+def test_training_metrics_row_resets_interval_but_keeps_run_totals():
+    metrics = TrainingMetrics()
+    metrics.record([1.0, 0.0], dones=[False, True], infos=[{"skill_xp": {8: 25}}, {}])
+    row = metrics.row()
+    assert set(row) == set(TRAINING_FIELDS)
+    assert row["timesteps"] == 2
+    assert row["avg_reward"] == pytest.approx(0.5)
+    assert row["episodes"] == 1
+    assert row["xp_total_woodcutting"] == 25
+    metrics.record([0.0], infos=[{"skill_xp": {8: 5}}])
+    row = metrics.row()
+    assert row["avg_reward"] == 0.0
+    assert row["timesteps"] == 3
+    assert row["xp_total_woodcutting"] == 30
+
+
+def test_csv_writer_writes_rows_without_plot_fields(tmp_path):
+    path = tmp_path / "progress.csv"
+    writer = BackgroundCsvWriter(str(path), ["timesteps", "avg_reward"], plot_path=str(tmp_path / "p.png"), plot_fields=())
+    writer.write({"timesteps": 1, "avg_reward": 0.5, "extra": 1})
+    writer.close()
+    assert path.read_text().splitlines() == ["timesteps,avg_reward", "1,0.5"]
+
+
+def test_mean_ci95_uses_student_t():
+    result = mean_ci95([1.0, 2.0, 3.0, 4.0])
+    assert result["n"] == 4
+    assert result["mean"] == pytest.approx(2.5)
+    std = np.std([1.0, 2.0, 3.0, 4.0], ddof=1)
+    assert result["std"] == pytest.approx(std)
+    half = 3.182 * std / 2.0
+    assert result["ci95_low"] == pytest.approx(2.5 - half)
+    assert result["ci95_high"] == pytest.approx(2.5 + half)
+    assert (result["min"], result["max"]) == (1.0, 4.0)
+
+
+def test_mean_ci95_large_sample_falls_back_to_normal():
+    values = np.arange(100, dtype=np.float64)
+    result = mean_ci95(values)
+    half = 1.96 * values.std(ddof=1) / 10.0
+    assert result["ci95_high"] - result["mean"] == pytest.approx(half)
+
+
+def test_mean_ci95_single_and_empty():
+    assert mean_ci95([7.0])["ci95_low"] == mean_ci95([7.0])["ci95_high"] == 7.0
+    assert mean_ci95([]) == {"n": 0, "mean": 0.0, "std": 0.0, "ci95_low": 0.0, "ci95_high": 0.0, "min": 0.0, "max": 0.0}
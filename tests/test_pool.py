@@ -0,0 +1,147 @@
+import socket
+import threading
+import time
+
+import pytest
+
+from rl_scape import pool as pool_module
+from rl_scape.pool import InstancePool, PoolClient
+
+
+class FakeLauncher:
+    instances = []
+
+    def __init__(self, port=5656, username="agent", run_dir=None, **kwargs):
+        self.port = port
+        self.username = username
+        self.kwargs = kwargs
+        self.account_reset_dir = str(run_dir) if run_dir else None
+        self.started = False
+        self.stopped = False
+        self.relogs = 0
+        FakeLauncher.instances.append(self)
+
+    def start(self):
+        self.started = True
+
+    def stop(self):
+        self.stopped = True
+
+    def poll(self):
+        return []
+
+    def check_health(self):
+        return []
+
+    def restart(self, failed):
+        pass
+
+    def relog(self):
+        self.relogs += 1
+
+
+class FakeBridgeClient:
+    def __init__(self, host="127.0.0.1", port=5656, timeout=10.0):
+        self.port = port
+
+    def connect(self):
+        pass
+
+    def ready(self):
+        return True
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def fake_jvms(monkeypatch):
+    FakeLauncher.instances = []
+    monkeypatch.setattr(pool_module, "RLScapeLauncher", FakeLauncher)
+    monkeypatch.setattr(pool_module, "RLBridgeClient", FakeBridgeClient)
+    return FakeLauncher
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_lease_hands_out_each_slot_once(fake_jvms):
+    pool = InstancePool(size=2, base_port=7000)
+    pool.start()
+    first = pool.lease(owner="a")
+    second = pool.lease(owner="b")
+    assert {first["port"], second["port"]} == {7000, 7001}
+    assert first["lease"] != second["lease"]
+    assert pool.status() == {"size": 2, "leased": 2, "ready": 0}
+    with pytest.raises(RuntimeError, match="no free instance"):
+        pool.lease(owner="c", timeout_s=0.1)
+
+
+def test_released_slot_is_warmed_and_leased_again(fake_jvms):
+    pool = InstancePool(size=1, base_port=7000)
+    pool.start()
+    lease = pool.lease(owner="a")
+    assert pool.release(lease_id=lease["lease"]) == 1
+    again = pool.lease(owner="b", timeout_s=5.0)
+    assert again["port"] == 7000
+    assert again["lease"] != lease["lease"]
+
+
+def test_release_by_owner_drops_all_of_its_leases(fake_jvms):
+    pool = InstancePool(size=3, base_port=7000)
+    pool.start()
+    owner = object()
+    pool.lease(owner=owner)
+    pool.lease(owner=owner)
+    pool.lease(owner="other")
+    assert pool.release(owner=owner) == 2
+    assert pool.status()["leased"] == 1
+
+
+def test_account_template_rotates_usernames_on_release(fake_jvms, tmp_path):
+    template = tmp_path / "template.txt"
+    template.write_text("[ACCOUNT]\ncharacter-username = x\ncharacter-password = y\n")
+    pool = InstancePool(size=1, base_port=7000, account_spares=1, account_template=str(template), run_dir=tmp_path / "run")
+    pool.start()
+    lease = pool.lease(owner="a")
+    assert lease["username"] == "pool0"
+    pool.release(lease_id=lease["lease"])
+    again = pool.lease(owner="a", timeout_s=5.0)
+    # The used account rests with a reset queued while the slot logs in with the spare.
+    assert again["username"] == "pool1"
+    assert (tmp_path / "run" / "pool0.txt").read_text().startswith("[ACCOUNT]\ncharacter-username = pool0")
+    assert fake_jvms.instances[-1].relogs == 1
+
+
+def test_dropped_connection_releases_its_lease_and_shutdown_stops_daemon(fake_jvms):
+    pool = InstancePool(size=1, base_port=7000, rpc_port=_free_port())
+    pool.start()
+    server = threading.Thread(target=pool.serve_forever, daemon=True)
+    server.start()
+    address = ("127.0.0.1", pool.rpc_port)
+    for _ in range(50):
+        try:
+            socket.create_connection(address, timeout=1.0).close()
+            break
+        except OSError:
+            time.sleep(0.05)
+
+    client = PoolClient(address, timeout=5.0)
+    assert client.lease(timeout_s=1.0)["port"] == 7000
+    assert client.status()["leased"] == 1
+    client.close()
+
+    other = PoolClient(address, timeout=5.0)
+    deadline = time.time() + 5.0
+    while other.status()["leased"] and time.time() < deadline:
+        time.sleep(0.05)
+    assert other.status()["leased"] == 0
+
+    assert other.shutdown()["ok"]
+    other.close()
+    server.join(timeout=5.0)
+    assert not server.is_alive()
+    assert all(launcher.stopped for launcher in fake_jvms.instances)
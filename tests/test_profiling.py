@@ -0,0 +1,85 @@
+import json
+import threading
+import time
+
+import pytest
+
+from rl_scape import profiling
+from rl_scape.metrics import StepMetrics
+from rl_scape.profiling import ProfileSession, PythonSampler
+
+
+def _spin(stop):
+    while not stop.is_set():
+        sum(range(200))
+
+
+def test_sampler_sees_busy_thread_and_writes_collapsed(tmp_path):
+    stop = threading.Event()
+    worker = threading.Thread(target=_spin, args=(stop,), name="busy-worker", daemon=True)
+    worker.start()
+    sampler = PythonSampler(interval_s=0.002).start()
+    time.sleep(0.3)
+    sampler.stop()
+    stop.set()
+    worker.join()
+    assert sampler.samples > 0
+    assert any(stack.startswith("busy-worker;") and "_spin" in stack for stack in sampler.stacks)
+    assert not any(stack.startswith("py-sampler;") for stack in sampler.stacks)
+    top = sampler.top_functions(limit=5)
+    assert top and abs(sum(entry["share"] for entry in sampler.top_functions(limit=1000)) - 1.0) < 1e-9
+    path = tmp_path / "python.collapsed"
+    sampler.write_collapsed(str(path))
+    stack, count = path.read_text().splitlines()[0].rsplit(" ", 1)
+    assert sampler.stacks[stack] == int(count)
+
+
+def test_start_jfr_without_jcmd_raises(monkeypatch, tmp_path):
+    monkeypatch.setattr(profiling.shutil, "which", lambda name: None)
+    with pytest.raises(RuntimeError, match="jcmd not found"):
+        profiling.start_jfr(1234, str(tmp_path / "x.jfr"), 5, java_home=str(tmp_path))
+
+
+def test_session_report_with_metrics_snapshots(tmp_path):
+    metrics = StepMetrics()
+    metrics.observe("step", 0.01)
+    stop = threading.Event()
+
+    def _step():
+        # Training keeps recording while the session thread snapshots.
+        while not stop.is_set():
+            metrics.observe("step", 0.001)
+            metrics.incr("steps")
+
+    stepper = threading.Thread(target=_step, daemon=True)
+    stepper.start()
+    try:
+        session = ProfileSession(str(tmp_path / "prof"), duration_s=0.2, metrics=metrics.snapshot).start()
+        report = session.wait(10.0)
+    finally:
+        stop.set()
+        stepper.join()
+    assert session.done
+    assert report["jvms"] == {}
+    before, after = report["env_metrics"]["before"], report["env_metrics"]["after"]
+    assert after["phases"]["step"]["count"] > before["phases"]["step"]["count"]
+    on_disk = json.loads((tmp_path / "prof" / "report.json").read_text())
+    assert on_disk["python"]["collapsed"] == "python.collapsed"
+    assert (tmp_path / "prof" / "python.collapsed").is_file()
+
+
+def test_session_survives_a_failing_metrics_callable(tmp_path):
+    def _broken():
+        raise RuntimeError("boom")
+
+    report = ProfileSession(str(tmp_path), duration_s=0.05, metrics=_broken).start().wait(10.0)
+    assert report["env_metrics"] == {"before": {"error": "boom"}, "after": {"error": "boom"}}
+
+
+def test_session_records_jvm_start_errors(monkeypatch, tmp_path):
+    def _fail(*args, **kwargs):
+        raise RuntimeError("no such process")
+
+    monkeypatch.setattr(profiling, "start_jfr", _fail)
+    report = ProfileSession(str(tmp_path), duration_s=0.05, jvms={"server": 1, "client": None}).start().wait(10.0)
+    assert report["jvms"] == {"server": {"pid": 1, "error": "no such process"}}
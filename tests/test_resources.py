@@ -0,0 +1,42 @@
+import pytest
+
+from rl_scape.resources import affinity_prefix, jvm_args, parse_cpulist, plan_affinity
+
+
+def test_parse_cpulist_ranges_and_singles():
+    assert parse_cpulist("0-3,8,10-11\n") == [0, 1, 2, 3, 8, 10, 11]
+
+
+def test_parse_cpulist_empty():
+    assert parse_cpulist("") == []
+    assert parse_cpulist("5,") == [5]
+
+
+def test_plan_affinity_round_robins_over_nodes():
+    nodes = [[0, 1, 2, 3], [4, 5, 6, 7]]
+    assert plan_affinity(0, nodes=nodes) == ([0], [1])
+    assert plan_affinity(1, nodes=nodes) == ([4], [5])
+    assert plan_affinity(2, nodes=nodes) == ([2], [3])
+    assert plan_affinity(3, nodes=nodes) == ([6], [7])
+
+
+def test_plan_affinity_wraps_when_node_is_full():
+    nodes = [[0, 1, 2, 3]]
+    assert plan_affinity(2, nodes=nodes) == ([0], [1])
+
+
+def test_plan_affinity_multiple_cores():
+    nodes = [[0, 1, 2, 3, 4, 5]]
+    assert plan_affinity(0, server_cores=2, client_cores=1, nodes=nodes) == ([0, 1], [2])
+    assert plan_affinity(1, server_cores=2, client_cores=1, nodes=nodes) == ([3, 4], [5])
+
+
+def test_jvm_args_unknown_profile():
+    with pytest.raises(ValueError):
+        jvm_args("nope", "server")
+    assert jvm_args("default", "client") == []
+
+
+def test_affinity_prefix_without_cpus_is_empty():
+    assert affinity_prefix(None) == []
+    assert affinity_prefix([]) == []
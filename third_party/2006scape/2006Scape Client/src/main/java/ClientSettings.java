@@ -148,6 +148,26 @@ public class ClientSettings {
      */
     public static int RL_BRIDGE_PORT = 5656;
 
+    /**
+     * @RL
+     * Pack large bridge frames on the common fork/join pool. Off by default:
+     * with many clients per host the pool would oversubscribe pinned cores.
+     */
+    public static boolean RL_PARALLEL_ENCODE = false;
+
+    /**
+     * @RL
+     * Only draw the game scene when the bridge is waiting for a frame or once per server tick.
+     * Game logic keeps running every cycle.
+     */
+    public static boolean RL_RENDER_ON_DEMAND = false;
+
+    /**
+     * @RL
+     * Only run game cycles when the bridge sends ADVANCE n; the client is frozen in between.
+     */
+    public static boolean RL_STEPPED = false;
+
     /**
      * The Npc Bits for the Server
      */
@@ -8895,6 +8895,9 @@ public class Game extends RSApplet {
 			showErrorScreen();
 			return;
 		}
+		if (ClientSettings.RL_RENDER_ON_DEMAND && loggedIn && !RLBridge.isRenderDue(rlServerTicks)) {
+			return;
+		}
 		anInt1061++;
 		if (!loggedIn) {
 			drawLoginScreen(false);
@@ -10014,8 +10017,9 @@ public class Game extends RSApplet {
 
 	public void drawLoginScreen(boolean flag) {
 		if (ClientSettings.HEADLESS || ClientSettings.RL_BRIDGE_ENABLED) {
-			if (!rlAutoLoginAttempted && myUsername != null && !myUsername.isEmpty() && myPassword != null && !myPassword.isEmpty()) {
-				rlAutoLoginAttempted = true;
+			// retry every ~5s so the client logs back in after a server restart
+			if (loopCycle >= rlNextAutoLoginCycle && myUsername != null && !myUsername.isEmpty() && myPassword != null && !myPassword.isEmpty()) {
+				rlNextAutoLoginCycle = loopCycle + 250;
 				login(myUsername, myPassword, false);
 			}
 			return;
@@ -10756,6 +10760,7 @@ public class Game extends RSApplet {
 			prevPktType = anInt841;
 			anInt841 = pktType;
 			if (pktType == 81) {
+				rlServerTicks++;
 				updatePlayers(pktSize, inStream);
 				aBoolean1080 = false;
 				pktType = -1;
@@ -12638,6 +12643,7 @@ public class Game extends RSApplet {
 	public int unreadMessages;
 	public static int anInt1155;
 	public boolean loggedIn;
+	public int rlServerTicks;
 	public boolean canMute;
 	public boolean aBoolean1159;
 	public boolean aBoolean1160;
@@ -12672,7 +12678,7 @@ public class Game extends RSApplet {
 	private int rlCameraLastY;
 	private boolean rlCameraHasLast;
 	private int rlCameraDebugTick;
-	private boolean rlAutoLoginAttempted;
+	private int rlNextAutoLoginCycle;
 	public static int anInt1188;
 	public int invOverlayInterfaceID;
 	public int[] anIntArray1190;
@@ -12979,10 +12985,18 @@ public class Game extends RSApplet {
 		return myPlayer != null ? myPlayer.interactingEntity : -1;
 	}
 
+	public boolean isRlMoving() {
+		return myPlayer != null && myPlayer.smallXYIndex > 0;
+	}
+
 	public int getRlLoopCycle() {
 		return loopCycle;
 	}
 
+	public int getRlServerTicks() {
+		return rlServerTicks;
+	}
+
 	public boolean isRlReady() {
 		boolean invReady = tabInterfaceIDs != null && tabInterfaceIDs.length > 3 && tabInterfaceIDs[3] != -1;
 		boolean basicReady = loggedIn && myPlayer != null && currentExp != null && maxStats != null;
@@ -12993,6 +13007,112 @@ public class Game extends RSApplet {
 		return currentExp;
 	}
 
+	/**
+	 * Marks the grid cells of a cols x rows grid over the client canvas that
+	 * cover something clickable: fixed interface panels, an open interface or
+	 * menu, NPCs with actions, other players, ground items and objects with
+	 * actions. Must run on the game thread, after the scene has been drawn.
+	 */
+	public void fillRlClickMask(boolean[] mask, int cols, int rows) {
+		java.util.Arrays.fill(mask, 0, cols * rows, false);
+		if (!loggedIn || myPlayer == null || worldController == null) {
+			markRlMask(mask, cols, rows, 0, 0, myWidth, myHeight);
+			return;
+		}
+		markRlMask(mask, cols, rows, 550, 4, 765, 160);
+		markRlMask(mask, cols, rows, 516, 168, 765, 205);
+		markRlMask(mask, cols, rows, 553, 205, 743, 466);
+		markRlMask(mask, cols, rows, 496, 466, 765, 503);
+		markRlMask(mask, cols, rows, 7, 345, 497, 503);
+		if (openInterfaceID != -1) {
+			markRlMask(mask, cols, rows, 4, 4, 516, 338);
+		}
+		if (menuOpen) {
+			int offX = menuScreenArea == 1 ? 553 : menuScreenArea == 2 ? 17 : 4;
+			int offY = menuScreenArea == 1 ? 205 : menuScreenArea == 2 ? 357 : 4;
+			markRlMask(mask, cols, rows, offX + menuOffsetX, offY + menuOffsetY, offX + menuOffsetX + menuWidth, offY + menuOffsetY + anInt952);
+		}
+		for (int i = 0; i < npcCount; i++) {
+			NPC npc = npcArray[npcIndices[i]];
+			if (npc == null || !npc.isVisible()) {
+				continue;
+			}
+			EntityDef def = npc.desc;
+			if (def != null && def.childrenIDs != null) {
+				def = def.method161();
+			}
+			if (def == null || def.actions == null) {
+				continue;
+			}
+			markRlEntity(mask, cols, rows, npc, Math.max(1, def.aByte68));
+		}
+		for (int i = 0; i < playerCount; i++) {
+			Player player = playerArray[playerIndices[i]];
+			if (player != null && player.isVisible()) {
+				markRlEntity(mask, cols, rows, player, 1);
+			}
+		}
+		int px = myPlayer.x >> 7;
+		int py = myPlayer.y >> 7;
+		for (int x = Math.max(0, px - 16); x < Math.min(104, px + 17); x++) {
+			for (int y = Math.max(0, py - 16); y < Math.min(104, py + 17); y++) {
+				boolean clickable = groundArray[plane][x][y] != null
+						|| rlObjectHasActions(worldController.method302(plane, x, y))
+						|| rlObjectHasActions(worldController.method300(plane, x, y))
+						|| rlObjectHasActions(worldController.method303(plane, x, y));
+				if (!clickable) {
+					continue;
+				}
+				calcEntityScreenPos(x * 128 + 64, 48, y * 128 + 64);
+				if (spriteDrawX >= 0 && spriteDrawX < 512 && spriteDrawY >= 0 && spriteDrawY < 334) {
+					markRlMask(mask, cols, rows, 4 + spriteDrawX - 8, 4 + spriteDrawY - 8, 4 + spriteDrawX + 8, 4 + spriteDrawY + 8);
+				}
+			}
+		}
+	}
+
+	private boolean rlObjectHasActions(int uid) {
+		if (uid == 0) {
+			return false;
+		}
+		ObjectDef def = ObjectDef.forID(uid >> 14 & 0x7fff);
+		return def != null && def.hasActions;
+	}
+
+	private void markRlEntity(boolean[] mask, int cols, int rows, Entity entity, int size) {
+		calcEntityScreenPos(entity.x, 0, entity.y);
+		int footX = spriteDrawX;
+		int footY = spriteDrawY;
+		calcEntityScreenPos(entity.x, entity.height, entity.y);
+		int headY = spriteDrawY;
+		if (footX < 0 || spriteDrawX < 0) {
+			return;
+		}
+		int halfWidth = Math.max(4, Math.abs(footY - headY) * size / 4);
+		int top = Math.min(footY, headY);
+		int bottom = Math.max(footY, headY);
+		int left = Math.max(0, footX - halfWidth);
+		int right = Math.min(512, footX + halfWidth);
+		top = Math.max(0, top);
+		bottom = Math.min(334, bottom);
+		if (left >= right || top >= bottom) {
+			return;
+		}
+		markRlMask(mask, cols, rows, 4 + left, 4 + top, 4 + right, 4 + bottom);
+	}
+
+	private void markRlMask(boolean[] mask, int cols, int rows, int x0, int y0, int x1, int y1) {
+		int c0 = Math.max(0, x0 * cols / myWidth);
+		int c1 = Math.min(cols - 1, (Math.max(x0, x1 - 1)) * cols / myWidth);
+		int r0 = Math.max(0, y0 * rows / myHeight);
+		int r1 = Math.min(rows - 1, (Math.max(y0, y1 - 1)) * rows / myHeight);
+		for (int r = r0; r <= r1; r++) {
+			for (int c = c0; c <= c1; c++) {
+				mask[r * cols + c] = true;
+			}
+		}
+	}
+
 	
 	public void definitionSearch(String name, int type) {
 		int amount = 0;
@@ -22,6 +22,18 @@ public final class Main {
 					case "-rl":
 						ClientSettings.RL_BRIDGE_ENABLED = true;
 						break;
+					case "-rl-parallel-encode":
+						ClientSettings.RL_PARALLEL_ENCODE = true;
+						break;
+					case "-rl-serial-encode":
+						ClientSettings.RL_PARALLEL_ENCODE = false;
+						break;
+					case "-rl-render-on-demand":
+						ClientSettings.RL_RENDER_ON_DEMAND = true;
+						break;
+					case "-rl-stepped":
+						ClientSettings.RL_STEPPED = true;
+						break;
 					case "-dev"	:
 					case "-local":
 					case "-offline":
@@ -1,10 +1,10 @@
-import java.io.BufferedOutputStream;
 import java.io.BufferedReader;
-import java.io.DataOutputStream;
 import java.io.IOException;
 import java.io.InputStreamReader;
-import java.net.ServerSocket;
-import java.net.Socket;
+import java.net.InetSocketAddress;
+import java.nio.ByteBuffer;
+import java.nio.channels.ServerSocketChannel;
+import java.nio.channels.SocketChannel;
 
 final class RLBridge implements Runnable {
 
@@ -13,16 +13,25 @@ final class RLBridge implements Runnable {
 	private final Game game;
 	private final int port;
 	private final Object frameLock = new Object();
+	private final Object writeLock = new Object();
 	private volatile boolean running = true;
 	private long frameCounter = 0L;
-	private byte[] lastRgb;
-	private int lastWidth;
-	private int lastHeight;
+	private final RLFrameEncoder encoder = new RLFrameEncoder();
+	private ByteBuffer lineBuffer = ByteBuffer.allocateDirect(256);
 	private int[] lastExp;
+	private boolean[] maskCells;
+	private int maskCols;
+	private int maskRows;
+	private boolean maskPending;
+	private boolean renderRequested;
+	private int lastRenderedTick = -1;
+	private int advancePending;
+	private boolean gameParked;
 
 	private RLBridge(Game game, int port) {
 		this.game = game;
 		this.port = port;
+		encoder.setParallel(ClientSettings.RL_PARALLEL_ENCODE);
 	}
 
 	public static void start(Game game, int port) {
@@ -35,6 +44,84 @@ final class RLBridge implements Runnable {
 		thread.start();
 	}
 
+	/**
+	 * Called by the draw loop in render-on-demand mode; true when someone is
+	 * waiting for a frame or a new server tick has arrived since the last draw.
+	 */
+	public static boolean isRenderDue(int serverTick) {
+		if (instance == null) {
+			return true;
+		}
+		return instance.consumeRenderDemand(serverTick);
+	}
+
+	private boolean consumeRenderDemand(int serverTick) {
+		synchronized (frameLock) {
+			if (!renderRequested && !maskPending && serverTick == lastRenderedTick) {
+				return false;
+			}
+			renderRequested = false;
+			lastRenderedTick = serverTick;
+			return true;
+		}
+	}
+
+	private void requestRender() {
+		if (!ClientSettings.RL_RENDER_ON_DEMAND) {
+			return;
+		}
+		synchronized (frameLock) {
+			renderRequested = true;
+		}
+	}
+
+	/**
+	 * Stepped mode: parks the game loop until the bridge asks for more cycles
+	 * and returns how many to run before the next draw.
+	 */
+	public static int awaitAdvance() {
+		RLBridge bridge = instance;
+		if (bridge == null) {
+			// bridge not up yet; keep the normal pace
+			try {
+				Thread.sleep(20L);
+			} catch (InterruptedException e) {
+				Thread.currentThread().interrupt();
+			}
+			return 1;
+		}
+		return bridge.takeAdvance();
+	}
+
+	private int takeAdvance() {
+		synchronized (frameLock) {
+			gameParked = true;
+			try {
+				while (advancePending == 0 && running) {
+					frameLock.wait();
+				}
+			} catch (InterruptedException e) {
+				Thread.currentThread().interrupt();
+			} finally {
+				gameParked = false;
+			}
+			int cycles = advancePending;
+			advancePending = 0;
+			return Math.max(1, cycles);
+		}
+	}
+
+	private long advance(int cycles) {
+		long before;
+		synchronized (frameLock) {
+			before = frameCounter;
+			advancePending += cycles;
+			renderRequested = true;
+			frameLock.notifyAll();
+		}
+		return waitForNextFrame(before);
+	}
+
 	public static void onFrame() {
 		if (instance == null) {
 			return;
@@ -44,6 +131,10 @@ final class RLBridge implements Runnable {
 
 	private void signalFrame() {
 		synchronized (frameLock) {
+			if (maskPending) {
+				game.fillRlClickMask(maskCells, maskCols, maskRows);
+				maskPending = false;
+			}
 			frameCounter++;
 			frameLock.notifyAll();
 		}
@@ -51,9 +142,11 @@ final class RLBridge implements Runnable {
 
 	@Override
 	public void run() {
-		try (ServerSocket server = new ServerSocket(port)) {
+		try (ServerSocketChannel server = ServerSocketChannel.open()) {
+			server.bind(new InetSocketAddress(port));
 			while (running) {
-				try (Socket socket = server.accept()) {
+				try (SocketChannel socket = server.accept()) {
+					socket.socket().setTcpNoDelay(true);
 					handleConnection(socket);
 				} catch (IOException e) {
 					if (running) {
@@ -66,11 +159,20 @@ final class RLBridge implements Runnable {
 		}
 	}
 
-	private void handleConnection(Socket socket) throws IOException {
-		BufferedReader in = new BufferedReader(new InputStreamReader(socket.getInputStream()));
-		DataOutputStream out = new DataOutputStream(new BufferedOutputStream(socket.getOutputStream()));
+	private void handleConnection(SocketChannel channel) throws IOException {
+		FramePusher pusher = null;
+		try {
+			pusher = serveCommands(channel);
+		} finally {
+			stopPusher(pusher);
+		}
+	}
+
+	private FramePusher serveCommands(SocketChannel channel) throws IOException {
+		BufferedReader in = new BufferedReader(new InputStreamReader(channel.socket().getInputStream()));
 		String line;
 		long lastFrame = frameCounter;
+		FramePusher pusher = null;
 		while ((line = in.readLine()) != null) {
 			line = line.trim();
 			if (line.isEmpty()) {
@@ -80,62 +182,193 @@ final class RLBridge implements Runnable {
 			String cmd = parts[0].toUpperCase();
 			switch (cmd) {
 				case "PING":
-					writeLine(out, "PONG");
+					writeLine(channel, "PONG");
 					break;
 				case "MOVE":
+					requestRender();
 					if (parts.length >= 3) {
 						game.rlMouseMove(parseInt(parts[1]), parseInt(parts[2]));
-						writeLine(out, "OK");
+						writeLine(channel, "OK");
 					} else {
-						writeLine(out, "ERR");
+						writeLine(channel, "ERR");
 					}
 					break;
 				case "DOWN":
+					requestRender();
 					if (parts.length >= 2) {
 						game.rlMousePress(parseInt(parts[1]));
-						writeLine(out, "OK");
+						writeLine(channel, "OK");
 					} else {
-						writeLine(out, "ERR");
+						writeLine(channel, "ERR");
 					}
 					break;
 				case "UP":
+					requestRender();
 					if (parts.length >= 2) {
 						game.rlMouseRelease(parseInt(parts[1]));
-						writeLine(out, "OK");
+						writeLine(channel, "OK");
 					} else {
-						writeLine(out, "ERR");
+						writeLine(channel, "ERR");
 					}
 					break;
 				case "DRAG":
+					requestRender();
 					if (parts.length >= 3) {
 						game.mouseWheelDragged(parseInt(parts[1]), parseInt(parts[2]));
-						writeLine(out, "OK");
+						writeLine(channel, "OK");
 					} else {
-						writeLine(out, "ERR");
+						writeLine(channel, "ERR");
 					}
 					break;
 				case "STEP":
-					lastFrame = waitForNextFrame(lastFrame);
-					sendFrame(out);
+					if (ClientSettings.RL_STEPPED) {
+						lastFrame = advance(1);
+					} else {
+						requestRender();
+						lastFrame = waitForNextFrame(lastFrame);
+					}
+					sendFrame(channel);
+					break;
+				case "ADVANCE":
+					if (!ClientSettings.RL_STEPPED) {
+						writeLine(channel, "ERR not-stepped");
+						break;
+					}
+					lastFrame = advance(parts.length >= 2 ? Math.max(1, parseInt(parts[1])) : 1);
+					sendFrame(channel);
 					break;
 				case "FRAME":
-					sendFrame(out);
+					if (ClientSettings.RL_RENDER_ON_DEMAND && !ClientSettings.RL_STEPPED) {
+						// the last drawn frame may be a tick old; draw a current one
+						requestRender();
+						lastFrame = waitForNextFrame(frameCounter);
+					}
+					sendFrame(channel);
 					lastFrame = frameCounter;
 					break;
 				case "STATE":
-					sendState(out);
+					sendState(channel);
+					break;
+				case "SYNC":
+					if (ClientSettings.RL_STEPPED) {
+						lastFrame = advance(2);
+						writeLine(channel, "SYNC " + game.getRlLoopCycle());
+					} else {
+						writeLine(channel, "SYNC " + waitForGameCycles(2));
+					}
 					break;
 				case "READY":
-					sendReady(out);
+					sendReady(channel);
+					break;
+				case "MASK":
+					if (parts.length >= 3) {
+						sendMask(channel, parseInt(parts[1]), parseInt(parts[2]));
+					} else {
+						writeLine(channel, "ERR");
+					}
+					break;
+				case "SUBSCRIBE":
+					stopPusher(pusher);
+					// the reply goes out before the first pushed frame can
+					writeLine(channel, "OK");
+					pusher = startPusher(channel, parts.length >= 2 ? Math.max(1, parseInt(parts[1])) : 1);
+					break;
+				case "UNSUBSCRIBE":
+					stopPusher(pusher);
+					pusher = null;
+					writeLine(channel, "UNSUBSCRIBED");
 					break;
 				case "QUIT":
-					writeLine(out, "BYE");
-					return;
+					writeLine(channel, "BYE");
+					return pusher;
 				default:
-					writeLine(out, "ERR");
+					writeLine(channel, "ERR");
 					break;
 			}
 		}
+		return pusher;
+	}
+
+	private FramePusher startPusher(SocketChannel channel, int every) {
+		FramePusher pusher = new FramePusher(channel, every);
+		Thread thread = new Thread(pusher, "RLBridge-push");
+		thread.setDaemon(true);
+		pusher.thread = thread;
+		thread.start();
+		return pusher;
+	}
+
+	private void stopPusher(FramePusher pusher) {
+		if (pusher == null) {
+			return;
+		}
+		pusher.active = false;
+		synchronized (frameLock) {
+			frameLock.notifyAll();
+		}
+		try {
+			pusher.thread.join(2000L);
+		} catch (InterruptedException e) {
+			Thread.currentThread().interrupt();
+		}
+	}
+
+	private final class FramePusher implements Runnable {
+
+		private final SocketChannel channel;
+		private final int every;
+		private volatile boolean active = true;
+		private Thread thread;
+
+		private FramePusher(SocketChannel channel, int every) {
+			this.channel = channel;
+			this.every = every;
+		}
+
+		@Override
+		public void run() {
+			long lastFrame;
+			synchronized (frameLock) {
+				lastFrame = frameCounter;
+			}
+			try {
+				while (running && active) {
+					synchronized (frameLock) {
+						while (active && frameCounter < lastFrame + every) {
+							try {
+								frameLock.wait(1000L);
+							} catch (InterruptedException e) {
+								return;
+							}
+						}
+						lastFrame = frameCounter;
+					}
+					if (active) {
+						pushFrame(channel);
+					}
+				}
+			} catch (IOException e) {
+				// connection closed; the command loop cleans up
+			}
+		}
+	}
+
+	/**
+	 * Waits until the game loop has run {@code cycles} more times, so input sent
+	 * before this call has been handled and any resulting packets flushed.
+	 */
+	private int waitForGameCycles(int cycles) {
+		int target = game.getRlLoopCycle() + cycles;
+		long deadline = System.currentTimeMillis() + 1000L;
+		while (game.getRlLoopCycle() < target && System.currentTimeMillis() < deadline) {
+			try {
+				Thread.sleep(1L);
+			} catch (InterruptedException e) {
+				Thread.currentThread().interrupt();
+				break;
+			}
+		}
+		return game.getRlLoopCycle();
 	}
 
 	private long waitForNextFrame(long lastFrame) {
@@ -152,38 +385,35 @@ final class RLBridge implements Runnable {
 		}
 	}
 
-	private void sendFrame(DataOutputStream out) throws IOException {
-		int[] pixels = game.getHeadlessPixels();
-		if (pixels == null) {
-			if (lastRgb != null) {
-				int len = lastWidth * lastHeight * 3;
-				writeLine(out, "FRAME " + lastWidth + " " + lastHeight + " 3 " + len);
-				out.write(lastRgb);
-				out.flush();
-			} else {
-				writeLine(out, "ERR no-headless");
+	private void sendFrame(SocketChannel channel) throws IOException {
+		writeFrame(channel, "ERR no-headless");
+	}
+
+	/**
+	 * Pushed frames are unprompted, so their errors are tagged PUSHERR and can
+	 * never be read as the reply to a command.
+	 */
+	private void pushFrame(SocketChannel channel) throws IOException {
+		writeFrame(channel, "PUSHERR no-headless");
+	}
+
+	private void writeFrame(SocketChannel channel, String noFrame) throws IOException {
+		synchronized (writeLock) {
+			int[] pixels = game.getHeadlessPixels();
+			if (pixels == null) {
+				if (encoder.hasFrame()) {
+					encoder.write(channel);
+				} else {
+					writeLine(channel, noFrame);
+				}
+				return;
 			}
-			return;
+			encoder.encode(pixels, game.getHeadlessWidth(), game.getHeadlessHeight());
+			encoder.write(channel);
 		}
-		int width = game.getHeadlessWidth();
-		int height = game.getHeadlessHeight();
-		int len = width * height * 3;
-		byte[] rgb = new byte[len];
-		int idx = 0;
-		for (int p : pixels) {
-			rgb[idx++] = (byte) ((p >> 16) & 0xff);
-			rgb[idx++] = (byte) ((p >> 8) & 0xff);
-			rgb[idx++] = (byte) (p & 0xff);
-		}
-		lastRgb = rgb;
-		lastWidth = width;
-		lastHeight = height;
-		writeLine(out, "FRAME " + width + " " + height + " 3 " + len);
-		out.write(rgb);
-		out.flush();
-	}
-
-	private void sendState(DataOutputStream out) throws IOException {
+	}
+
+	private void sendState(SocketChannel channel) throws IOException {
 		long totalExp = game.getRlTotalExp();
 		int totalLevels = game.getRlTotalLevels();
 		int hp = game.getRlCurrentHp();
@@ -213,17 +443,86 @@ final class RLBridge implements Runnable {
 				}
 			}
 		}
-		writeLine(out, "STATE " + totalExp + " " + totalLevels + " " + hp + " " + maxHp + " " + anim + " " + interacting + " " + loopCycle + " " + skillIndex + " " + skillDelta);
+		writeLine(channel, "STATE " + totalExp + " " + totalLevels + " " + hp + " " + maxHp + " " + anim + " " + interacting + " " + loopCycle + " " + skillIndex + " " + skillDelta + " " + game.getRlServerTicks() + " " + (game.isRlMoving() ? 1 : 0));
 	}
 
-	private void sendReady(DataOutputStream out) throws IOException {
+	private void sendMask(SocketChannel channel, int cols, int rows) throws IOException {
+		if (cols < 1 || rows < 1 || cols > 765 || rows > 503) {
+			writeLine(channel, "ERR");
+			return;
+		}
+		StringBuilder hex;
+		synchronized (frameLock) {
+			if (maskCells == null || maskCells.length < cols * rows) {
+				maskCells = new boolean[cols * rows];
+			}
+			maskCols = cols;
+			maskRows = rows;
+			if (gameParked) {
+				// stepped mode: the game thread is idle, so the scene can be read from here
+				game.fillRlClickMask(maskCells, cols, rows);
+			} else {
+				maskPending = true;
+			}
+			long deadline = System.currentTimeMillis() + 1000L;
+			while (maskPending) {
+				long remaining = deadline - System.currentTimeMillis();
+				if (remaining <= 0) {
+					break;
+				}
+				try {
+					frameLock.wait(remaining);
+				} catch (InterruptedException e) {
+					Thread.currentThread().interrupt();
+					break;
+				}
+			}
+			if (maskPending) {
+				maskPending = false;
+				hex = null;
+			} else {
+				hex = encodeMask(cols * rows);
+			}
+		}
+		if (hex == null) {
+			writeLine(channel, "ERR no-frame");
+			return;
+		}
+		writeLine(channel, "MASK " + cols + " " + rows + " " + hex);
+	}
+
+	private StringBuilder encodeMask(int cells) {
+		StringBuilder hex = new StringBuilder(((cells + 7) >> 3) * 2);
+		for (int i = 0; i < cells; i += 8) {
+			int b = 0;
+			for (int j = 0; j < 8; j++) {
+				if (i + j < cells && maskCells[i + j]) {
+					b |= 0x80 >> j;
+				}
+			}
+			hex.append(Character.forDigit(b >> 4, 16)).append(Character.forDigit(b & 0xf, 16));
+		}
+		return hex;
+	}
+
+	private void sendReady(SocketChannel channel) throws IOException {
 		boolean ready = game.isRlReady();
-		writeLine(out, "READY " + (ready ? "1" : "0"));
+		writeLine(channel, "READY " + (ready ? "1" : "0"));
 	}
 
-	private void writeLine(DataOutputStream out, String line) throws IOException {
-		out.write((line + "\n").getBytes("UTF-8"));
-		out.flush();
+	private void writeLine(SocketChannel channel, String line) throws IOException {
+		synchronized (writeLock) {
+			if (lineBuffer.capacity() < line.length() + 1) {
+				lineBuffer = ByteBuffer.allocateDirect(Integer.highestOneBit(line.length() + 1) << 1);
+			}
+			lineBuffer.clear();
+			RLFrameEncoder.putAscii(lineBuffer, line);
+			lineBuffer.put((byte) '\n');
+			lineBuffer.flip();
+			while (lineBuffer.hasRemaining()) {
+				channel.write(lineBuffer);
+			}
+		}
 	}
 
 	private int parseInt(String value) {
@@ -0,0 +1,129 @@
+import java.io.IOException;
+import java.nio.ByteBuffer;
+import java.nio.channels.GatheringByteChannel;
+import java.util.stream.IntStream;
+
+/**
+ * Packs client pixels into RGB frames for the RL bridge.
+ *
+ * All buffers are allocated once per frame size and reused, so steady-state
+ * encoding produces no garbage. Pixels are packed straight into the direct
+ * payload buffer with absolute puts, large frames in parallel row bands, and
+ * the header and payload go out in a single gathering write.
+ */
+final class RLFrameEncoder {
+
+	/**
+	 * Frames with at least this many pixels are packed on the common pool.
+	 */
+	static final int PARALLEL_THRESHOLD = 1 << 17;
+
+	private static final int BANDS = Math.max(1, Math.min(8, Runtime.getRuntime().availableProcessors()));
+
+	private final ByteBuffer header = ByteBuffer.allocateDirect(64);
+	private final ByteBuffer[] gather = new ByteBuffer[2];
+	private ByteBuffer payload;
+	private boolean parallel = true;
+	private int width;
+	private int height;
+	private int length;
+
+	void setParallel(boolean parallel) {
+		this.parallel = parallel;
+	}
+
+	boolean hasFrame() {
+		return length > 0;
+	}
+
+	/**
+	 * Packs {@code pixels} (0xRRGGBB ints) and prepares the FRAME header.
+	 */
+	void encode(int[] pixels, int width, int height) {
+		int count = width * height;
+		int len = count * 3;
+		if (payload == null || payload.capacity() < len) {
+			payload = ByteBuffer.allocateDirect(len);
+		}
+		// write() narrows the limit; absolute puts are checked against it.
+		payload.clear();
+		final ByteBuffer dst = payload;
+		if (parallel && count >= PARALLEL_THRESHOLD && BANDS > 1) {
+			final int band = (count + BANDS - 1) / BANDS;
+			IntStream.range(0, BANDS).parallel().forEach(b -> {
+				int from = b * band;
+				packRgb(pixels, dst, from, Math.min(count, from + band));
+			});
+		} else {
+			packRgb(pixels, dst, 0, count);
+		}
+		this.width = width;
+		this.height = height;
+		this.length = len;
+	}
+
+	/**
+	 * Writes the most recently encoded frame to {@code channel}.
+	 */
+	void write(GatheringByteChannel channel) throws IOException {
+		header.clear();
+		putAscii(header, "FRAME ");
+		putInt(header, width);
+		header.put((byte) ' ');
+		putInt(header, height);
+		putAscii(header, " 3 ");
+		putInt(header, length);
+		header.put((byte) '\n');
+		header.flip();
+		payload.limit(length);
+		payload.position(0);
+		gather[0] = header;
+		gather[1] = payload;
+		while (payload.hasRemaining()) {
+			channel.write(gather);
+		}
+	}
+
+	/**
+	 * Absolute puts leave the buffer position alone, so bands can fill
+	 * disjoint ranges of the same buffer concurrently.
+	 */
+	static void packRgb(int[] src, ByteBuffer dst, int from, int to) {
+		int idx = from * 3;
+		for (int i = from; i < to; i++) {
+			int p = src[i];
+			dst.put(idx, (byte) (p >> 16));
+			dst.put(idx + 1, (byte) (p >> 8));
+			dst.put(idx + 2, (byte) p);
+			idx += 3;
+		}
+	}
+
+	static void putAscii(ByteBuffer buf, String s) {
+		for (int i = 0; i < s.length(); i++) {
+			buf.put((byte) s.charAt(i));
+		}
+	}
+
+	static void putInt(ByteBuffer buf, int value) {
+		if (value == 0) {
+			buf.put((byte) '0');
+			return;
+		}
+		if (value < 0) {
+			buf.put((byte) '-');
+			value = -value;
+		}
+		int start = buf.position();
+		while (value > 0) {
+			buf.put((byte) ('0' + value % 10));
+			value /= 10;
+		}
+		int end = buf.position() - 1;
+		while (start < end) {
+			byte tmp = buf.get(start);
+			buf.put(start++, buf.get(end));
+			buf.put(end--, tmp);
+		}
+	}
+}
@@ -0,0 +1,83 @@
+import java.nio.ByteBuffer;
+import java.nio.channels.GatheringByteChannel;
+import java.util.Random;
+
+/**
+ * Simple timing harness for {@link RLFrameEncoder}.
+ *
+ * Run with {@code java -cp target/client-1.0-jar-with-dependencies.jar RLFrameEncoderBench [iterations]}.
+ */
+public final class RLFrameEncoderBench {
+
+	public static void main(String[] args) throws Exception {
+		int iterations = args.length > 0 ? Integer.parseInt(args[0]) : 2000;
+		int width = 765;
+		int height = 503;
+		int[] pixels = new int[width * height];
+		Random random = new Random(1L);
+		for (int i = 0; i < pixels.length; i++) {
+			pixels[i] = random.nextInt() & 0xffffff;
+		}
+		NullChannel sink = new NullChannel();
+		for (boolean parallel : new boolean[] { false, true }) {
+			RLFrameEncoder encoder = new RLFrameEncoder();
+			encoder.setParallel(parallel);
+			for (int i = 0; i < iterations / 4; i++) {
+				encoder.encode(pixels, width, height);
+				encoder.write(sink);
+			}
+			System.gc();
+			long gcBefore = gcCount();
+			long start = System.nanoTime();
+			for (int i = 0; i < iterations; i++) {
+				encoder.encode(pixels, width, height);
+				encoder.write(sink);
+			}
+			long elapsed = System.nanoTime() - start;
+			double perFrameUs = elapsed / 1000.0 / iterations;
+			System.out.println((parallel ? "parallel" : "serial  ") + ": " + String.format(java.util.Locale.US, "%.1f", perFrameUs)
+					+ " us/frame, " + String.format(java.util.Locale.US, "%.1f", 1e6 / perFrameUs) + " frames/s, gc runs: " + (gcCount() - gcBefore));
+		}
+	}
+
+	private static long gcCount() {
+		long count = 0;
+		for (java.lang.management.GarbageCollectorMXBean gc : java.lang.management.ManagementFactory.getGarbageCollectorMXBeans()) {
+			count += Math.max(0, gc.getCollectionCount());
+		}
+		return count;
+	}
+
+	private static final class NullChannel implements GatheringByteChannel {
+		@Override
+		public long write(ByteBuffer[] srcs, int offset, int length) {
+			long total = 0;
+			for (int i = offset; i < offset + length; i++) {
+				total += srcs[i].remaining();
+				srcs[i].position(srcs[i].limit());
+			}
+			return total;
+		}
+
+		@Override
+		public long write(ByteBuffer[] srcs) {
+			return write(srcs, 0, srcs.length);
+		}
+
+		@Override
+		public int write(ByteBuffer src) {
+			int n = src.remaining();
+			src.position(src.limit());
+			return n;
+		}
+
+		@Override
+		public boolean isOpen() {
+			return true;
+		}
+
+		@Override
+		public void close() {
+		}
+	}
+}
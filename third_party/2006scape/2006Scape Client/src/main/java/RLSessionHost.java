@@ -0,0 +1,157 @@
+import java.io.BufferedReader;
+import java.io.FileReader;
+import java.io.IOException;
+import java.lang.reflect.Method;
+import java.net.URL;
+import java.net.URLClassLoader;
+import java.util.ArrayList;
+import java.util.List;
+
+/**
+ * Runs several headless RL client sessions inside one JVM.
+ *
+ * Each session is loaded by its own child-first class loader, so the client's
+ * static state (settings, drawing buffers, model and texture caches) stays
+ * private to it, cache data included. What the sessions share is the JVM
+ * itself (JDK classes, GC, code cache); the host logs the heap each session
+ * adds.
+ *
+ * Usage: java -cp client.jar RLSessionHost -sessions 4 -rl-port 5700 -u agent -p rl [client args]
+ * Session i serves its bridge on rl-port + i and logs in as username + i.
+ */
+public final class RLSessionHost {
+
+	public static void main(String[] args) throws Exception {
+		int sessions = 1;
+		int basePort = 5656;
+		String username = "agent";
+		String password = "rl";
+		long staggerMs = 2000L;
+		List<String> clientArgs = new ArrayList<>();
+		for (int i = 0; i < args.length; i++) {
+			switch (args[i]) {
+				case "-sessions":
+					sessions = Integer.parseInt(args[++i]);
+					break;
+				case "-rl-port":
+					basePort = Integer.parseInt(args[++i]);
+					break;
+				case "-u":
+				case "-username":
+					username = args[++i];
+					break;
+				case "-p":
+				case "-password":
+					password = args[++i];
+					break;
+				case "-session-stagger-ms":
+					staggerMs = Long.parseLong(args[++i]);
+					break;
+				default:
+					clientArgs.add(args[i]);
+					break;
+			}
+		}
+		System.setProperty("java.awt.headless", "true");
+		URL[] urls = { RLSessionHost.class.getProtectionDomain().getCodeSource().getLocation() };
+		long heapBefore = usedHeapAfterGc();
+		long rssBefore = rssKb();
+		System.out.println("RL session host baseline: heap " + (heapBefore >> 20) + " MB, rss " + (rssBefore >> 10) + " MB");
+		for (int s = 0; s < sessions; s++) {
+			List<String> sessionArgs = new ArrayList<>(clientArgs);
+			sessionArgs.add("-rl");
+			sessionArgs.add("-headless");
+			sessionArgs.add("-rl-port");
+			sessionArgs.add(Integer.toString(basePort + s));
+			sessionArgs.add("-u");
+			sessionArgs.add(sessions == 1 ? username : username + s);
+			sessionArgs.add("-p");
+			sessionArgs.add(password);
+			startSession(urls, sessionArgs.toArray(new String[0]));
+			System.out.println("RL session " + s + " started on port " + (basePort + s));
+			if (staggerMs > 0) {
+				// the server rejects logins from one host that arrive too close together;
+				// the wait also lets the session load before its heap cost is sampled
+				Thread.sleep(staggerMs);
+			}
+			long heap = usedHeapAfterGc();
+			long rss = rssKb();
+			System.out.println("RL session " + s + " heap +" + ((heap - heapBefore) >> 20) + " MB (total " + (heap >> 20)
+					+ " MB), rss +" + ((rss - rssBefore) >> 10) + " MB (total " + (rss >> 10) + " MB)");
+			heapBefore = heap;
+			rssBefore = rss;
+		}
+	}
+
+	private static long usedHeapAfterGc() {
+		System.gc();
+		Runtime rt = Runtime.getRuntime();
+		return rt.totalMemory() - rt.freeMemory();
+	}
+
+	/**
+	 * Resident set size of this JVM from /proc (Linux), or 0 where unavailable.
+	 */
+	private static long rssKb() {
+		try (BufferedReader reader = new BufferedReader(new FileReader("/proc/self/status"))) {
+			String line;
+			while ((line = reader.readLine()) != null) {
+				if (line.startsWith("VmRSS:")) {
+					return Long.parseLong(line.substring(6).trim().split("\\s+")[0]);
+				}
+			}
+		} catch (IOException | NumberFormatException e) {
+			// not Linux
+		}
+		return 0L;
+	}
+
+	private static void startSession(URL[] urls, String[] args) throws Exception {
+		ClassLoader loader = new SessionLoader(urls, RLSessionHost.class.getClassLoader());
+		Thread current = Thread.currentThread();
+		ClassLoader previous = current.getContextClassLoader();
+		current.setContextClassLoader(loader);
+		try {
+			Method main = loader.loadClass("Main").getMethod("main", String[].class);
+			main.invoke(null, (Object) args);
+		} finally {
+			current.setContextClassLoader(previous);
+		}
+	}
+
+	/**
+	 * Loads the client's own classes itself and the JDK from the parent.
+	 */
+	private static final class SessionLoader extends URLClassLoader {
+
+		SessionLoader(URL[] urls, ClassLoader parent) {
+			super(urls, parent);
+		}
+
+		@Override
+		protected Class<?> loadClass(String name, boolean resolve) throws ClassNotFoundException {
+			if (name.startsWith("java.") || name.startsWith("javax.") || name.startsWith("sun.")) {
+				return super.loadClass(name, resolve);
+			}
+			synchronized (getClassLoadingLock(name)) {
+				Class<?> c = findLoadedClass(name);
+				if (c == null) {
+					try {
+						c = findClass(name);
+					} catch (ClassNotFoundException e) {
+						c = super.loadClass(name, false);
+					}
+				}
+				if (resolve) {
+					resolveClass(c);
+				}
+				return c;
+			}
+		}
+
+		@Override
+		public void close() throws IOException {
+			// sessions live as long as the host
+		}
+	}
+}
@@ -280,6 +280,20 @@ public class RSApplet extends Applet implements Runnable, MouseListener, MouseWh
 					return;
 				}
 			}
+			if (ClientSettings.RL_STEPPED) {
+				int cycles = RLBridge.awaitAdvance();
+				for (int c = 0; c < cycles; c++) {
+					clickMode3 = clickMode1;
+					saveClickX = clickX;
+					saveClickY = clickY;
+					aLong29 = clickTime;
+					clickMode1 = 0;
+					processGameLoop();
+					readIndex = writeIndex;
+				}
+				processDrawing();
+				continue;
+			}
 			int i2 = j;
 			int j2 = k;
 			j = 300;
@@ -83,8 +83,22 @@ public class ConfigLoader {
             Constants.CYCLE_TIME = obj.getInt("cycle_time_ms");
         if (obj.has("rl_tick_report_every"))
             Constants.RL_TICK_REPORT_EVERY = obj.getInt("rl_tick_report_every");
+        if (obj.has("rl_telemetry_every"))
+            Constants.RL_TELEMETRY_EVERY = obj.getInt("rl_telemetry_every");
         if (obj.has("rl_tick_report_file"))
             Constants.RL_TICK_REPORT_FILE = obj.getString("rl_tick_report_file");
+        if (obj.has("rl_lockstep"))
+            Constants.RL_LOCKSTEP = obj.getBoolean("rl_lockstep");
+        if (obj.has("rl_control_port"))
+            Constants.RL_CONTROL_PORT = obj.getInt("rl_control_port");
+        if (obj.has("rl_lockstep_timeout_ms"))
+            Constants.RL_LOCKSTEP_TIMEOUT_MS = obj.getInt("rl_lockstep_timeout_ms");
+        if (obj.has("characters_dir"))
+            Constants.CHARACTERS_DIR = obj.getString("characters_dir");
+        if (obj.has("rl_account_reset_dir"))
+            Constants.RL_ACCOUNT_RESET_DIR = obj.getString("rl_account_reset_dir");
+        if (obj.has("rl_mass_save"))
+            Constants.RL_MASS_SAVE = obj.getString("rl_mass_save");
     }
 
     private static void initialize() {
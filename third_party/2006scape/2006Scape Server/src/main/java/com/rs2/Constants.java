@@ -82,9 +82,16 @@ public class Constants {
             "skorge", "tortured soul", "undead chicken", "undead cow", "undead one", "undead troll", "zombie", "zombie rat", "zogre"
     };
 
-    public static int CYCLE_TIME = 600;
+    public static volatile int CYCLE_TIME = 600;
     public static int RL_TICK_REPORT_EVERY = 50;
+    public static int RL_TELEMETRY_EVERY = 0;
     public static String RL_TICK_REPORT_FILE = "data/rl_tick.json";
+    public static boolean RL_LOCKSTEP = false;
+    public static int RL_CONTROL_PORT = 43610;
+    public static int RL_LOCKSTEP_TIMEOUT_MS = 60000;
+    public static String CHARACTERS_DIR = System.getProperty("user.dir") + "/data/characters";
+    public static String RL_ACCOUNT_RESET_DIR = "";
+    public static String RL_MASS_SAVE = "sync";
 
     public final static int BUFFER_SIZE = 10000;
 
@@ -9,6 +9,7 @@ import java.io.IOException;
 import java.nio.file.Paths;
 import java.util.concurrent.Executors;
 import java.util.concurrent.ScheduledExecutorService;
+import java.util.concurrent.ScheduledFuture;
 import java.util.concurrent.TimeUnit;
 import java.util.concurrent.locks.Lock;
 import java.util.concurrent.locks.ReentrantLock;
@@ -119,6 +120,9 @@ public class GameEngine {
 	public static Trawler trawler = new Trawler();
 	private final static ScheduledExecutorService scheduler = Executors.newScheduledThreadPool(1);
 	private final static Lock lock = new ReentrantLock();
+	private static Runnable fixedRateTick;
+	private static ScheduledFuture<?> fixedRateFuture;
+	private static RLControlServer rlControl;
 	public static ControlPanel panel;
 	private static long serverStartTime;
 
@@ -126,6 +130,36 @@ public class GameEngine {
 		shutdownServer = false;
 	}
 
+	/**
+	 * Periodic save of every online player. {@code rl_mass_save} picks how:
+	 * "sync" writes each file inside the tick, "async" only snapshots the
+	 * characters in the tick and writes them on a background thread, "off"
+	 * skips the mass save (logout saves still happen). In RL mode the
+	 * per-player log lines are folded into one summary line.
+	 */
+	private static void massSave() {
+		lastMassSave = System.currentTimeMillis();
+		if ("off".equals(Constants.RL_MASS_SAVE)) {
+			return;
+		}
+		long start = System.currentTimeMillis();
+		int saved = 0;
+		for (Player p : PlayerHandler.players) {
+			if (p == null) {
+				continue;
+			}
+			if (PlayerSave.saveGame((Client) p, true)) {
+				saved++;
+			}
+			if (!Constants.RL_MODE) {
+				System.out.println("Saved game for " + p.playerName + ".");
+			}
+		}
+		if (Constants.RL_MODE && saved > 0) {
+			System.out.println("Saved " + saved + " players (" + Constants.RL_MASS_SAVE + ") in " + (System.currentTimeMillis() - start) + " ms.");
+		}
+	}
+
 	public static void main(java.lang.String[] args)
 			throws NullPointerException, IOException {
 		CustomPrintStream errorStream = new CustomPrintStream(System.err, "ERROR", true);
@@ -259,8 +293,11 @@ public class GameEngine {
 		 * tick.
 		 *
 		 * scheduleAtFixedRate() does not invoke concurrent Runnables.
+		 *
+		 * In RL lockstep mode the next tick starts as soon as every attached
+		 * agent has acknowledged the previous one instead.
 		 */
-		scheduler.scheduleAtFixedRate(new Runnable() {
+		Runnable gameTick = new Runnable() {
 			int gameTicksIncrementor;
 			final int printInfoTick = Constants.CYCLE_LOGGING_TICK;
 			long rlWindowTicks;
@@ -332,14 +369,7 @@ public class GameEngine {
 					checkAndLogDuration("IntegrationEvents", durationIntegrationEvents);
 					long startSaveEvents = System.currentTimeMillis();
 					if (System.currentTimeMillis() - lastMassSave > 300000) {
-						for (Player p : PlayerHandler.players) {
-							if (p == null) {
-								continue;
-							}
-							PlayerSave.saveGame((Client) p);
-							System.out.println("Saved game for " + p.playerName + ".");
-							lastMassSave = System.currentTimeMillis();
-						}
+						massSave();
 					}
 					long durationSaveEvents = System.currentTimeMillis() - startSaveEvents;
 					checkAndLogDuration("SaveEvents", durationSaveEvents);
@@ -369,6 +399,9 @@ public class GameEngine {
 							rlWindowOverruns = 0;
 						}
 					}
+					if (rlControl != null && Constants.RL_TELEMETRY_EVERY > 0) {
+						rlControl.recordTick(totalCycleDuration);
+					}
 					gameTicksIncrementor++;
 					if (Constants.CYCLE_LOGGING && gameTicksIncrementor > 1 && gameTicksIncrementor % printInfoTick == 0) {
 						long totalMem = Runtime.getRuntime().totalMemory();
@@ -410,7 +443,18 @@ public class GameEngine {
 					scheduler.shutdown(); // Kills the tickloop thread if Exception is thrown.
 				}
 			}
-		}, 0, Constants.CYCLE_TIME, TimeUnit.MILLISECONDS);
+		};
+		if (Constants.RL_LOCKSTEP || Constants.RL_TELEMETRY_EVERY > 0) {
+			rlControl = RLControlServer.start(Constants.RL_CONTROL_PORT);
+		}
+		if (Constants.RL_LOCKSTEP) {
+			scheduler.execute(() -> runLockstep(gameTick, rlControl));
+		} else {
+			synchronized (GameEngine.class) {
+				fixedRateTick = gameTick;
+				fixedRateFuture = scheduler.scheduleAtFixedRate(gameTick, 0, Constants.CYCLE_TIME, TimeUnit.MILLISECONDS);
+			}
+		}
 
 		/*
 		 * I'd recommend disabling this until I can be bothered to implement it
@@ -430,6 +474,44 @@ public class GameEngine {
 		System.exit(0);
 	}
 	
+	/**
+	 * Changes the tick period of a running server. With a fixed-rate tick the
+	 * schedule is replaced, so the new period applies from the next tick; in
+	 * lockstep it only changes the pace used while no agent is attached.
+	 *
+	 * @return the period now in effect
+	 */
+	public static synchronized int setCycleTime(int ms) {
+		Constants.CYCLE_TIME = Math.max(10, ms);
+		if (fixedRateFuture != null && !scheduler.isShutdown()) {
+			fixedRateFuture.cancel(false);
+			fixedRateFuture = scheduler.scheduleAtFixedRate(fixedRateTick, Constants.CYCLE_TIME, Constants.CYCLE_TIME, TimeUnit.MILLISECONDS);
+		}
+		System.out.println("RL control: cycle time set to " + Constants.CYCLE_TIME + " ms.");
+		return Constants.CYCLE_TIME;
+	}
+
+	private static void runLockstep(Runnable gameTick, RLControlServer control) {
+		long tick = 0;
+		while (!scheduler.isShutdown()) {
+			long start = System.currentTimeMillis();
+			gameTick.run();
+			tick++;
+			control.publishTick(tick);
+			if (!control.awaitAcks(tick, Constants.RL_LOCKSTEP_TIMEOUT_MS)) {
+				// No agent attached (e.g. still logging in): keep the normal pace.
+				long sleep = Constants.CYCLE_TIME - (System.currentTimeMillis() - start);
+				if (sleep > 0) {
+					try {
+						Thread.sleep(sleep);
+					} catch (InterruptedException e) {
+						return;
+					}
+				}
+			}
+		}
+	}
+
 	private static void checkAndLogDuration(String processName, long duration) {
 		if (duration > 500) {
 			System.err.println("ERROR: " + processName + " duration exceeded 500 ms! Duration: " + duration + " ms.");
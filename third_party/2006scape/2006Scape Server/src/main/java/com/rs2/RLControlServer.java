@@ -0,0 +1,272 @@
+package com.rs2;
+
+import java.io.BufferedReader;
+import java.io.IOException;
+import java.io.InputStreamReader;
+import java.io.OutputStream;
+import java.net.InetAddress;
+import java.net.ServerSocket;
+import java.net.Socket;
+import java.nio.charset.StandardCharsets;
+import java.util.List;
+import java.util.concurrent.CopyOnWriteArrayList;
+
+/**
+ * Line based control channel for RL agents.
+ *
+ * An agent sends ATTACH and from then on receives "TICK n" after every game
+ * tick. In lockstep mode the game engine does not start the next tick until
+ * every attached agent has answered "ACK n". Agents that do not answer within
+ * the lockstep timeout are detached so a stalled agent cannot freeze the world.
+ *
+ * A session that sends "STATS ON" also receives a TICKSTATS line every
+ * {@code rl_telemetry_every} ticks: tick count, average and max duration in ms,
+ * overruns, the cycle time, then one count per {@link #HISTOGRAM_MS} bucket.
+ * "SET_CYCLE ms" changes the tick period of the running server.
+ */
+public final class RLControlServer implements Runnable {
+
+	private final int port;
+	/** Upper bounds (ms) of the tick duration histogram; a last bucket holds the rest. */
+	static final long[] HISTOGRAM_MS = {5, 10, 25, 50, 100, 250, 500};
+
+	private final List<Session> sessions = new CopyOnWriteArrayList<>();
+	private final Object ackLock = new Object();
+	private volatile long publishedTick;
+	private final Object statsLock = new Object();
+	private final long[] histogram = new long[HISTOGRAM_MS.length + 1];
+	private long statsTicks;
+	private long statsTotalMs;
+	private long statsMaxMs;
+	private long statsOverruns;
+
+	private RLControlServer(int port) {
+		this.port = port;
+	}
+
+	public static RLControlServer start(int port) {
+		RLControlServer server = new RLControlServer(port);
+		Thread thread = new Thread(server, "RLControl");
+		thread.setDaemon(true);
+		thread.start();
+		return server;
+	}
+
+	@Override
+	public void run() {
+		try (ServerSocket serverSocket = new ServerSocket(port, 50, InetAddress.getLoopbackAddress())) {
+			System.out.println("RL control channel listening on port " + port);
+			while (!GameEngine.shutdownServer) {
+				Socket socket = serverSocket.accept();
+				socket.setTcpNoDelay(true);
+				Session session = new Session(socket);
+				sessions.add(session);
+				Thread thread = new Thread(session, "RLControl-" + socket.getPort());
+				thread.setDaemon(true);
+				thread.start();
+			}
+		} catch (IOException e) {
+			System.err.println("RL control channel stopped: " + e.getMessage());
+		}
+	}
+
+	/**
+	 * Tells every attached agent that {@code tick} has been processed.
+	 */
+	public void publishTick(long tick) {
+		synchronized (ackLock) {
+			publishedTick = tick;
+		}
+		for (Session session : sessions) {
+			if (session.attached) {
+				session.send("TICK " + tick);
+			}
+		}
+	}
+
+	/**
+	 * Adds one tick to the telemetry window and, once the window is full,
+	 * sends it to every session that asked for stats.
+	 */
+	public void recordTick(long durationMs) {
+		String line;
+		synchronized (statsLock) {
+			statsTicks++;
+			statsTotalMs += durationMs;
+			statsMaxMs = Math.max(statsMaxMs, durationMs);
+			if (durationMs > Constants.CYCLE_TIME) {
+				statsOverruns++;
+			}
+			int bucket = 0;
+			while (bucket < HISTOGRAM_MS.length && durationMs > HISTOGRAM_MS[bucket]) {
+				bucket++;
+			}
+			histogram[bucket]++;
+			if (statsTicks < Constants.RL_TELEMETRY_EVERY) {
+				return;
+			}
+			StringBuilder sb = new StringBuilder("TICKSTATS ");
+			sb.append(statsTicks)
+					.append(' ').append(String.format(java.util.Locale.US, "%.3f", (double) statsTotalMs / statsTicks))
+					.append(' ').append(statsMaxMs)
+					.append(' ').append(statsOverruns)
+					.append(' ').append(Constants.CYCLE_TIME);
+			for (int i = 0; i < histogram.length; i++) {
+				sb.append(' ').append(histogram[i]);
+				histogram[i] = 0;
+			}
+			line = sb.toString();
+			statsTicks = 0;
+			statsTotalMs = 0;
+			statsMaxMs = 0;
+			statsOverruns = 0;
+		}
+		for (Session session : sessions) {
+			if (session.stats) {
+				session.send(line);
+			}
+		}
+	}
+
+	/**
+	 * Blocks until every attached agent has acknowledged {@code tick}.
+	 *
+	 * @return false if no agent is attached, true otherwise
+	 */
+	public boolean awaitAcks(long tick, long timeoutMs) {
+		long deadline = System.currentTimeMillis() + timeoutMs;
+		synchronized (ackLock) {
+			while (true) {
+				boolean any = false;
+				boolean pending = false;
+				for (Session session : sessions) {
+					if (!session.attached) {
+						continue;
+					}
+					any = true;
+					if (session.acked < tick) {
+						pending = true;
+					}
+				}
+				if (!pending) {
+					return any;
+				}
+				long left = deadline - System.currentTimeMillis();
+				if (left <= 0) {
+					for (Session session : sessions) {
+						if (session.attached && session.acked < tick) {
+							System.err.println("RL control: no ACK for tick " + tick + " within " + timeoutMs + " ms, detaching " + session.name);
+							session.attached = false;
+							session.send("DETACHED");
+						}
+					}
+					return true;
+				}
+				try {
+					ackLock.wait(left);
+				} catch (InterruptedException e) {
+					Thread.currentThread().interrupt();
+					return true;
+				}
+			}
+		}
+	}
+
+	private final class Session implements Runnable {
+
+		private final Socket socket;
+		private final String name;
+		private volatile boolean attached;
+		private volatile long acked;
+		private volatile boolean stats;
+
+		Session(Socket socket) {
+			this.socket = socket;
+			this.name = socket.getRemoteSocketAddress().toString();
+		}
+
+		@Override
+		public void run() {
+			try (BufferedReader reader = new BufferedReader(new InputStreamReader(socket.getInputStream(), StandardCharsets.US_ASCII))) {
+				String line;
+				while ((line = reader.readLine()) != null) {
+					String[] parts = line.trim().split(" ");
+					switch (parts[0]) {
+						case "ATTACH":
+							long tick;
+							synchronized (ackLock) {
+								tick = publishedTick;
+								acked = tick - 1;
+								attached = true;
+								ackLock.notifyAll();
+							}
+							send("ATTACHED " + tick);
+							break;
+						case "DETACH":
+							synchronized (ackLock) {
+								attached = false;
+								ackLock.notifyAll();
+							}
+							send("DETACHED");
+							break;
+						case "ACK":
+							if (parts.length >= 2) {
+								synchronized (ackLock) {
+									acked = Math.max(acked, Long.parseLong(parts[1]));
+									ackLock.notifyAll();
+								}
+							}
+							break;
+						case "PING":
+							send("PONG");
+							break;
+						case "STATS":
+							stats = parts.length < 2 || !"OFF".equals(parts[1]);
+							send("STATS " + (stats ? "ON" : "OFF"));
+							break;
+						case "SET_CYCLE":
+							if (parts.length < 2) {
+								send("ERR usage");
+								break;
+							}
+							send("CYCLE " + GameEngine.setCycleTime(Integer.parseInt(parts[1])));
+							break;
+						default:
+							send("ERR unknown");
+							break;
+					}
+				}
+			} catch (IOException | NumberFormatException e) {
+				// connection dropped or garbage; treat both as a disconnect
+			} finally {
+				synchronized (ackLock) {
+					attached = false;
+					sessions.remove(this);
+					ackLock.notifyAll();
+				}
+				try {
+					socket.close();
+				} catch (IOException e) {
+					// ignore
+				}
+			}
+		}
+
+		void send(String line) {
+			byte[] bytes = (line + "\n").getBytes(StandardCharsets.US_ASCII);
+			synchronized (this) {
+				try {
+					OutputStream out = socket.getOutputStream();
+					out.write(bytes);
+					out.flush();
+				} catch (IOException e) {
+					try {
+						socket.close();
+					} catch (IOException ignored) {
+						// ignore
+					}
+				}
+			}
+		}
+	}
+}
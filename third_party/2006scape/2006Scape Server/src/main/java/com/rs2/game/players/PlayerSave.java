@@ -6,6 +6,11 @@ import java.security.MessageDigest;
 import java.security.NoSuchAlgorithmException;
 import java.util.Base64;
 import java.util.Map;
+import java.util.concurrent.ConcurrentHashMap;
+import java.util.concurrent.ExecutorService;
+import java.util.concurrent.Executors;
+import java.util.concurrent.Future;
+import java.util.concurrent.FutureTask;
 
 import com.rs2.util.Misc;
 
@@ -18,6 +23,29 @@ public class PlayerSave {
 		return loadPlayerInfo(player, playerName, playerPass, true);
 	}
 
+	/**
+	 * Replaces a character file with the copy an RL account pool left in
+	 * {@code rl_account_reset_dir}. Done at login, after any save from the
+	 * previous session, so the reset cannot be overwritten.
+	 */
+	private static void applyPendingReset(String playerName) {
+		if (com.rs2.Constants.RL_ACCOUNT_RESET_DIR.isEmpty()) {
+			return;
+		}
+		File pending = new File(com.rs2.Constants.RL_ACCOUNT_RESET_DIR, playerName + ".txt");
+		if (!pending.isFile()) {
+			return;
+		}
+		File target = new File(com.rs2.Constants.CHARACTERS_DIR, playerName + ".txt");
+		try {
+			target.getParentFile().mkdirs();
+			java.nio.file.Files.move(pending.toPath(), target.toPath(), java.nio.file.StandardCopyOption.REPLACE_EXISTING);
+			System.out.println(playerName + ": character reset from account pool template.");
+		} catch (IOException e) {
+			System.out.println(playerName + ": could not apply account reset: " + e.getMessage());
+		}
+	}
+
 	public static int loadPlayerInfo(Client player, String playerName, String playerPass, boolean doRealLogin)	{
 		String line = "";
 		String token = "";
@@ -30,9 +58,11 @@ public class PlayerSave {
 
 		if (player.playerName == null) {
 			System.out.println("WARNING: called loadPlayerInfo with a Client who does not have a .playerName");
+		} else if (doRealLogin) {
+			applyPendingReset(player.playerName);
 		}
 		try {
-			characterfile = new BufferedReader(new FileReader(System.getProperty("user.dir") + "/data/characters/" + player.playerName + ".txt"));
+			characterfile = new BufferedReader(new FileReader(com.rs2.Constants.CHARACTERS_DIR + "/" + player.playerName + ".txt"));
 			File1 = true;
 		} catch (FileNotFoundException fileex1) {
 		}
@@ -578,10 +608,56 @@ public class PlayerSave {
 		return hashed;
 	}
 
+	/**
+	 * Single writer thread for {@code rl_mass_save = "async"} queued saves.
+	 * Blocking saves (logout, duels, commands) never wait behind the queue:
+	 * they cancel or finish only their own player's pending write and then
+	 * write on the calling thread.
+	 */
+	private static ExecutorService saveWriter;
+
+	/**
+	 * The newest queued write per character file.
+	 */
+	private static final ConcurrentHashMap<String, Future<Boolean>> pendingWrites = new ConcurrentHashMap<>();
+
+	private static synchronized ExecutorService getSaveWriter() {
+		if (saveWriter == null) {
+			saveWriter = Executors.newSingleThreadExecutor(r -> {
+				Thread t = new Thread(r, "PlayerSaveWriter");
+				t.setDaemon(true);
+				return t;
+			});
+		}
+		return saveWriter;
+	}
+
+	private static boolean writeFile(String filePath, String text) {
+		try {
+			new File(filePath).getParentFile().mkdirs();
+			try (BufferedWriter out = new BufferedWriter(new FileWriter(filePath))) {
+				out.write(text);
+			}
+			return true;
+		} catch (IOException e) {
+			System.out.println("Could not save " + filePath + ": " + e.getMessage());
+			return false;
+		}
+	}
+
 	/**
 	 * Saving
 	 **/
 	public static boolean saveGame(Player player) {
+		return saveGame(player, false);
+	}
+
+	/**
+	 * Saves a player. The character text is always built on the calling
+	 * thread; with {@code async} and {@code rl_mass_save = "async"} the file
+	 * write is queued and this returns straight away.
+	 */
+	public static boolean saveGame(Player player, boolean async) {
 		if (!player.saveFile || player.newPlayer || !player.saveCharacter) {
 			// System.out.println("first");
 			return false;
@@ -598,10 +674,10 @@ public class PlayerSave {
 		}
 
 		BufferedWriter characterfile = null;
+		String filePath = com.rs2.Constants.CHARACTERS_DIR + "/" + player.playerName + ".txt";
+		StringWriter text = new StringWriter();
 		try {
-			String filePath = System.getProperty("user.dir") + "/data/characters/" + player.playerName + ".txt";
-			new File(filePath).getParentFile().mkdir();
-			characterfile = new BufferedWriter(new FileWriter(filePath));
+			characterfile = new BufferedWriter(text);
 
 			/* ACCOUNT */
 			characterfile.write("[ACCOUNT]");
@@ -952,7 +1028,34 @@ public class PlayerSave {
 			System.out.println(player.playerName + ": error writing file.");
 			return false;
 		}
-		return true;
+		if (!"async".equals(com.rs2.Constants.RL_MASS_SAVE)) {
+			return writeFile(filePath, text.toString());
+		}
+		final String contents = text.toString();
+		if (async) {
+			FutureTask<Boolean> task = new FutureTask<>(() -> writeFile(filePath, contents));
+			Future<Boolean> older = pendingWrites.put(filePath, task);
+			if (older != null) {
+				// superseded by this newer text; skipped if it has not started yet
+				older.cancel(false);
+			}
+			getSaveWriter().execute(() -> {
+				task.run();
+				pendingWrites.remove(filePath, task);
+			});
+			return true;
+		}
+		// This text is newer than any queued write of the same file: drop that write, or
+		// wait for it if the writer is already on it, so it cannot land after this one.
+		Future<Boolean> older = pendingWrites.remove(filePath);
+		if (older != null && !older.cancel(false)) {
+			try {
+				older.get();
+			} catch (Exception e) {
+				// its failure does not matter, this write replaces it
+			}
+		}
+		return writeFile(filePath, contents);
 	}
 
 }